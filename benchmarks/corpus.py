@@ -0,0 +1,116 @@
+"""
+Seeded generator of synthetic strings and message catalogs for the benchmarks.
+
+The strings mimic the messages of a typical application: mostly short labels, then sentences and a few paragraphs,
+with Python format and printf placeholders, HTML tags and escaped newlines mixed in.  The same seed always produces
+the same corpus, so results from different runs can be compared.
+"""
+
+import random
+
+import polib
+
+WORDS = (
+    "the of and to in is you that it for on are with as this be at have from or one had by word but not what all "
+    "were we when your can said there use an each which she do how their if will up other about out many then them "
+    "these so some her would make like him into time has look two more write go see number no way could people my "
+    "than first water been call who oil its now find long down day did get come made may part file folder account "
+    "password settings save cancel delete open close error warning message network connection server user profile "
+    "download upload search results page next previous select option please try again later invalid required"
+).split()
+
+PLACEHOLDERS = ("{name}", "{0}", "{count}", "%(x)s", "%(count)d", "%s", "%d")
+
+# (share of the corpus, minimum and maximum number of words)
+LENGTHS = ((0.45, 1, 3), (0.35, 4, 12), (0.15, 13, 30), (0.05, 31, 80))
+
+PLACEHOLDER_DENSITY = 0.08
+TAG_DENSITY = 0.03
+NEWLINE_DENSITY = 0.02
+
+
+def _word_count(rng):
+    threshold = rng.random()
+    for share, low, high in LENGTHS:
+        threshold -= share
+        if threshold < 0:
+            break
+    return rng.randint(low, high)
+
+
+def generate_string(rng):
+    """
+    Generates a single message.
+
+    :param rng: Instance of random.Random.
+    :returns: The message.
+    """
+    words = []
+    for index in range(_word_count(rng)):
+        roll = rng.random()
+        if roll < PLACEHOLDER_DENSITY:
+            words.append(rng.choice(PLACEHOLDERS))
+        elif roll < PLACEHOLDER_DENSITY + TAG_DENSITY:
+            words.append("<b>{}</b>".format(rng.choice(WORDS)))
+        else:
+            word = rng.choice(WORDS)
+            words.append(word.capitalize() if index == 0 else word)
+        if rng.random() < NEWLINE_DENSITY:
+            words.append("\\n")
+    message = " ".join(words)
+    if len(words) > 3:
+        message += rng.choice(".!?:")
+    return message
+
+
+def generate_strings(count, seed=0):
+    """
+    Generates a reproducible list of messages.
+
+    :param count: Number of messages.
+    :param seed: Seed of the random number generator.
+    :returns: List of messages.
+    """
+    rng = random.Random(seed)
+    return [generate_string(rng) for _ in range(count)]
+
+
+def write_catalog(filename, count, seed=0):
+    """
+    Writes a reproducible, untranslated PO message catalog.  About 5% of the entries have a plural form, 5% a
+    context, and all of them have a source reference.
+
+    :param filename: Filename of the message catalog.
+    :param count: Number of entries.
+    :param seed: Seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    seen = set()
+    with open(filename, "w", encoding="utf-8") as fileobj:
+        fileobj.write(
+            "# Synthetic benchmark catalog.\n"
+            "#\n"
+            'msgid ""\n'
+            'msgstr ""\n'
+            '"Project-Id-Version: benchmark\\n"\n'
+            '"MIME-Version: 1.0\\n"\n'
+            '"Content-Type: text/plain; charset=UTF-8\\n"\n'
+            '"Content-Transfer-Encoding: 8bit\\n"\n'
+            '"Plural-Forms: nplurals=2; plural=(n != 1);\\n"\n'
+        )
+        for index in range(count):
+            msgid = generate_string(rng)
+            while msgid in seen:
+                msgid = "{} ({})".format(msgid, index)
+            seen.add(msgid)
+            entry = polib.POEntry(
+                msgid=msgid,
+                occurrences=[("src/module{}.py".format(index % 97), str(index))],
+            )
+            roll = rng.random()
+            if roll < 0.05:
+                entry.msgid_plural = msgid + " %d"
+                entry.msgstr_plural = {0: "", 1: ""}
+            elif roll < 0.10:
+                entry.msgctxt = rng.choice(WORDS)
+            fileobj.write("\n" + entry.__unicode__())
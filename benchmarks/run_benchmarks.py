@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for pseudol10nutil.
+
+Times PseudoL10nUtil.pseudolocalize(), the compiled pipeline, every function in pseudol10nutil.transforms and
+POFileUtil.pseudolocalizefile() on a seeded synthetic corpus (see corpus.py), as well as the import of the package and
+the pseudo-localization of adversarial strings, and reports the number of operations per second and the peak memory of each benchmark.  Results can be written as JSON and compared with the results of an
+earlier run, in which case the exit status is 1 if any benchmark got slower or used more memory than allowed.
+
+Usage examples:
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 1000000 --output results.json
+    python benchmarks/run_benchmarks.py --compare baseline.json --tolerance 0.2
+"""
+
+import argparse
+import inspect
+import json
+import os.path
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import corpus
+
+from pseudol10nutil import POFileUtil, PseudoL10nUtil, PseudoTranslations, transforms
+from pseudol10nutil.pseudol10nutil import DEFAULT_PLACEHOLDER_REGEX
+
+
+def measure(func, repeat=1, memory=True):
+    """
+    Runs func repeat times and returns the shortest elapsed time in seconds, then once more with memory tracing and
+    returns the peak traced memory in bytes.  The memory is measured in a separate run since tracing allocations
+    slows everything down.
+
+    :returns: Tuple of the elapsed time and the peak memory (None if memory is False).
+    """
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def measure_import(repeat=1):
+    """
+    Imports the package repeat times in new interpreters and returns the shortest cumulative import time in seconds, as
+    reported by -X importtime.  The modules are compiled beforehand, so that the time isn't spent writing bytecode.
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        command = [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-X",
+            "pycache_prefix=" + tmpdir,
+            "-c",
+            "import pseudol10nutil",
+        ]
+        subprocess.run(command, capture_output=True, check=True, env=env)
+        elapsed = float("inf")
+        for _ in range(repeat):
+            stderr = subprocess.run(
+                command, capture_output=True, text=True, check=True, env=env
+            ).stderr
+            for line in stderr.splitlines():
+                fields = line.split("|")
+                if len(fields) == 3 and fields[2].strip() == "pseudol10nutil":
+                    elapsed = min(elapsed, int(fields[1]) / 1e6)
+    return elapsed
+
+
+def string_benchmarks(strings):
+    """
+    Returns (name, func) pairs of the benchmarks run on a list of strings.
+    """
+    util = PseudoL10nUtil()
+    pipeline = util.compile()
+    translations = PseudoTranslations(cache_size=len(strings))
+    for s in strings:  # Warm the cache, lookups are what is measured.
+        translations.gettext(s)
+
+    benchmarks = [
+        (
+            "PseudoL10nUtil.pseudolocalize",
+            lambda: [util.pseudolocalize(s) for s in strings],
+        ),
+        (
+            "PseudoL10nUtil.pseudolocalize_many",
+            lambda: util.pseudolocalize_many(strings),
+        ),
+        (
+            "CompiledPipeline.pseudolocalize",
+            lambda: [pipeline.pseudolocalize(s) for s in strings],
+        ),
+        (
+            "PseudoTranslations.gettext",
+            lambda: [translations.gettext(s) for s in strings],
+        ),
+    ]
+    for name, transform in inspect.getmembers(transforms, inspect.isfunction):
+        if name.startswith("_") or transform.__module__ != transforms.__name__:
+            continue
+        benchmarks.append(
+            (
+                "transforms.{}".format(name),
+                lambda transform=transform: [
+                    transform(s, DEFAULT_PLACEHOLDER_REGEX) for s in strings
+                ],
+            )
+        )
+    return benchmarks
+
+
+def adversarial_benchmarks(length):
+    """
+    Returns (name, func) pairs of the benchmarks pseudo-localizing strings of about length with unclosed placeholders,
+    which the placeholder regex alone takes quadratic time on.
+    """
+    util = PseudoL10nUtil()
+    strings = [
+        ("tags", "<" * length),
+        ("fields", "{" * length),
+        ("spaced fields", "{ " * (length // 2)),
+        ("mixed", "<{%(\\n" * (length // 6)),
+        ("fields before text", "{" * 63 + "a" * length),
+    ]
+    return [
+        (
+            "PseudoL10nUtil.pseudolocalize[unclosed {}]".format(name),
+            lambda s=s: util.pseudolocalize(s),
+        )
+        for name, s in strings
+    ]
+
+
+def catalog_benchmarks(input_filename, output_filename):
+    """
+    Returns (name, func) pairs of the benchmarks run on a message catalog.
+    """
+    pofileutil = POFileUtil()
+    return [
+        (
+            "POFileUtil.pseudolocalizefile",
+            lambda: pofileutil.pseudolocalizefile(input_filename, output_filename),
+        ),
+        (
+            "POFileUtil.pseudolocalizefile[streaming]",
+            lambda: pofileutil.pseudolocalizefile(
+                input_filename, output_filename, streaming=True
+            ),
+        ),
+    ]
+
+
+def run(args):
+    results = []
+
+    def record(name, func, count, repeat):
+        record_result(name, count, *measure(func, repeat, args.memory))
+
+    def record_result(name, count, elapsed, peak):
+        result = {
+            "name": name,
+            "count": count,
+            "seconds": elapsed,
+            "ops_per_sec": count / elapsed if elapsed else float("inf"),
+            "peak_bytes": peak,
+        }
+        results.append(result)
+        print(
+            "{:58} {:>14,.0f} ops/s  {:>12}".format(
+                name,
+                result["ops_per_sec"],
+                "" if peak is None else "{:.3f} MB".format(peak / 1e6),
+            ),
+            file=sys.stderr,
+        )
+
+    record_result("import pseudol10nutil", 1, measure_import(args.repeat), None)
+
+    strings = corpus.generate_strings(args.strings, args.seed)
+    for name, func in string_benchmarks(strings):
+        record(name, func, len(strings), args.repeat)
+    for name, func in adversarial_benchmarks(args.adversarial_length):
+        record(name, func, 1, args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in args.sizes:
+            input_filename = os.path.join(tmpdir, "input{}.po".format(size))
+            output_filename = os.path.join(tmpdir, "output{}.po".format(size))
+            corpus.write_catalog(input_filename, size, args.seed)
+            for name, func in catalog_benchmarks(input_filename, output_filename):
+                record("{}[{}]".format(name, size), func, size, 1)
+            os.remove(input_filename)
+
+    return {
+        "meta": {
+            "python": platform.python_implementation()
+            + " "
+            + platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "strings": args.strings,
+            "adversarial_length": args.adversarial_length,
+            "sizes": args.sizes,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Compares the results with those of an earlier run.
+
+    :returns: List of descriptions of the regressions, i.e. benchmarks whose ops/sec dropped or whose peak memory grew
+              by more than the tolerance (a fraction).
+    """
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        if result["ops_per_sec"] < old["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                "{}: {:,.0f} ops/s, was {:,.0f}".format(
+                    result["name"], result["ops_per_sec"], old["ops_per_sec"]
+                )
+            )
+        if (
+            result["peak_bytes"] is not None
+            and old["peak_bytes"] is not None
+            and result["peak_bytes"] > old["peak_bytes"] * (1 + tolerance)
+        ):
+            regressions.append(
+                "{}: peak {:,} bytes, was {:,}".format(
+                    result["name"], result["peak_bytes"], old["peak_bytes"]
+                )
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="*",
+        default=[1000, 100000],
+        help="numbers of entries of the message catalogs to benchmark (default: 1000 100000)",
+    )
+    parser.add_argument(
+        "--strings",
+        type=int,
+        default=10000,
+        help="number of strings in the string corpus (default: 10000)",
+    )
+    parser.add_argument(
+        "--adversarial-length",
+        type=int,
+        default=100000,
+        help="length of the adversarial strings (default: 100000)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="number of timed runs of each string benchmark, the fastest is reported (default: 3)",
+    )
+    parser.add_argument(
+        "--no-memory",
+        dest="memory",
+        action="store_false",
+        help="don't measure the peak memory, which takes one extra run of each benchmark",
+    )
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    parser.add_argument(
+        "--compare", help="JSON results of an earlier run to compare with"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed slowdown or memory growth when comparing, as a fraction (default: 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fileobj:
+            json.dump(report, fileobj, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fileobj:
+            regressions = compare(report, json.load(fileobj), args.tolerance)
+        for regression in regressions:
+            print("Regression: " + regression, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
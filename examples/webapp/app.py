@@ -1,16 +1,339 @@
 #!/usr/bin/env python3
 
-from flask import Flask, jsonify, make_response, redirect, render_template, request
+import bisect
+import collections
+import functools
+import itertools
+import os
+import tempfile
+import threading
+import time
+
+from flask import (
+    Flask,
+    Response,
+    g,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+)
+from werkzeug.exceptions import RequestEntityTooLarge
 
 import pseudol10nutil.transforms as xforms
-from pseudol10nutil import PseudoL10nUtil
+from pseudol10nutil import CompiledPipeline, POFileUtil, mofile, postream
+from pseudol10nutil.cache import LRUCache
 
 app = Flask(__name__)
 appname = "pseudol10nutil"
 api_version = "v1.0"
 api_base_url = "/{0}/api/{1}/".format(appname, api_version)
 ui_base_url = "/{0}/".format(appname)
-util = PseudoL10nUtil()
+# Largest catalog accepted by the catalog endpoint, in bytes.
+app.config["MAX_CATALOG_SIZE"] = int(
+    os.environ.get("PSEUDOL10NUTIL_MAX_CATALOG_SIZE", 32 * 1024 * 1024)
+)
+# Longest line of a PO file accepted by the catalog endpoint, in bytes.
+app.config["MAX_LINE_SIZE"] = int(
+    os.environ.get("PSEUDOL10NUTIL_MAX_LINE_SIZE", 1024 * 1024)
+)
+# Catalogs are read and sent back in chunks of about this many bytes.
+chunk_size = 64 * 1024
+mo_magic_numbers = (b"\xde\x12\x04\x95", b"\x95\x04\x12\xde")
+
+substitutions = {
+    "diacritics": xforms.transliterate_diacritic,
+    "fullwidth": xforms.transliterate_fullwidth,
+    "circled": xforms.transliterate_circled,
+    "none": None,
+}
+brackets = {
+    "square": xforms.square_brackets,
+    "angle": xforms.angle_brackets,
+    "curly": xforms.curly_brackets,
+    "none": None,
+}
+
+Options = collections.namedtuple("Options", ["substitution", "pad_length", "brackets"])
+default_options = Options("diacritics", True, "square")
+
+# Results shared by all of the requests, keyed on the options and the string.  LRUCache is thread-safe.
+results = LRUCache(4096)
+
+# Metrics exposed by the /metrics endpoint.
+registry = []
+
+
+class Metric:
+    """
+    Thread-safe metric with a value per combination of label values, rendered in the Prometheus text exposition format.
+    Each process has its own metrics, e.g. each gunicorn worker, so Prometheus has to scrape the workers one by one or
+    the app has to run with a single worker.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """
+        Returns the samples of the metric as (name suffix, labels, value) tuples, labels being (name, value) pairs.
+        """
+        with self._lock:
+            values = sorted(self._values.items())
+        return [("", tuple(zip(self.labelnames, key)), value) for key, value in values]
+
+    def render(self):
+        lines = [
+            "# HELP {} {}".format(self.name, self.documentation),
+            "# TYPE {} {}".format(self.name, self.type),
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(
+                "{}{}{} {}".format(
+                    self.name, suffix, format_labels(labels), format_value(value)
+                )
+            )
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # Count per bucket, the last one being +Inf, then the sum of the values.
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def samples(self):
+        bounds = [format_value(float(bound)) for bound in self.buckets] + ["+Inf"]
+        samples = []
+        for _, labels, counts in super().samples():
+            total = 0
+            for bound, count in zip(bounds, counts):
+                total += count
+                samples.append(("_bucket", labels + (("le", bound),), total))
+            samples.append(("_sum", labels, counts[-1]))
+            samples.append(("_count", labels, total))
+        return samples
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{{{}}}".format(
+        ",".join(
+            '{}="{}"'.format(
+                name,
+                value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+            )
+            for name, value in labels
+        )
+    )
+
+
+request_count = Counter(
+    "pseudol10nutil_requests_total",
+    "Requests handled, by route, method and status code.",
+    ["route", "method", "status"],
+)
+request_latency = Histogram(
+    "pseudol10nutil_request_duration_seconds",
+    "Time taken to handle requests, including streaming the response, by route.",
+    [0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10],
+    ["route"],
+)
+strings_per_request = Histogram(
+    "pseudol10nutil_strings_per_request",
+    "Strings pseudo-localized per request, by route.",
+    [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000],
+    ["route"],
+)
+characters_processed = Counter(
+    "pseudol10nutil_characters_total",
+    "Characters of the strings pseudo-localized, by route.",
+    ["route"],
+)
+
+
+@functools.lru_cache(maxsize=None)  # Bounded by the number of valid option sets
+def get_pipeline(options):
+    """
+    Returns the pipeline for a set of options.  Pipelines are immutable, so each one is built once and shared by all
+    of the requests (and threads) using the same options.
+    """
+    transforms = [substitutions[options.substitution]]
+    if options.pad_length:
+        transforms.append(xforms.pad_length)
+    transforms.append(brackets[options.brackets])
+    return CompiledPipeline([munge for munge in transforms if munge])
+
+
+def pseudolocalize(options, s):
+    if not isinstance(
+        s, str
+    ):  # Not cached, None gives "" and anything else a TypeError
+        return get_pipeline(options).pseudolocalize(s)
+    key = (options, s)
+    result = results.get(key)
+    if result is None:
+        result = get_pipeline(options).pseudolocalize(s)
+        results.put(key, result)
+    return result
+
+
+def parse_options(data):
+    """
+    Reads the options of an API request, e.g. {"substitution": "fullwidth", "pad_length": false, "brackets": "none"}.
+    Missing options keep their default value.
+
+    :returns: Options named tuple, or None if an option is not valid.
+    """
+    if data is None:
+        return default_options
+    if not isinstance(data, dict) or not set(data) <= set(Options._fields):
+        return None
+    options = default_options._replace(**data)
+    if (
+        options.substitution not in substitutions
+        or options.brackets not in brackets
+        or not isinstance(options.pad_length, bool)
+    ):
+        return None
+    return options
+
+
+def valid_strings(data):
+    """
+    Checks the strings of an API request, which have to be a list of strings or an object mapping keys to strings.
+    """
+    if isinstance(data, dict):
+        data = data.values()
+    elif not isinstance(data, list):
+        return False
+    return all(isinstance(s, str) for s in data)
+
+
+def error_response(status, message):
+    return make_response(
+        jsonify({"error": "{} Error: {}".format(status, message)}), status
+    )
+
+
+def record_strings(strings):
+    """
+    Records the number of strings of the current request and their characters.
+    """
+    route = request.endpoint
+    strings_per_request.observe(len(strings), route=route)
+    characters_processed.inc(
+        sum(len(s) for s in strings if isinstance(s, str)), route=route
+    )
+
+
+@app.before_request
+def start_timer():
+    g.start_time = time.perf_counter()
+
+
+@app.after_request
+def record_status(response):
+    g.status = response.status_code
+    return response
+
+
+@app.teardown_request
+def record_request(error):
+    # Runs once the response has been sent, so streamed responses are timed until their last chunk.
+    start_time = g.pop("start_time", None)
+    if start_time is None:
+        return
+    route = request.endpoint or "unmatched"
+    request_latency.observe(time.perf_counter() - start_time, route=route)
+    request_count.inc(
+        route=route,
+        method=request.method,
+        status=500 if error is not None else g.pop("status", 500),
+    )
+
+
+@app.route("/metrics")
+def metrics():
+    """
+    Returns the metrics of the app in the Prometheus text exposition format.
+    """
+    output = [metric.render() for metric in registry]
+    # The caches keep their own statistics, which are read when scraped.
+    caches = [("results", results.info()), ("pipelines", get_pipeline.cache_info())]
+    for name, field, metric_type, documentation in (
+        ("pseudol10nutil_cache_hits_total", "hits", "counter", "Cache hits, by cache."),
+        (
+            "pseudol10nutil_cache_misses_total",
+            "misses",
+            "counter",
+            "Cache misses, by cache.",
+        ),
+        (
+            "pseudol10nutil_cache_entries",
+            "currsize",
+            "gauge",
+            "Entries in the cache, by cache.",
+        ),
+    ):
+        output.append("# HELP {} {}\n".format(name, documentation))
+        output.append("# TYPE {} {}\n".format(name, metric_type))
+        for cache, info in caches:
+            output.append(
+                "{}{} {}\n".format(
+                    name, format_labels([("cache", cache)]), getattr(info, field)
+                )
+            )
+    return Response("".join(output), mimetype="text/plain; version=0.0.4")
+
+
+@app.errorhandler(413)
+def handle_413(error):
+    return error_response(
+        413,
+        "Catalog too large, the limit is {} bytes.".format(
+            app.config["MAX_CATALOG_SIZE"]
+        ),
+    )
 
 
 @app.errorhandler(404)
@@ -33,16 +356,154 @@ def handle_404(error):
 
 @app.route(api_base_url + "pseudo", methods=["POST"])
 def do_pseudo():
-    if "strings" in request.get_json():
-        data = request.json["strings"]
-    else:
+    request_data = request.get_json()
+    if not isinstance(request_data, dict):
+        request_data = {}
+    options = parse_options(request_data.get("options"))
+    data = request_data.get("strings")
+    if options is None or not valid_strings(data):
         return make_response(
             jsonify({"error": "400 Error: Could not process request."}), 400
         )
-    for k, v in data.items():
-        data[k] = util.pseudolocalize(v)
-    result = {"strings": data}
-    return jsonify(result)
+    if isinstance(data, dict):
+        strings = {key: pseudolocalize(options, s) for key, s in data.items()}
+        record_strings(list(data.values()))
+    else:
+        strings = [pseudolocalize(options, s) for s in data]
+        record_strings(data)
+    return jsonify({"strings": strings})
+
+
+def read_pieces(stream, max_size):
+    """
+    Reads the request body as it comes in, in pieces of lines of at most chunk_size bytes, raising
+    RequestEntityTooLarge once more than max_size bytes have been read.  A body without newlines is read a chunk at a
+    time, never into memory at once.
+    """
+    size = 0
+    while True:
+        piece = stream.readline(chunk_size)
+        if not piece:
+            return
+        size += len(piece)
+        if size > max_size:
+            raise RequestEntityTooLarge()
+        yield piece
+
+
+def join_lines(pieces, max_line_size):
+    """
+    Joins the pieces of lines read by read_pieces() into lines, raising ValueError on a line longer than max_line_size
+    bytes.
+    """
+    line = []
+    line_size = 0
+    for piece in pieces:
+        line.append(piece)
+        line_size += len(piece)
+        if line_size > max_line_size:
+            raise ValueError("Line longer than {} bytes".format(max_line_size))
+        if piece.endswith(b"\n"):
+            yield b"".join(line)
+            line = []
+            line_size = 0
+    if line:
+        yield b"".join(line)
+
+
+def join_chunks(chunks, size=chunk_size):
+    """
+    Joins small chunks of bytes, e.g. one per catalog entry, into chunks of about size bytes.
+    """
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield b"".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+@app.route(api_base_url + "catalog", methods=["POST"])
+def do_pseudo_catalog():
+    """
+    Pseudo-localizes a PO or MO file sent as the request body, e.g.
+
+        curl --data-binary @messages.po -H "Content-Type: application/octet-stream" \\
+            "http://localhost:8080/pseudol10nutil/api/v1.0/catalog?format=mo&brackets=angle" -o messages.mo
+
+    The query string can set the same options as the pseudo endpoint (pad_length is "true" or "false"), and format
+    picks the output, po (the default) or mo.  A PO file is parsed as it streams in and sent back entry by entry as a
+    chunked response.  An MO file can't be parsed in a single pass, so it is spooled to a temporary file first, and
+    an MO output is sent once the whole catalog has been read, since its entries have to be sorted.  Errors in the
+    input found once the response has started cut the response short.
+    """
+    args = {
+        name: request.args[name]
+        for name in ("substitution", "brackets")
+        if name in request.args
+    }
+    if "pad_length" in request.args:
+        value = request.args["pad_length"]
+        args["pad_length"] = {"true": True, "false": False}.get(value, value)
+    options = parse_options(args)
+    output_format = request.args.get("format", "po")
+    if options is None or output_format not in ("po", "mo"):
+        return error_response(400, "Could not process request.")
+    max_size = app.config["MAX_CATALOG_SIZE"]
+    if request.content_length is not None and request.content_length > max_size:
+        raise RequestEntityTooLarge()
+
+    pofileutil = POFileUtil(get_pipeline(options))
+    mo_builder = mofile.MOBuilder() if output_format == "mo" else None
+    pieces = read_pieces(request.stream, max_size)
+    first_piece = next(pieces, b"")
+    pieces = itertools.chain([first_piece], pieces)
+    spool = None
+    try:
+        if first_piece.startswith(mo_magic_numbers):
+            spool = tempfile.TemporaryFile()
+            spool.writelines(pieces)
+            encoding = mofile.detect_encoding(spool)
+            entries = mofile.iter_entries(spool, encoding)
+            chunks = pofileutil.pseudolocalizeentries(entries, mo_builder=mo_builder)
+        else:
+            lines = join_lines(pieces, app.config["MAX_LINE_SIZE"])
+            encoding, text_lines = postream.decode_lines(lines)
+            chunks = pofileutil.pseudolocalizelines(text_lines, mo_builder=mo_builder)
+        if mo_builder is not None:
+            mo_builder.encoding = encoding
+            collections.deque(chunks, maxlen=0)
+            body = mo_builder.iter_chunks()
+        else:
+            # Parse the start of the catalog before the response starts, so that a file which isn't a catalog at
+            # all gets an error status.
+            body = (
+                chunk.encode(encoding)
+                for chunk in itertools.chain([next(chunks)], chunks)
+            )
+    except (OSError, ValueError):  # Syntax and decoding errors
+        if spool is not None:
+            spool.close()
+        return error_response(400, "Could not read the catalog.")
+
+    filename = "messages." + output_format
+    response = Response(
+        stream_with_context(join_chunks(body)),
+        mimetype=(
+            "application/octet-stream"
+            if mo_builder is not None
+            else "text/x-gettext-translation"
+        ),
+        headers={"Content-Disposition": 'attachment; filename="{}"'.format(filename)},
+    )
+    if spool is not None:
+        response.call_on_close(spool.close)
+    return response
 
 
 @app.route("/")
@@ -54,56 +515,41 @@ def home():
 def do_pseudo_ui():
     if request.method == "POST":
         input_text = request.form.get("pseudolocalize_input")
-        substitute = request.form.get("substitution_type")
-        brackets = request.form.get("add_brackets")
-        pad_length = True if "pad_length" in request.form else False
-
-        transforms = []
-        form_options = {}  # Preserve options on post back
-
-        if substitute == "diacritics":
-            transforms.append(xforms.transliterate_diacritic)
-            form_options["sub_diacritics"] = "checked"
-        elif substitute == "fullwidth":
-            transforms.append(xforms.transliterate_fullwidth)
-            form_options["sub_fullwidth"] = "checked"
-        elif substitute == "circled":
-            transforms.append(xforms.transliterate_circled)
-            form_options["sub_circled"] = "checked"
-        else:
-            form_options["sub_none"] = "checked"
-
-        if pad_length:
-            transforms.append(xforms.pad_length)
-            form_options["do_pad_length"] = "checked"
-
-        if brackets == "square":
-            transforms.append(xforms.square_brackets)
-            form_options["brackets_square"] = "checked"
-        elif brackets == "angle":
-            transforms.append(xforms.angle_brackets)
-            form_options["brackets_angle"] = "checked"
-        elif brackets == "curly":
-            transforms.append(xforms.curly_brackets)
-            form_options["brackets_curly"] = "checked"
-        else:
-            form_options["brackets_none"] = "checked"
+        options = Options(
+            request.form.get("substitution_type"),
+            "pad_length" in request.form,
+            request.form.get("add_brackets"),
+        )
+        if options.substitution not in substitutions:
+            options = options._replace(substitution="none")
+        if options.brackets not in brackets:
+            options = options._replace(brackets="none")
 
-        util.transforms = transforms
-        pseudolocalized_text_output = util.pseudolocalize(input_text)
+        pseudolocalized_text_output = pseudolocalize(options, input_text)
+        record_strings([input_text])
         return render_template(
             "pseudolocalize_template.html",
             pseudolocalized_text_input=input_text,
             pseudolocalized_text_output=pseudolocalized_text_output,
-            **form_options,
+            **form_options(options),
         )
     else:
-        default_options = {
-            "sub_diacritics": "checked",
-            "brackets_square": "checked",
-            "do_pad_length": "checked",
-        }
-        return render_template("pseudolocalize_template.html", **default_options)
+        return render_template(
+            "pseudolocalize_template.html", **form_options(default_options)
+        )
+
+
+def form_options(options):
+    """
+    Returns the template variables checking the form inputs of the options, to preserve them on post back.
+    """
+    checked = {
+        "sub_" + options.substitution: "checked",
+        "brackets_" + options.brackets: "checked",
+    }
+    if options.pad_length:
+        checked["do_pad_length"] = "checked"
+    return checked
 
 
 if __name__ == "__main__":
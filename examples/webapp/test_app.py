@@ -1,8 +1,12 @@
+import concurrent.futures
+import io
 import unittest
 
 import requests
 
-from pseudol10nutil import PseudoL10nUtil
+import pseudol10nutil.transforms as xforms
+from app import app, chunk_size
+from pseudol10nutil import POFileUtil, PseudoL10nUtil, mofile
 
 base_url = "http://localhost:5000/pseudol10nutil/api/v1.0/"
 headers = {"Accept": "application/json", "Content-Type": "application/json"}
@@ -26,5 +30,381 @@ class TestPseudoL10nUtil(unittest.TestCase):
             self.assertEqual(self.util.pseudolocalize(data[k]), v)
 
 
+class TestConcurrentRequests(unittest.TestCase):
+    """
+    Runs requests with different options from many threads at once through the test client, so no server is needed.
+    """
+
+    option_sets = [
+        ({}, PseudoL10nUtil()),
+        (
+            {"substitution": "fullwidth", "pad_length": False, "brackets": "angle"},
+            PseudoL10nUtil([xforms.transliterate_fullwidth, xforms.angle_brackets]),
+        ),
+        (
+            {"substitution": "circled", "brackets": "curly"},
+            PseudoL10nUtil(
+                [
+                    xforms.transliterate_circled,
+                    xforms.pad_length,
+                    xforms.curly_brackets,
+                ]
+            ),
+        ),
+        (
+            {"substitution": "none", "brackets": "none"},
+            PseudoL10nUtil([xforms.pad_length]),
+        ),
+    ]
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def post(self, index):
+        options, util = self.option_sets[index % len(self.option_sets)]
+        strings = {
+            "a": "Request {} uses %s".format(index),
+            "b": "<b>{}</b> of {{count}}".format(index),
+        }
+        resp = self.client.post(
+            "/pseudol10nutil/api/v1.0/pseudo",
+            json={"strings": strings, "options": options},
+        )
+        self.assertEqual(200, resp.status_code)
+        return resp.get_json()["strings"], {
+            k: util.pseudolocalize(v) for k, v in strings.items()
+        }
+
+    def post_form(self, index):
+        substitution, pad_length, brackets = [
+            ("fullwidth", False, "angle"),
+            ("circled", True, "curly"),
+        ][index % 2]
+        text = "Form {}".format(index)
+        form = {
+            "pseudolocalize_input": text,
+            "substitution_type": substitution,
+            "add_brackets": brackets,
+        }
+        if pad_length:
+            form["pad_length"] = "on"
+        resp = self.client.post("/pseudol10nutil/", data=form)
+        self.assertEqual(200, resp.status_code)
+        util = PseudoL10nUtil(
+            [
+                getattr(xforms, "transliterate_" + substitution),
+                *([xforms.pad_length] if pad_length else []),
+                getattr(xforms, brackets + "_brackets"),
+            ]
+        )
+        return resp.get_data(as_text=True), util.pseudolocalize(text)
+
+    def test_api_outputs_not_mixed(self):
+        with concurrent.futures.ThreadPoolExecutor(16) as executor:
+            for actual, expected in executor.map(self.post, range(400)):
+                self.assertEqual(expected, actual)
+
+    def test_ui_outputs_not_mixed(self):
+        with concurrent.futures.ThreadPoolExecutor(16) as executor:
+            for page, expected in executor.map(self.post_form, range(200)):
+                self.assertIn(">{}</textarea>".format(expected), page)
+
+    def test_invalid_options(self):
+        for options in [{"substitution": "bold"}, {"colour": "red"}, "square"]:
+            resp = self.client.post(
+                "/pseudol10nutil/api/v1.0/pseudo",
+                json={"strings": {"a": "b"}, "options": options},
+            )
+            self.assertEqual(400, resp.status_code)
+
+    def test_invalid_strings(self):
+        for strings in [
+            "Hello",
+            42,
+            None,
+            [["Hello"]],
+            ["Hello", 1],
+            {"a": {"b": "c"}},
+        ]:
+            resp = self.client.post(
+                "/pseudol10nutil/api/v1.0/pseudo", json={"strings": strings}
+            )
+            self.assertEqual(400, resp.status_code, strings)
+        resp = self.client.post("/pseudol10nutil/api/v1.0/pseudo", json={})
+        self.assertEqual(400, resp.status_code)
+        resp = self.client.post(
+            "/pseudol10nutil/api/v1.0/pseudo", json={"strings": ["", "Hello"]}
+        )
+        self.assertEqual(
+            ["", PseudoL10nUtil().pseudolocalize("Hello")], resp.get_json()["strings"]
+        )
+
+
+class TestAdversarialStrings(unittest.TestCase):
+    # Pseudo-localizing these strings took minutes when the placeholder regex scanned the rest of the string from each
+    # unclosed placeholder.  benchmarks/run_benchmarks.py times them.
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_unclosed_placeholders(self):
+        strings = {
+            "tags": "<" * 100000,
+            "fields": "{ " * 50000,
+            "mixed": "<{%(\\" * 20000,
+        }
+        resp = self.client.post(
+            "/pseudol10nutil/api/v1.0/pseudo", json={"strings": strings}
+        )
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(
+            PseudoL10nUtil().pseudolocalize_many(strings), resp.get_json()["strings"]
+        )
+
+
+CATALOG = """# Example catalog
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\\n"
+
+#: app.py:1
+msgid "Hello {name}"
+msgstr ""
+
+msgctxt "menu"
+msgid "Open"
+msgstr ""
+
+msgid "One file"
+msgid_plural "%d files"
+msgstr[0] ""
+msgstr[1] ""
+"""
+
+
+class TestCatalogEndpoint(unittest.TestCase):
+    url = "/pseudol10nutil/api/v1.0/catalog"
+
+    def setUp(self):
+        self.client = app.test_client()
+        self.pofileutil = POFileUtil()
+
+    def expected_po(self):
+        return "".join(self.pofileutil.pseudolocalizelines(io.StringIO(CATALOG)))
+
+    def expected_mo(self):
+        builder = mofile.MOBuilder()
+        for _ in self.pofileutil.pseudolocalizelines(
+            io.StringIO(CATALOG), mo_builder=builder
+        ):
+            pass
+        return builder.to_binary()
+
+    def test_po_to_po(self):
+        resp = self.client.post(self.url, data=CATALOG.encode("utf-8"))
+        self.assertEqual(200, resp.status_code)
+        self.assertTrue(resp.is_streamed)
+        self.assertEqual("text/x-gettext-translation", resp.mimetype)
+        self.assertEqual(self.expected_po(), resp.get_data(as_text=True))
+
+    def test_po_to_mo(self):
+        resp = self.client.post(self.url + "?format=mo", data=CATALOG.encode("utf-8"))
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(self.expected_mo(), resp.get_data())
+
+    def test_mo_to_po(self):
+        resp = self.client.post(self.url, data=self.expected_mo())
+        self.assertEqual(200, resp.status_code)
+        output = resp.get_data(as_text=True)
+        for msgid in ("Hello {name}", "Open", "One file", "%d files"):
+            self.assertIn(PseudoL10nUtil().pseudolocalize(msgid), output)
+
+    def test_options(self):
+        resp = self.client.post(
+            self.url + "?substitution=fullwidth&pad_length=false&brackets=none",
+            data=CATALOG.encode("utf-8"),
+        )
+        self.assertIn("Ｏｐｅｎ", resp.get_data(as_text=True))
+        resp = self.client.post(
+            self.url + "?pad_length=yes", data=CATALOG.encode("utf-8")
+        )
+        self.assertEqual(400, resp.status_code)
+
+    def test_size_cap(self):
+        app.config["MAX_CATALOG_SIZE"] = 100
+        try:
+            resp = self.client.post(self.url, data=CATALOG.encode("utf-8"))
+            self.assertEqual(413, resp.status_code)
+            # Without a Content-Length, the body is cut off while it is read.
+            resp = self.client.post(
+                self.url,
+                input_stream=io.BytesIO(CATALOG.encode("utf-8")),
+                environ_overrides={"wsgi.input_terminated": True},
+            )
+            self.assertEqual(413, resp.status_code)
+        finally:
+            app.config["MAX_CATALOG_SIZE"] = 32 * 1024 * 1024
+
+    def test_long_lines(self):
+        class Stream(io.BytesIO):
+            """
+            Request body recording the largest size it is read with.
+            """
+
+            largest_read = 0
+
+            def readline(self, size=-1):
+                self.largest_read = max(self.largest_read, size)
+                return super().readline(size)
+
+        # A line longer than a chunk is joined back together.
+        msgid = "x" * (3 * chunk_size)
+        catalog = CATALOG + 'msgid "{}"\nmsgstr ""\n'.format(msgid)
+        stream = Stream(catalog.encode("utf-8"))
+        resp = self.client.post(
+            self.url,
+            input_stream=stream,
+            environ_overrides={"wsgi.input_terminated": True},
+        )
+        self.assertEqual(200, resp.status_code)
+        self.assertIn(
+            PseudoL10nUtil().pseudolocalize(msgid), resp.get_data(as_text=True)
+        )
+        self.assertEqual(chunk_size, stream.largest_read)
+
+        # A single huge line without a newline is rejected without being read whole.
+        app.config["MAX_LINE_SIZE"] = 2 * chunk_size
+        try:
+            stream = Stream(b"#" * (50 * chunk_size))
+            resp = self.client.post(
+                self.url,
+                input_stream=stream,
+                environ_overrides={"wsgi.input_terminated": True},
+            )
+            self.assertEqual(400, resp.status_code)
+            self.assertEqual(chunk_size, stream.largest_read)
+            self.assertLessEqual(stream.tell(), 3 * chunk_size)
+        finally:
+            app.config["MAX_LINE_SIZE"] = 1024 * 1024
+
+    def test_invalid_catalog(self):
+        resp = self.client.post(self.url, data=b"This is not a catalog")
+        self.assertEqual(400, resp.status_code)
+        resp = self.client.post(self.url, data=b"\xde\x12\x04\x95 truncated")
+        self.assertEqual(400, resp.status_code)
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def scrape(self):
+        resp = self.client.get("/metrics")
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual("text/plain", resp.mimetype)
+        samples = {}
+        for line in resp.get_data(as_text=True).splitlines():
+            if not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_api(self):
+        before = self.scrape()
+        strings = ["Metrics {}".format(i) for i in range(3)]
+        for _ in range(2):
+            resp = self.client.post(
+                "/pseudol10nutil/api/v1.0/pseudo", json={"strings": strings}
+            )
+            self.assertEqual(200, resp.status_code)
+        self.client.post("/pseudol10nutil/api/v1.0/pseudo", json={})
+        after = self.scrape()
+
+        def delta(name):
+            return after.get(name, 0) - before.get(name, 0)
+
+        self.assertEqual(
+            2,
+            delta(
+                'pseudol10nutil_requests_total{route="do_pseudo",method="POST",status="200"}'
+            ),
+        )
+        self.assertEqual(
+            1,
+            delta(
+                'pseudol10nutil_requests_total{route="do_pseudo",method="POST",status="400"}'
+            ),
+        )
+        self.assertEqual(
+            3, delta('pseudol10nutil_request_duration_seconds_count{route="do_pseudo"}')
+        )
+        self.assertEqual(
+            2,
+            delta(
+                'pseudol10nutil_strings_per_request_bucket{route="do_pseudo",le="5.0"}'
+            ),
+        )
+        self.assertEqual(
+            0,
+            delta(
+                'pseudol10nutil_strings_per_request_bucket{route="do_pseudo",le="1.0"}'
+            ),
+        )
+        self.assertEqual(
+            6, delta('pseudol10nutil_strings_per_request_sum{route="do_pseudo"}')
+        )
+        self.assertEqual(
+            2 * sum(map(len, strings)),
+            delta('pseudol10nutil_characters_total{route="do_pseudo"}'),
+        )
+        # The second request is served from the results cache.
+        self.assertEqual(3, delta('pseudol10nutil_cache_hits_total{cache="results"}'))
+        self.assertEqual(3, delta('pseudol10nutil_cache_misses_total{cache="results"}'))
+
+    def test_ui_and_streamed_responses(self):
+        before = self.scrape()
+        self.client.post("/pseudol10nutil/", data={"pseudolocalize_input": "Hello"})
+        resp = self.client.post(
+            "/pseudol10nutil/api/v1.0/catalog", data=CATALOG.encode("utf-8")
+        )
+        resp.get_data()
+        resp.close()
+        after = self.scrape()
+        self.assertEqual(
+            1,
+            after['pseudol10nutil_strings_per_request_count{route="do_pseudo_ui"}']
+            - before.get(
+                'pseudol10nutil_strings_per_request_count{route="do_pseudo_ui"}', 0
+            ),
+        )
+        self.assertEqual(
+            1,
+            after[
+                'pseudol10nutil_request_duration_seconds_count{route="do_pseudo_catalog"}'
+            ]
+            - before.get(
+                'pseudol10nutil_request_duration_seconds_count{route="do_pseudo_catalog"}',
+                0,
+            ),
+        )
+
+    def test_histogram_buckets_cumulative(self):
+        self.client.post("/pseudol10nutil/api/v1.0/pseudo", json={"strings": ["a"]})
+        samples = self.scrape()
+        buckets = [
+            value
+            for name, value in samples.items()
+            if name.startswith(
+                'pseudol10nutil_request_duration_seconds_bucket{route="do_pseudo"'
+            )
+        ]
+        self.assertEqual(sorted(buckets), buckets)
+        self.assertEqual(
+            samples['pseudol10nutil_request_duration_seconds_count{route="do_pseudo"}'],
+            buckets[-1],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
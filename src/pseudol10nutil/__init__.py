@@ -1,6 +1,19 @@
+__version__ = "0.2.0"
+
 try:
-    from pseudol10nutil import POFileUtil, PseudoL10nUtil
+    from pseudol10nutil import CompiledPipeline, POFileUtil, PseudoL10nUtil
 except ImportError:
-    from .pseudol10nutil import POFileUtil, PseudoL10nUtil
+    from .pseudol10nutil import CompiledPipeline, POFileUtil, PseudoL10nUtil
+
+__all__ = ["CompiledPipeline", "POFileUtil", "PseudoL10nUtil", "PseudoTranslations"]
+
 
-__all__ = ["POFileUtil", "PseudoL10nUtil"]
+def __getattr__(name):
+    # PseudoTranslations is imported on first use, since only applications using it need the gettext module.
+    if name == "PseudoTranslations":
+        try:
+            from translations import PseudoTranslations
+        except ImportError:
+            from .translations import PseudoTranslations
+        return PseudoTranslations
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
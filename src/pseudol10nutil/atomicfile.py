@@ -0,0 +1,118 @@
+import hashlib
+import os
+import os.path
+import stat
+
+# Size of the blocks files are read in to be compared.
+_BLOCK_SIZE = 1 << 20
+
+
+def _digest(filename):
+    digest = hashlib.blake2b()
+    with open(filename, "rb") as fileobj:
+        for block in iter(lambda: fileobj.read(_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+class AtomicFile:
+    """
+    Context manager writing a file through a temporary file in the same directory, which replaces the file only if
+    their contents differ.  Outputs that didn't change keep their modification time, so build systems don't rebuild
+    what depends on them, and an output is never left half-written by an error or a crash: it has either its previous
+    content or the new one.
+
+    Usage:
+
+        output = AtomicFile("app.po", "w", encoding="utf-8")
+        with output as fileobj:
+            fileobj.write(text)
+        output.changed  # True if app.po was created or replaced
+    """
+
+    def __init__(self, filename, mode="wb", encoding=None):
+        """
+        Initializer for class.
+
+        :param filename: Filename of the file to write.  Its directory has to exist.
+        :param mode: "wb" to write bytes, or "w" to write text.
+        :param encoding: Encoding of the text in "w" mode.
+        """
+        if mode not in ("w", "wb"):
+            raise ValueError("Invalid mode: {}".format(mode))
+        self.filename = filename
+        self.mode = mode
+        self.encoding = encoding
+        # Boolean indicating if the file was written, set on exit.
+        self.changed = None
+        self._temp_filename = None
+        self._file = None
+
+    def __enter__(self):
+        directory, basename = os.path.split(os.path.abspath(self.filename))
+        # A dot file with a random suffix, so that it's neither picked up as an output nor shared between writers.
+        # Created with mode 0o666 like open() does, so the umask applies to new files.
+        while True:
+            self._temp_filename = os.path.join(
+                directory, ".{}.{}.tmp".format(basename, os.urandom(4).hex())
+            )
+            try:
+                fd = os.open(
+                    self._temp_filename,
+                    os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0),
+                    0o666,
+                )
+                break
+            except FileExistsError:
+                continue
+        self._file = os.fdopen(fd, self.mode, encoding=self.encoding)
+        return self._file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._file.flush()
+                self.changed = not self._same_content()
+                if self.changed:
+                    # Make sure the content is on disk before it's renamed, or a crash could leave an empty file.
+                    os.fsync(self._file.fileno())
+            self._file.close()
+            if self.changed:
+                os.replace(self._temp_filename, self.filename)
+        finally:
+            # Left if the content is the same, or on errors.
+            self._file.close()
+            if os.path.lexists(self._temp_filename):
+                os.remove(self._temp_filename)
+        return False
+
+    def _same_content(self):
+        """
+        Returns True if the file exists with the content of the temporary file.  The sizes are compared first, then the
+        hashes of the contents.  If the file is replaced, its permissions are carried over to the temporary file.
+        """
+        try:
+            existing = os.stat(self.filename)
+        except FileNotFoundError:
+            return False
+        if existing.st_size == os.fstat(self._file.fileno()).st_size and _digest(
+            self.filename
+        ) == _digest(self._temp_filename):
+            return True
+        os.chmod(self._temp_filename, stat.S_IMODE(existing.st_mode))
+        return False
+
+
+def write_file(filename, chunks, encoding=None):
+    """
+    Writes chunks of text or bytes to a file with AtomicFile, only replacing it if their content is different.
+
+    :param filename: Filename of the file to write.
+    :param chunks: Iterable of strings, written with the encoding, or of bytes if encoding is None.
+    :param encoding: Encoding of the text.
+    :returns: Boolean indicating if the file changed.
+    """
+    output = AtomicFile(filename, "wb" if encoding is None else "w", encoding)
+    with output as fileobj:
+        fileobj.writelines(chunks)
+    return output.changed
@@ -0,0 +1,88 @@
+import collections
+import threading
+
+CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"]
+)
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe mapping that evicts the least recently used entry once it is full.  Keeps count of hits,
+    misses and evictions.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        Initializer for class.
+
+        :param maxsize: Maximum number of entries to keep.  Has to be a positive integer.
+        """
+        if maxsize < 1:
+            raise ValueError("Cache size must be positive, got {}.".format(maxsize))
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # Locks can't be pickled, and the entries are not worth sending to another process.
+        return {"maxsize": self.maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(state["maxsize"])
+
+    def get(self, key, default=None):
+        """
+        Looks up a key, marking it as the most recently used entry.
+
+        :param key: Key to look up.
+        :param default: Value to return if the key is not in the cache.
+        :returns: The cached value, or default.
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Adds or replaces an entry, evicting the least recently used entry if the cache is full.
+
+        :param key: Key to store the value under.
+        :param value: Value to store.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all entries.  The hit, miss and eviction counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        """
+        Returns the cache statistics.
+
+        :returns: CacheInfo named tuple with the hits, misses, evictions, maxsize and currsize fields.
+        """
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.evictions, self.maxsize, len(self._entries)
+            )
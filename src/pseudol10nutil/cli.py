@@ -0,0 +1,557 @@
+"""
+Command-line interface of pseudol10nutil.
+
+Usage examples:
+
+    xgettext ... | pseudol10nutil strings > pseudo.txt
+    pseudol10nutil strings --ndjson < strings.ndjson
+    pseudol10nutil files -o build/pseudo -j 4 locales/ "extra/**/*.pot"
+    pseudol10nutil files -o build/pseudo --store ~/.cache/pseudo.db locales/
+    pseudol10nutil compact-store --max-size 500M ~/.cache/pseudo.db
+    pseudol10nutil watch -o build/pseudo locales/
+    pseudol10nutil extract -o build/pseudo/messages.po --add-comments TRANSLATORS: src/
+
+The strings mode pseudo-localizes one string per line of stdin (or one JSON value per line with --ndjson) and writes
+each result to stdout as soon as it is read, so it can sit in a pipeline whatever the size of the input.  The files
+mode pseudo-localizes message catalogs on a pool of worker processes, so a whole tree of catalogs costs a single
+interpreter startup.  With --store, their strings are looked up in (and added to) a persistent store shared across
+runs, which compact-store shrinks.  The watch mode pseudo-localizes a tree of catalogs, then each catalog again as
+soon as it changes.  The extract mode pseudo-localizes the strings of Python sources into a catalog directly, without
+writing a POT file first.
+"""
+
+import argparse
+import functools
+import glob
+import io
+import json
+import os.path
+import sys
+import time
+import types
+
+from . import transforms
+from .pseudol10nutil import POFileUtil, PseudoL10nUtil, _catalog_jobs
+
+CATALOG_PATTERNS = ("*.po", "*.pot")
+
+
+def available_transforms():
+    """
+    Returns the transforms which can be selected on the command line.
+
+    :returns: Dict of the public functions of the transforms module, by name.
+    """
+    # Not inspect.getmembers(), inspect takes longer to import than the rest of the command.
+    return {
+        name: munge
+        for name, munge in sorted(vars(transforms).items())
+        if isinstance(munge, types.FunctionType)
+        and not name.startswith("_")
+        and munge.__module__ == transforms.__name__
+    }
+
+
+_SIZE_SUFFIXES = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def _parse_size(value):
+    """
+    Parses a size in bytes, with an optional K, M or G suffix.
+    """
+    factor = _SIZE_SUFFIXES.get(value[-1:].upper())
+    try:
+        size = int(value[:-1] if factor else value) * (factor or 1)
+    except ValueError:
+        size = 0
+    if size < 1:
+        raise argparse.ArgumentTypeError("invalid size {}".format(value))
+    return size
+
+
+def _parse_jobs(value):
+    """
+    Parses a number of worker processes, which has to be at least 1.
+    """
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        raise argparse.ArgumentTypeError("invalid number of jobs {}".format(value))
+    return jobs
+
+
+def _parse_transforms(value):
+    available = available_transforms()
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            "unknown transform {}, choose from {}".format(
+                ", ".join(unknown), ", ".join(sorted(available))
+            )
+        )
+    return [available[name] for name in names]
+
+
+def pseudolocalize_stream(pipeline, input_file, output_file, ndjson=False):
+    """
+    Pseudo-localizes the lines of a text stream one at a time.  Only one line is held in memory, plus a bounded cache
+    of recent results, since extracted strings repeat a lot.
+
+    :param pipeline: Instance of CompiledPipeline.
+    :param input_file: Text file object to read the strings from, one per line.
+    :param output_file: Text file object to write the pseudo-localized strings to, one per line.
+    :param ndjson: Boolean indicating if each line is a JSON value: a string, or an object whose values are strings
+                   (keys are kept as they are).  Blank lines are copied through.
+    :returns: Tuple of the number of strings and the number of characters pseudo-localized.
+    :raises ValueError: If a line is not valid JSON or not a string or an object, with its line number.
+    """
+    pseudolocalize = functools.lru_cache(maxsize=4096)(pipeline.pseudolocalize)
+    count = 0
+    characters = 0
+    for lineno, line in enumerate(input_file, 1):
+        if line.endswith("\n"):
+            line = line[:-1]
+        if not ndjson:
+            result = pseudolocalize(line)
+            count += 1
+            characters += len(line)
+        elif not line.strip():
+            result = line
+        else:
+            try:
+                value = json.loads(line)
+                if isinstance(value, str):
+                    strings = [value]
+                    result = pseudolocalize(value)
+                elif isinstance(value, dict):
+                    strings = list(value.values())
+                    result = {key: pseudolocalize(s) for key, s in value.items()}
+                else:
+                    raise ValueError("expected a string or an object")
+            except (TypeError, ValueError) as e:
+                raise ValueError("line {}: {}".format(lineno, e))
+            result = json.dumps(result, ensure_ascii=False)
+            count += len(strings)
+            characters += sum(len(s) for s in strings if s)
+        output_file.write(result + "\n")
+    return count, characters
+
+
+def find_catalogs(paths, output_dir):
+    """
+    Lists the message catalogs to pseudo-localize.
+
+    :param paths: Filenames, glob patterns (** matches any number of directories) and directories, which are searched
+                  for .po and .pot files.
+    :param output_dir: Directory to write the pseudo-localized catalogs to.  The catalogs found in a directory keep
+                       their path relative to it, the others are written under their own filename.  .pot files are
+                       written as .po.
+    :returns: List of (input_filename, output_filename) tuples.
+    :raises ValueError: If a path matches nothing, or two different catalogs would be written to the same file.  A
+                     catalog matched by several paths is only listed once.
+    """
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = _catalog_jobs(path, output_dir, CATALOG_PATTERNS)
+        else:
+            filenames = (
+                [path] if glob.escape(path) == path else glob.glob(path, recursive=True)
+            )
+            found = []
+            for filename in sorted(f for f in filenames if os.path.isfile(f)):
+                basename = os.path.basename(filename)
+                if basename.endswith(".pot"):
+                    basename = basename[:-1]
+                found.append((filename, os.path.join(output_dir, basename)))
+        if not found:
+            raise ValueError("no message catalogs found: {}".format(path))
+        jobs += found
+
+    outputs = {}
+    unique_jobs = []
+    for input_filename, output_filename in jobs:
+        key = os.path.abspath(output_filename)
+        if key not in outputs:
+            outputs[key] = input_filename
+            unique_jobs.append((input_filename, output_filename))
+        elif os.path.abspath(outputs[key]) != os.path.abspath(input_filename):
+            raise ValueError(
+                "{} and {} would both be written to {}".format(
+                    outputs[key], input_filename, output_filename
+                )
+            )
+    return unique_jobs
+
+
+def find_sources(paths):
+    """
+    Lists the Python source files to extract strings from.
+
+    :param paths: Filenames, glob patterns (** matches any number of directories) and directories, which are searched
+                  for .py files.
+    :returns: List of filenames, in the order of the paths and sorted within each of them.  A file matched by several
+              paths is only listed once.
+    :raises ValueError: If a path matches nothing.
+    """
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = sorted(
+                glob.glob(os.path.join(glob.escape(path), "**", "*.py"), recursive=True)
+            )
+        elif glob.escape(path) == path:
+            found = [path] if os.path.isfile(path) else []
+        else:
+            found = sorted(
+                f for f in glob.glob(path, recursive=True) if os.path.isfile(f)
+            )
+        if not found:
+            raise ValueError("no Python sources found: {}".format(path))
+        filenames += found
+    return list(dict.fromkeys(filenames))
+
+
+def _run_strings(args, util):
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding=args.encoding)
+    stdout = io.TextIOWrapper(
+        sys.stdout.buffer, encoding=args.encoding, line_buffering=args.line_buffered
+    )
+    start = time.perf_counter()
+    try:
+        count, characters = pseudolocalize_stream(
+            util.compile(), stdin, stdout, args.ndjson
+        )
+    except ValueError as e:
+        print("pseudol10nutil: {}".format(e), file=sys.stderr)
+        return 1
+    finally:
+        # Detach the wrappers, which would otherwise close sys.stdin and sys.stdout when they are garbage collected.
+        stdout.flush()
+        stdout.detach()
+        stdin.detach()
+    if args.stats:
+        elapsed = time.perf_counter() - start
+        print(
+            "{:,} strings, {:,} characters in {:.3f} s ({:,.0f} strings/s)".format(
+                count, characters, elapsed, count / elapsed if elapsed else 0
+            ),
+            file=sys.stderr,
+        )
+    return 0
+
+
+def _run_files(args, util):
+    try:
+        jobs = find_catalogs(args.paths, args.output_dir)
+    except ValueError as e:
+        print("pseudol10nutil: {}".format(e), file=sys.stderr)
+        return 1
+    if args.store:
+        from .store import PersistentStore
+
+        try:
+            util.store = PersistentStore(args.store, args.store_max_size)
+        except OSError as e:
+            print("pseudol10nutil: {}".format(e), file=sys.stderr)
+            return 1
+    start = time.perf_counter()
+    results = POFileUtil(util).pseudolocalize_catalogs(
+        jobs, args.jobs, not args.no_overwrite
+    )
+    elapsed = time.perf_counter() - start
+    if util.store is not None:
+        util.store.close()
+
+    failed = [result for result in results if result.error]
+    changed = [result for result in results if any((result.changed or {}).values())]
+    for result in failed:
+        print(
+            "pseudol10nutil: {}: {}".format(
+                result.input_filename, result.error.strip().splitlines()[-1]
+            ),
+            file=sys.stderr,
+        )
+    if args.stats:
+        size = sum(os.path.getsize(i) for i, _ in jobs)
+        print(
+            "{:,} catalogs ({:,} failed), {:.1f} MB in {:.3f} s ({:.1f} MB/s, {:.1f} catalogs/s), {:,} changed".format(
+                len(results),
+                len(failed),
+                size / 1e6,
+                elapsed,
+                size / 1e6 / elapsed if elapsed else 0,
+                len(results) / elapsed if elapsed else 0,
+                len(changed),
+            ),
+            file=sys.stderr,
+        )
+    return 1 if failed else 0
+
+
+def _run_watch(args, util):
+    from .watch import CatalogWatcher
+
+    def report(results):
+        for result in results:
+            if result.error:
+                message = "failed: {}".format(result.error.strip().splitlines()[-1])
+            elif result.output_filename is None:
+                message = "removed"
+            elif not any(result.changed.values()):
+                message = "unchanged output in {:.3f} s".format(result.seconds)
+            else:
+                message = "updated in {:.3f} s".format(result.seconds)
+            print(
+                "pseudol10nutil: {}: {}".format(result.input_filename, message),
+                file=sys.stderr,
+                flush=True,
+            )
+
+    try:
+        watcher = CatalogWatcher(
+            args.src_root,
+            args.output_dir,
+            POFileUtil(util),
+            CATALOG_PATTERNS,
+            args.debounce,
+            "poll" if args.poll else None,
+        )
+    except OSError as e:
+        print("pseudol10nutil: {}".format(e), file=sys.stderr)
+        return 1
+    with watcher:
+        try:
+            watcher.run(report)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def _run_extract(args, util):
+    from .extract import DEFAULT_KEYWORDS, parse_keyword
+
+    keywords = dict(DEFAULT_KEYWORDS)
+    try:
+        keywords.update(parse_keyword(spec) for spec in args.keywords)
+        filenames = find_sources(args.paths)
+        os.makedirs(os.path.dirname(args.output) or os.curdir, exist_ok=True)
+        start = time.perf_counter()
+        changed = POFileUtil(util).pseudolocalize_sources(
+            filenames,
+            args.output,
+            keywords=keywords,
+            comment_tags=args.add_comments,
+            workers=args.jobs,
+        )
+    except (OSError, ValueError) as e:
+        print("pseudol10nutil: {}".format(e), file=sys.stderr)
+        return 1
+    if args.stats:
+        elapsed = time.perf_counter() - start
+        print(
+            "{:,} files in {:.3f} s, {} of {} outputs changed".format(
+                len(filenames), elapsed, sum(changed.values()), len(changed)
+            ),
+            file=sys.stderr,
+        )
+    return 0
+
+
+def _run_compact_store(args):
+    from .store import PersistentStore
+
+    try:
+        store = PersistentStore(args.store)
+        before, after = store.compact(args.max_size)
+        info = store.info()
+        store.close()
+    except OSError as e:
+        print("pseudol10nutil: {}".format(e), file=sys.stderr)
+        return 1
+    print(
+        "{}: {:,} results, {:.1f} MB -> {:.1f} MB".format(
+            args.store, info.count, before / 1e6, after / 1e6
+        ),
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pseudol10nutil", description="Pseudo-localize strings and catalogs."
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "-t",
+        "--transforms",
+        type=_parse_transforms,
+        help="comma-separated transforms to apply, in order, e.g. transliterate_fullwidth,pad_length,angle_brackets"
+        " (default: transliterate_diacritic,pad_length,square_brackets)",
+    )
+    common.add_argument(
+        "--stats",
+        action="store_true",
+        help="print a summary of the throughput to stderr",
+    )
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    strings_parser = subparsers.add_parser(
+        "strings",
+        parents=[common],
+        help="pseudo-localize strings from stdin to stdout, one per line",
+    )
+    strings_parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="each line is a JSON string, or a JSON object whose values are strings",
+    )
+    strings_parser.add_argument(
+        "--encoding", default="utf-8", help="encoding of stdin and stdout"
+    )
+    strings_parser.add_argument(
+        "--line-buffered",
+        action="store_true",
+        help="flush the output after every line",
+    )
+
+    files_parser = subparsers.add_parser(
+        "files",
+        parents=[common],
+        help="pseudo-localize PO files in parallel",
+    )
+    files_parser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="PATH",
+        help="PO file, glob pattern or directory to search for .po and .pot files",
+    )
+    files_parser.add_argument(
+        "-o",
+        "--output-dir",
+        required=True,
+        help="directory to write the pseudo-localized catalogs (and their MO files) to",
+    )
+    files_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_parse_jobs,
+        default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    files_parser.add_argument(
+        "--no-overwrite",
+        action="store_true",
+        help="fail on catalogs whose output already exists",
+    )
+    files_parser.add_argument(
+        "--store",
+        metavar="FILE",
+        help="persistent store of pseudo-localized strings to reuse and add to, created if needed",
+    )
+    files_parser.add_argument(
+        "--store-max-size",
+        type=_parse_size,
+        metavar="SIZE",
+        help="evict the least recently used strings of the store beyond this size, e.g. 500M (default: unlimited)",
+    )
+
+    watch_parser = subparsers.add_parser(
+        "watch",
+        parents=[common],
+        help="pseudo-localize a tree of PO files, then again whenever they change",
+    )
+    watch_parser.add_argument(
+        "src_root", metavar="DIR", help="directory to search for .po and .pot files"
+    )
+    watch_parser.add_argument(
+        "-o",
+        "--output-dir",
+        required=True,
+        help="directory to write the pseudo-localized catalogs (and their MO files) to",
+    )
+    watch_parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.05,
+        metavar="SECONDS",
+        help="quiet time to wait for after a change before updating (default: 0.05)",
+    )
+    watch_parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="poll for changes instead of using inotify",
+    )
+
+    extract_parser = subparsers.add_parser(
+        "extract",
+        parents=[common],
+        help="pseudo-localize the strings of Python sources into a PO file, without a POT file",
+    )
+    extract_parser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="PATH",
+        help="Python file, glob pattern or directory to search for .py files",
+    )
+    extract_parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help="PO file to write (its MO file is written next to it)",
+    )
+    extract_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_parse_jobs,
+        default=None,
+        help="number of worker processes parsing the sources (default: number of CPUs)",
+    )
+    extract_parser.add_argument(
+        "-k",
+        "--keyword",
+        dest="keywords",
+        action="append",
+        default=[],
+        metavar="SPEC",
+        help="additional function to look for, as with xgettext, e.g. tr, ntr:1,2 or ptr:1c,2",
+    )
+    extract_parser.add_argument(
+        "--add-comments",
+        action="append",
+        default=[],
+        metavar="TAG",
+        help="extract the comments starting with TAG right before the strings, e.g. TRANSLATORS:",
+    )
+
+    compact_parser = subparsers.add_parser(
+        "compact-store",
+        help="evict old strings from a persistent store and reclaim their space",
+    )
+    compact_parser.add_argument("store", metavar="FILE", help="persistent store")
+    compact_parser.add_argument(
+        "--max-size",
+        type=_parse_size,
+        metavar="SIZE",
+        help="evict the least recently used strings beyond this size, e.g. 500M",
+    )
+    args = parser.parse_args(argv)
+
+    if args.mode == "compact-store":
+        return _run_compact_store(args)
+    util = PseudoL10nUtil(args.transforms)
+    if args.mode == "strings":
+        return _run_strings(args, util)
+    if args.mode == "watch":
+        return _run_watch(args, util)
+    if args.mode == "extract":
+        return _run_extract(args, util)
+    return _run_files(args, util)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,668 @@
+"""
+Streaming pseudo-localization of resource files other than gettext catalogs: XLIFF 1.2 and 2.0, Android string
+resources, JSON resource bundles and Java .properties files.
+
+Each format has a class with the same interface as POFileUtil, sharing its PseudoL10nUtil engine.  The files are read
+and written incrementally: XML files are fed to a SAX parser in chunks and written back event by event, JSON files
+are split into tokens as they are read, and .properties files are processed line by line, so only the string being
+pseudo-localized (for XML, the content of one translatable element) is held in memory.  Everything else in the file,
+including comments and formatting, is copied through.
+"""
+
+import abc
+import codecs
+import io
+import json
+import os.path
+import re
+import xml.sax
+import xml.sax.handler
+import xml.sax.saxutils
+
+from .atomicfile import AtomicFile
+from .pseudol10nutil import (
+    DEFAULT_PLACEHOLDER_REGEX,
+    CompiledPipeline,
+    POFileUtil,
+    PseudoL10nUtil,
+    _get_tokenizer,
+)
+from .tokenizer import ANDROID_ESCAPE, DEFAULT_GRAMMARS, XML_MARKUP, Tokenizer
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ResourceFileUtil(abc.ABC):
+    """
+    Abstract base class of the resource file formats.  Subclasses implement pseudolocalizestream().
+    """
+
+    def __init__(self, l10nutil=None):
+        """
+        Initializer for class.
+
+        :param l10nutil: Optional instance of PseudoL10nUtil object.  This can be used to pass in an instance of the
+                         PseudoL10nUtil class with the transforms already configured.  Otherwise, an instance of the
+                         PseudoL10nUtil class will be created with the default transforms.
+        """
+        if not l10nutil:
+            self.l10nutil = PseudoL10nUtil()
+        else:
+            self.l10nutil = l10nutil
+
+    def pseudolocalizefile(
+        self, input_filename, output_filename, overwrite_existing=True
+    ):
+        """
+        Method for pseudo-localizing a resource file.
+
+        :param input_filename: Filename of the source (input) resource file.
+        :param output_filename: Filename of the target (output) resource file.
+        :param overwrite_existing: Boolean indicating if an existing output file should be overwritten.  True by
+                                   default.  If False, an IOError will be raised.
+        :returns: Dict of a boolean indicating if the output file changed, by filename, as with
+                  POFileUtil.pseudolocalizefile().  The output is only replaced if its content differs.
+        """
+        if not os.path.isfile(input_filename):
+            raise OSError(
+                "Input resource file not found: {}".format(
+                    os.path.abspath(input_filename)
+                )
+            )
+        if os.path.isfile(output_filename) and not overwrite_existing:
+            raise OSError(
+                "Error, output resource file already exists: {}".format(
+                    os.path.abspath(output_filename)
+                )
+            )
+        output = AtomicFile(output_filename)
+        with open(input_filename, "rb") as input_file:
+            with output as output_file:
+                self.pseudolocalizestream(input_file, output_file)
+        return {output_filename: output.changed}
+
+    @abc.abstractmethod
+    def pseudolocalizestream(self, input_file, output_file):
+        """
+        Method for pseudo-localizing a resource file incrementally.
+
+        :param input_file: File object opened in binary mode to read the source resource file from.
+        :param output_file: File object opened in binary mode to write the pseudo-localized resource file to.
+        """
+
+    def _pipeline(self, grammars):
+        """
+        Returns a pipeline with the transforms of l10nutil whose placeholders also include the given grammars.  If
+        l10nutil uses a plain placeholder regex, which can't be combined with other grammars, the default grammars are
+        used instead.
+        """
+        regex = self.l10nutil.placeholder_regex or DEFAULT_PLACEHOLDER_REGEX
+        base_grammars = _get_tokenizer(regex).grammars or DEFAULT_GRAMMARS
+        return CompiledPipeline(
+            self.l10nutil.transforms, Tokenizer(tuple(grammars) + base_grammars)
+        )
+
+
+def _escape_text(text):
+    return xml.sax.saxutils.escape(text)
+
+
+def _escape_attribute(value):
+    return xml.sax.saxutils.escape(
+        value, {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+    )
+
+
+def _local_name(name):
+    return name.rpartition(":")[2]
+
+
+class _XMLRewriter(xml.sax.handler.ContentHandler):
+    """
+    SAX handler writing the document back as it is parsed.  The content of an element can be captured instead, both
+    as text and as serialized markup, for subclasses to write a pseudo-localized version of it.
+    """
+
+    def __init__(self, write):
+        super().__init__()
+        self._write = write
+        self._capture = None  # Serialized markup of the content being captured
+        self._capture_text = None  # Text of the content being captured
+        self._capture_has_markup = False
+        self._start_tag_open = False  # The ">" of the last start tag is not written yet
+        self._in_cdata = False
+        self._capture_depth = None  # Number of open elements when the capture started
+        # Nesting depth of an element being dropped from the output
+        self._skip_depth = 0
+        self.path = []  # Names of the open elements
+
+    def _out(self, text):
+        if self._skip_depth:
+            return
+        if self._start_tag_open:
+            self._start_tag_open = False
+            self._out(">")
+        if self._capture is not None:
+            self._capture.append(text)
+        else:
+            self._write(text)
+
+    def start_capture(self):
+        """
+        Starts capturing the content of the element which was just started.
+        """
+        self._out("")  # Close the start tag in the output
+        self._capture_depth = len(self.path)
+        self._capture = []
+        self._capture_text = []
+        self._capture_has_markup = False
+
+    def end_capture(self):
+        """
+        Stops capturing content.
+
+        :returns: Tuple of the text, the serialized markup and a boolean indicating if there was any markup.
+        """
+        if self._start_tag_open:
+            self._out("")
+        markup = "".join(self._capture)
+        text = "".join(self._capture_text)
+        has_markup = self._capture_has_markup
+        self._capture = self._capture_text = self._capture_depth = None
+        return text, markup, has_markup
+
+    def is_capture_end(self):
+        """
+        Checks if the element being ended is the one whose content is captured.
+        """
+        return self._capture is not None and len(self.path) == self._capture_depth
+
+    def skip_element(self):
+        """
+        Drops the element being started, with all of its content, from the output.  Called instead of
+        startElement().
+        """
+        self._skip_depth = 1
+
+    def write_raw(self, text):
+        self._out(text)
+
+    def _markup(self, text):
+        if self._capture is not None:
+            self._capture_has_markup = True
+        self._out(text)
+
+    # ContentHandler
+
+    def startDocument(self):
+        self._write('<?xml version="1.0" encoding="utf-8"?>\n')
+
+    def endDocument(self):
+        self._write("\n")
+
+    def startElement(self, name, attrs):
+        if self._skip_depth:
+            self._skip_depth += 1
+            return
+        self._markup(
+            "<"
+            + name
+            + "".join(
+                ' {}="{}"'.format(key, _escape_attribute(value))
+                for key, value in attrs.items()
+            )
+        )
+        self._start_tag_open = True
+        self.path.append(name)
+
+    def endElement(self, name):
+        if self._skip_depth:
+            self._skip_depth -= 1
+            return
+        if self._start_tag_open:
+            self._start_tag_open = False
+            self._markup("/>")
+        else:
+            self._markup("</{}>".format(name))
+        self.path.pop()
+
+    def characters(self, content):
+        if self._capture_text is not None and not self._skip_depth:
+            self._capture_text.append(content)
+        self._out(content if self._in_cdata else _escape_text(content))
+
+    ignorableWhitespace = characters
+
+    def processingInstruction(self, target, data):
+        self._markup(
+            "<?{} {}?>".format(target, data) if data else "<?{}?>".format(target)
+        )
+        if not self.path:
+            self._out("\n")
+
+    # LexicalHandler
+
+    def comment(self, content):
+        self._markup("<!--{}-->".format(content))
+        if not self.path:
+            self._out("\n")
+
+    def startCDATA(self):
+        self._markup("<![CDATA[")
+        self._in_cdata = True
+
+    def endCDATA(self):
+        self._in_cdata = False
+        self._markup("]]>")
+
+    def startDTD(self, name, public_id, system_id):
+        if public_id:
+            doctype = '<!DOCTYPE {} PUBLIC "{}" "{}">'.format(
+                name, public_id, system_id
+            )
+        elif system_id:
+            doctype = '<!DOCTYPE {} SYSTEM "{}">'.format(name, system_id)
+        else:
+            doctype = "<!DOCTYPE {}>".format(name)
+        self._out(doctype + "\n")
+
+    def endDTD(self):
+        pass
+
+    def startEntity(self, name):
+        pass
+
+    def endEntity(self, name):
+        pass
+
+
+class _XMLFileUtil(ResourceFileUtil):
+    """
+    Abstract base class of the XML formats.  Subclasses implement _handler().
+    """
+
+    chunk_size = CHUNK_SIZE
+
+    def pseudolocalizestream(self, input_file, output_file):
+        writer = codecs.getwriter("utf-8")(output_file)
+        handler = self._handler(writer.write)
+        parser = xml.sax.make_parser()
+        parser.setFeature(xml.sax.handler.feature_external_ges, False)
+        parser.setContentHandler(handler)
+        parser.setProperty(xml.sax.handler.property_lexical_handler, handler)
+        try:
+            while True:
+                chunk = input_file.read(self.chunk_size)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+            parser.close()
+        except xml.sax.SAXParseException as e:
+            raise OSError(
+                "Syntax error in xml file (line {}): {}".format(
+                    e.getLineNumber(), e.getMessage()
+                )
+            )
+
+    @abc.abstractmethod
+    def _handler(self, write):
+        """
+        Returns the _XMLRewriter of the format, writing the pseudo-localized file with write.
+        """
+
+
+class _XLIFFRewriter(_XMLRewriter):
+    """
+    Writes a pseudo-localized <target> after each <source> of the translation units, replacing any existing target.
+    """
+
+    def __init__(self, write, pseudolocalize_text, pseudolocalize_markup):
+        super().__init__(write)
+        self._pseudolocalize_text = pseudolocalize_text
+        self._pseudolocalize_markup = pseudolocalize_markup
+        self._translate = [
+            True
+        ]  # Inherited value of the translate attribute of each open element
+        self._target = (
+            None  # Target to write after the source just read, as (name, content)
+        )
+        self._whitespace = []  # Whitespace read since the source
+
+    def _is_unit_child(self, name):
+        return (
+            len(self.path) > 0
+            and _local_name(self.path[-1]) in ("trans-unit", "segment")
+            and _local_name(name) in ("source", "target")
+        )
+
+    def _write_target(self, attributes=""):
+        whitespace = "".join(self._whitespace)
+        name, content = self._target
+        self._target = None
+        self._whitespace = []
+        self.write_raw(
+            whitespace + "<{}{}>{}</{}>".format(name, attributes, content, name)
+        )
+        return whitespace
+
+    def _flush_target(self):
+        if self._target is not None:
+            self.write_raw(self._write_target())
+
+    def startElement(self, name, attrs):
+        if self._target is not None and self._is_unit_child(name):
+            if _local_name(name) == "target":
+                self._write_target(
+                    "".join(
+                        ' {}="{}"'.format(key, _escape_attribute(value))
+                        for key, value in attrs.items()
+                    )
+                )
+                self.skip_element()
+                self._translate.append(self._translate[-1])
+                return
+        self._flush_target()
+        is_source = (
+            self._is_unit_child(name)
+            and _local_name(name) == "source"
+            and self._translate[-1]
+        )
+        translate = attrs.get("translate")
+        self._translate.append(
+            self._translate[-1] if translate is None else translate != "no"
+        )
+        super().startElement(name, attrs)
+        if is_source:
+            self.start_capture()
+
+    def endElement(self, name):
+        self._flush_target()
+        self._translate.pop()
+        if self.is_capture_end():
+            text, markup, has_markup = self.end_capture()
+            if has_markup:
+                content = self._pseudolocalize_markup(markup)
+            else:
+                content = _escape_text(self._pseudolocalize_text(text))
+            self.write_raw(markup)
+            super().endElement(name)
+            self._target = (name[: -len("source")] + "target", content)
+            return
+        super().endElement(name)
+
+    def characters(self, content):
+        if self._target is not None and not content.strip():
+            self._whitespace.append(content)
+            return
+        self._flush_target()
+        super().characters(content)
+
+    def processingInstruction(self, target, data):
+        self._flush_target()
+        super().processingInstruction(target, data)
+
+    def comment(self, content):
+        self._flush_target()
+        super().comment(content)
+
+    def startCDATA(self):
+        self._flush_target()
+        super().startCDATA()
+
+
+class XLIFFFileUtil(_XMLFileUtil):
+    """
+    Class for performing pseudo-localization on XLIFF 1.2 and 2.0 files.  The <source> of each translation unit
+    (<trans-unit> in XLIFF 1.2, <segment> in XLIFF 2.0) is pseudo-localized into its <target>, which is added or
+    replaced.  Units marked with translate="no" are left as they are.  Inline elements (<g>, <x/>, <ph>, <pc>...) are
+    kept and only the text around them is transliterated.
+    """
+
+    def _handler(self, write):
+        return _XLIFFRewriter(
+            write,
+            self.l10nutil.pseudolocalize,
+            self._pipeline([XML_MARKUP]).pseudolocalize,
+        )
+
+
+class _AndroidRewriter(_XMLRewriter):
+    """
+    Replaces the text of each <string>, and of each <item> of a <string-array> or <plurals>, with its
+    pseudo-localized version.
+    """
+
+    def __init__(self, write, pseudolocalize_text, pseudolocalize_markup):
+        super().__init__(write)
+        self._pseudolocalize_text = pseudolocalize_text
+        self._pseudolocalize_markup = pseudolocalize_markup
+        self._translatable = [True]
+
+    def startElement(self, name, attrs):
+        translatable = self._translatable[-1] and attrs.get("translatable") != "false"
+        self._translatable.append(translatable)
+        parent = self.path[-1] if self.path else None
+        is_string = translatable and (
+            (name == "string" and parent == "resources")
+            or (name == "item" and parent in ("string-array", "plurals"))
+        )
+        super().startElement(name, attrs)
+        if is_string and self._capture is None:
+            self.start_capture()
+
+    def endElement(self, name):
+        self._translatable.pop()
+        if self.is_capture_end():
+            text, markup, has_markup = self.end_capture()
+            if has_markup:
+                markup = self._pseudolocalize_markup(markup)
+            elif not text.strip().startswith(("@", "?")):  # Not a resource reference
+                markup = _escape_text(self._pseudolocalize_text(text))
+            self.write_raw(markup)
+        super().endElement(name)
+
+
+class AndroidFileUtil(_XMLFileUtil):
+    """
+    Class for performing pseudo-localization on Android string resources (res/values/strings.xml).  Strings marked
+    with translatable="false" and references to other resources (@string/name) are left as they are.  Backslash
+    escapes (\\n, \\') and inline markup (<b>, <xliff:g>) are kept as placeholders.
+    """
+
+    def _handler(self, write):
+        return _AndroidRewriter(
+            write,
+            self._pipeline([ANDROID_ESCAPE]).pseudolocalize,
+            self._pipeline([XML_MARKUP, ANDROID_ESCAPE]).pseudolocalize,
+        )
+
+
+_JSON_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]:,]|\s+|[^\s{}\[\]:,"]+')
+
+
+class JSONFileUtil(ResourceFileUtil):
+    """
+    Class for performing pseudo-localization on JSON resource bundles.  Every string value, at any depth, is
+    pseudo-localized; keys, numbers and the formatting of the file are kept.
+    """
+
+    chunk_size = CHUNK_SIZE
+
+    def pseudolocalizestream(self, input_file, output_file):
+        reader = codecs.getreader("utf-8-sig")(input_file)
+        writer = codecs.getwriter("utf-8")(output_file)
+        pseudolocalize = self.l10nutil.pseudolocalize
+        stack = []  # Open containers, "{" or "["
+        expect_key = False
+        offset = 0  # Offset of the start of buffer in the file, for error messages
+        buffer = ""
+        while True:
+            chunk = reader.read(self.chunk_size)
+            buffer += chunk
+            position = 0
+            output = []
+            while position < len(buffer):
+                match = _JSON_TOKEN.match(buffer, position)
+                if match is None or (match.end() == len(buffer) and chunk):
+                    if match is None and not chunk:
+                        raise _json_error(offset + position)
+                    break  # The token may continue in the next chunk
+                token = match.group()
+                first = token[0]
+                if first == '"':
+                    if not (expect_key and stack[-1] == "{"):
+                        try:
+                            value = json.loads(token)
+                        except ValueError:
+                            raise _json_error(offset + position)
+                        token = json.dumps(pseudolocalize(value), ensure_ascii=False)
+                elif first in "{[":
+                    stack.append(first)
+                    expect_key = first == "{"
+                elif first in "}]":
+                    if not stack or stack.pop() != "{["["}]".index(first)]:
+                        raise _json_error(offset + position)
+                    expect_key = False
+                elif first == ",":
+                    expect_key = bool(stack) and stack[-1] == "{"
+                elif first == ":":
+                    expect_key = False
+                output.append(token)
+                position = match.end()
+            writer.write("".join(output))
+            offset += position
+            buffer = buffer[position:]
+            if not chunk:
+                break
+        if stack:
+            raise _json_error(offset)
+
+
+def _json_error(offset):
+    return OSError("Syntax error in json file (offset {})".format(offset))
+
+
+_PROPERTIES_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "f": "\f"}
+_PROPERTIES_UNESCAPE = re.compile(r"\\(u[0-9a-fA-F]{4}|.)", re.DOTALL)
+_PROPERTIES_ESCAPE = re.compile(r"[\\\t\n\r\f]|^ ")
+# Key, separator and value of a logical line.  The key ends at the first unescaped "=", ":" or whitespace.
+_PROPERTIES_LINE = re.compile(r"(\s*(?:[^\\=:\s]|\\.)*)(\s*[=:]?\s*)(.*)", re.DOTALL)
+
+
+def _properties_unescape(match):
+    escape = match.group(1)
+    if escape[0] == "u":
+        return chr(int(escape[1:], 16))
+    return _PROPERTIES_ESCAPES.get(escape, escape)
+
+
+def _properties_escape(match):
+    char = match.group()
+    if char in ("\t", "\n", "\r", "\f"):
+        return "\\" + "tnrf"["\t\n\r\f".index(char)]
+    return "\\" + char
+
+
+def _properties_error_handler(error):
+    """
+    Codec error handler writing the characters the encoding can't represent as \\uXXXX escapes (UTF-16 code units).
+    """
+    text = error.object[error.start : error.end].encode("utf-16-be", "surrogatepass")
+    escapes = "".join(
+        "\\u{:04x}".format(int.from_bytes(text[i : i + 2], "big"))
+        for i in range(0, len(text), 2)
+    )
+    return escapes, error.end
+
+
+codecs.register_error("pseudol10nutil.properties", _properties_error_handler)
+
+
+class PropertiesFileUtil(ResourceFileUtil):
+    """
+    Class for performing pseudo-localization on Java .properties files.  Comments, keys and separators are kept;
+    values continued over several lines are written back on a single line.
+    """
+
+    def __init__(self, l10nutil=None, encoding="iso-8859-1"):
+        """
+        Initializer for class.
+
+        :param l10nutil: Optional instance of PseudoL10nUtil object.  See ResourceFileUtil.
+        :param encoding: Encoding of the files.  Characters the encoding can't represent are written as \\uXXXX
+                         escapes.  Defaults to ISO-8859-1, the encoding of java.util.Properties.load(), so the
+                         pseudo-localized characters are all escaped; use UTF-8 for resource bundles read by Java 9
+                         and later.
+        """
+        super().__init__(l10nutil)
+        self.encoding = encoding
+
+    def pseudolocalizestream(self, input_file, output_file):
+        reader = io.TextIOWrapper(input_file, encoding=self.encoding, newline="")
+        writer = codecs.getwriter(self.encoding)(
+            output_file, "pseudol10nutil.properties"
+        )
+        try:
+            logical_line = None  # Lines of a value continued over several lines
+            for line in reader:
+                if logical_line is None:
+                    stripped = line.lstrip()
+                    if not stripped or stripped[0] in "#!":
+                        writer.write(line)
+                        continue
+                    logical_line = []
+                else:
+                    line = line.lstrip(" \t\f")
+                content = line.rstrip("\r\n")
+                backslashes = len(content) - len(content.rstrip("\\"))
+                if backslashes % 2:
+                    logical_line.append(content[:-1])
+                    continue
+                logical_line.append(content)
+                writer.write(self._format_property("".join(logical_line)))
+                writer.write(line[len(content) :])
+                logical_line = None
+            if logical_line is not None:  # The last line ends with a backslash
+                writer.write(self._format_property("".join(logical_line)))
+        finally:
+            reader.detach()
+
+    def _format_property(self, logical_line):
+        """
+        Pseudo-localizes the value of a logical line.
+        """
+        key, separator, value = _PROPERTIES_LINE.match(logical_line).groups()
+        value = _PROPERTIES_UNESCAPE.sub(_properties_unescape, value)
+        # The \\u escapes of a surrogate pair make up a single character.
+        value = value.encode("utf-16-le", "surrogatepass").decode(
+            "utf-16-le", "replace"
+        )
+        value = self.l10nutil.pseudolocalize(value)
+        return key + separator + _PROPERTIES_ESCAPE.sub(_properties_escape, value)
+
+
+FILE_UTILS = {
+    ".po": POFileUtil,
+    ".pot": POFileUtil,
+    ".xlf": XLIFFFileUtil,
+    ".xliff": XLIFFFileUtil,
+    ".xml": AndroidFileUtil,
+    ".json": JSONFileUtil,
+    ".properties": PropertiesFileUtil,
+}
+
+
+def get_file_util(filename, l10nutil=None):
+    """
+    Returns the class for pseudo-localizing a file, according to its extension.
+
+    :param filename: Filename of the resource file.
+    :param l10nutil: Optional instance of PseudoL10nUtil object, passed to the class.
+    :returns: Instance of POFileUtil, XLIFFFileUtil, AndroidFileUtil, JSONFileUtil or PropertiesFileUtil.
+    :raises ValueError: If the extension is not one of FILE_UTILS.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    try:
+        return FILE_UTILS[extension](l10nutil)
+    except KeyError:
+        raise ValueError("Unsupported resource file format: {}".format(filename))
@@ -0,0 +1,229 @@
+"""
+Builder for gettext MO (Machine Object) message catalogs.
+
+The builder is fed the entries of a catalog one at a time, typically while the PO file is being written, so the
+catalog is only walked once.  Each translated entry is encoded as soon as it is added; only the sort by msgid and the
+layout of the string table are left for the end.  The output is the same as polib's MOFile.to_binary().
+
+iter_entries() reads an existing MO file back one entry at a time, so that only its index tables are held in memory.
+"""
+
+import array
+import codecs
+import re
+import struct
+import sys
+
+import polib
+
+from .atomicfile import write_file
+
+_CHARSET = re.compile(rb"Content-Type:.+? charset=([\w_\-:\.]+)")
+
+
+class MOBuilder:
+    """
+    Class for building an MO file from entries added one at a time.
+    """
+
+    def __init__(self, encoding="utf-8"):
+        """
+        Initializer for class.
+
+        :param encoding: Encoding of the strings in the MO file, normally the charset of the PO file.
+        """
+        self.encoding = encoding
+        self.metadata_entry = polib.POEntry(msgid="")
+        self._entries = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _encode(self, entry):
+        msgid = entry.msgctxt + "\x04" if entry.msgctxt else ""
+        if entry.msgid_plural:
+            msgid += entry.msgid + "\x00" + entry.msgid_plural
+            msgstr = "\x00".join(
+                entry.msgstr_plural[index] for index in sorted(entry.msgstr_plural)
+            )
+        else:
+            msgid += entry.msgid
+            msgstr = entry.msgstr
+        return msgid.encode(self.encoding), msgstr.encode(self.encoding)
+
+    def add(self, entry):
+        """
+        Adds an entry to the MO file.  Entries which are not translated (including fuzzy and obsolete entries) are
+        skipped, as msgfmt does.
+
+        :param entry: Instance of polib.POEntry.
+        :returns: True if the entry was added.
+        """
+        if not entry.translated():
+            return False
+        sort_key = entry.msgid_with_context.encode("utf-8")
+        self._entries.append((sort_key, self._encode(entry)))
+        return True
+
+    def merge(self, other):
+        """
+        Adds the entries of another builder after the entries added so far, e.g. the entries of a part of the catalog
+        added in another process.  The metadata entry of the other builder is ignored.
+
+        :param other: Instance of MOBuilder with the same encoding.
+        """
+        self._entries += other._entries
+
+    def to_binary(self):
+        """
+        Builds the MO file.
+
+        :returns: Contents of the MO file as bytes.
+        """
+        return b"".join(self.iter_chunks())
+
+    def iter_chunks(self):
+        """
+        Builds the MO file in chunks, e.g. to send it over the network without holding two copies of it in memory.
+
+        :returns: Generator of chunks of bytes which, concatenated, make up the MO file.
+        """
+        # sorted() is stable, so entries with the same msgid stay in the order they were added, as in polib.
+        pairs = [self._encode(self.metadata_entry)]
+        pairs += [pair for _, pair in sorted(self._entries, key=lambda e: e[0])]
+        count = len(pairs)
+        keystart = 7 * 4 + 16 * count
+        valuestart = keystart + sum(len(msgid) + 1 for msgid, _ in pairs)
+        koffsets = []
+        voffsets = []
+        id_offset = 0
+        str_offset = 0
+        for msgid, msgstr in pairs:
+            koffsets += [len(msgid), keystart + id_offset]
+            voffsets += [len(msgstr), valuestart + str_offset]
+            id_offset += len(msgid) + 1
+            str_offset += len(msgstr) + 1
+        # Magic number, version, number of entries, start of the key and value indexes, and the size and offset of
+        # the hash table, which is not used.
+        yield struct.pack(
+            "Iiiiiii",
+            polib.MOFile.MAGIC,
+            0,
+            count,
+            7 * 4,
+            7 * 4 + count * 8,
+            0,
+            keystart,
+        )
+        yield array.array("i", koffsets + voffsets).tobytes()
+        for msgid, _ in pairs:
+            yield msgid + b"\x00"
+        for _, msgstr in pairs:
+            yield msgstr + b"\x00"
+
+    def save(self, filename):
+        """
+        Writes the MO file, atomically and only if its content changed (see atomicfile.AtomicFile).
+
+        :param filename: Filename of the MO file.
+        :returns: Boolean indicating if the file changed.
+        """
+        return write_file(filename, self.iter_chunks())
+
+
+def _read(fileobj, size):
+    data = fileobj.read(size)
+    if len(data) != size:
+        raise OSError("Invalid mo file, unexpected end of file")
+    return data
+
+
+def _read_index(fileobj):
+    """
+    Reads the header and the index tables of an MO file.
+
+    :returns: Tuple of two arrays with the length and the offset of each msgid, and of each msgstr, one after the
+              other.
+    """
+    fileobj.seek(0)
+    magic = _read(fileobj, 4)
+    if magic == struct.pack("<I", polib.MOFile.MAGIC):
+        byte_order = "<"
+    elif magic == struct.pack(">I", polib.MOFile.MAGIC):
+        byte_order = ">"
+    else:
+        raise OSError("Invalid mo file, magic number is incorrect")
+    version, count, keys_offset, values_offset = struct.unpack(
+        byte_order + "4I", _read(fileobj, 16)
+    )
+    if version >> 16 not in (0, 1):
+        raise OSError("Invalid mo file, unexpected major revision number")
+    tables = []
+    for offset in (keys_offset, values_offset):
+        fileobj.seek(offset)
+        table = array.array("I", _read(fileobj, 8 * count))
+        if byte_order != ("<" if sys.byteorder == "little" else ">"):
+            table.byteswap()
+        tables.append(table)
+    return tables
+
+
+def _read_string(fileobj, table, index):
+    fileobj.seek(table[2 * index + 1])
+    return _read(fileobj, table[2 * index])
+
+
+def detect_encoding(fileobj):
+    """
+    Detects the encoding of an MO file from the charset in its metadata.
+
+    :param fileobj: MO file opened in binary mode.
+    :returns: Name of the encoding, or polib.default_encoding if it can't be detected.
+    :raises OSError: If the file is not a valid MO file.
+    """
+    keys, values = _read_index(fileobj)
+    if keys and keys[0] == 0:  # The metadata entry, msgid "", always comes first
+        match = _CHARSET.search(_read_string(fileobj, values, 0))
+        if match:
+            try:
+                return codecs.lookup(match.group(1).decode("ascii")).name
+            except (LookupError, UnicodeDecodeError):
+                pass
+    return polib.default_encoding
+
+
+def iter_entries(fileobj, encoding=None):
+    """
+    Reads the entries of an MO file one at a time.  The strings are read from the file as the entries are yielded,
+    so the file has to stay open until the generator is exhausted.
+
+    :param fileobj: MO file opened in binary mode.  Has to be seekable.
+    :param encoding: Encoding of the strings.  Defaults to the charset in the metadata of the file.
+    :returns: Generator of polib.POEntry objects in file order, starting with the metadata entry (msgid "") if any.
+    :raises OSError: If the file is not a valid MO file.
+    """
+    if encoding is None:
+        encoding = detect_encoding(fileobj)
+    keys, values = _read_index(fileobj)
+    for index in range(len(keys) // 2):
+        msgid = _read_string(fileobj, keys, index)
+        msgstr = _read_string(fileobj, values, index)
+        if index == 0 and not msgid:
+            yield polib.POEntry(msgid="", msgstr=msgstr.decode(encoding))
+            continue
+        entry = polib.POEntry()
+        context, separator, rest = msgid.partition(b"\x04")
+        if separator:
+            entry.msgctxt = context.decode(encoding)
+            msgid = rest
+        msgid, _, msgid_plural = msgid.partition(b"\x00")
+        entry.msgid = msgid.decode(encoding)
+        if msgid_plural:
+            entry.msgid_plural = msgid_plural.decode(encoding)
+            entry.msgstr_plural = {
+                plural_index: value.decode(encoding)
+                for plural_index, value in enumerate(msgstr.split(b"\x00"))
+            }
+        else:
+            entry.msgstr = msgstr.decode(encoding)
+        yield entry
@@ -0,0 +1,323 @@
+"""
+Incremental reader and writer for gettext PO (Portable Object) message catalogs.
+
+Unlike polib.pofile(), which builds the whole catalog in memory before it can be processed, the functions in this
+module read and write one entry at a time, so catalogs of any size can be processed in constant memory.  Entries are
+read into polib.POEntry objects and written with polib's formatting, so the output is the same as polib's except that
+obsolete entries are kept where they are instead of being moved to the end of the catalog.
+"""
+
+import codecs
+import itertools
+import re
+
+import polib
+
+_KEYWORDS = {
+    "msgctxt": "ct",
+    "msgid": "mi",
+    "msgstr": "ms",
+    "msgid_plural": "mp",
+}
+
+_PREVIOUS_KEYWORDS = {
+    "msgctxt": "previous_msgctxt",
+    "msgid": "previous_msgid",
+    "msgid_plural": "previous_msgid_plural",
+}
+
+# Symbols that start a new entry once the msgstr of the current entry has been read.
+_ENTRY_START = {"tc", "gc", "oc", "fl", "pc", "ct", "mi"}
+
+
+_CHARSET = re.compile(rb'"?Content-Type:.+? charset=([\w_\-:\.]+)')
+
+
+def _find_charset(lines):
+    """
+    Looks for the charset in the metadata of a PO file read in binary mode, stopping at the end of the metadata entry.
+
+    :returns: Name of the encoding, or None if there is no valid charset.
+    """
+    in_msgstr = False
+    for line in lines:
+        match = _CHARSET.search(line)
+        if match:
+            encoding = match.group(1).strip().decode("utf-8")
+            try:
+                codecs.lookup(encoding)
+            except LookupError:
+                continue
+            return encoding
+        if line.startswith(b"msgstr"):
+            in_msgstr = True
+        elif in_msgstr and not line.strip():
+            break  # End of the metadata entry
+    return None
+
+
+def detect_encoding(filename):
+    """
+    Detects the encoding of a PO file from the charset in its metadata, like polib.detect_encoding() but without
+    reading more of the file than the metadata entry.
+
+    :param filename: Filename of the PO file.
+    :returns: Name of the encoding, or polib.default_encoding if it can't be detected.
+    """
+    with open(filename, "rb") as fileobj:
+        return _find_charset(fileobj) or polib.default_encoding
+
+
+def decode_lines(lines):
+    """
+    Decodes the lines of a PO file read in binary mode, e.g. from a network stream, with the encoding of the charset
+    in its metadata.  Only the lines up to the charset (or the end of the metadata entry) are read ahead.
+
+    :param lines: Iterable of lines of bytes.
+    :returns: Tuple of the name of the encoding (polib.default_encoding if it can't be detected) and an iterator of
+              the decoded lines.
+    """
+    lines = iter(lines)
+    pending = []
+
+    def read_ahead():
+        for line in lines:
+            pending.append(line)
+            yield line
+
+    encoding = _find_charset(read_ahead()) or polib.default_encoding
+    decoded = (line.decode(encoding) for line in itertools.chain(pending, lines))
+    return encoding, decoded
+
+
+def _syntax_error(lineno):
+    return OSError("Syntax error in po file (line {})".format(lineno))
+
+
+def iter_entries(lines, header=None, lineno=0):
+    """
+    Parses the lines of a PO file incrementally, yielding each entry as soon as it is complete.
+
+    :param lines: Iterable of lines of text, e.g. a file object opened in text mode.
+    :param header: Optional list.  If specified, the lines of the translator comment at the top of the file (the file
+                   header, which polib keeps apart from the entries) are appended to it, without the leading "# ".
+    :param lineno: Number of lines of the file before the first of lines, when parsing a part of a file, so that
+                   syntax errors report the line number in the whole file.
+    :returns: Generator of polib.POEntry objects, in file order, including the metadata entry (msgid "") if any.
+    """
+    if header is None:
+        header = []
+    entry = polib.POEntry()
+    state = "st"
+    field = None  # Name of the field continuation lines are appended to
+    plural_index = None
+    has_tokens = False
+    for line in lines:
+        lineno += 1
+        if lineno == 1 and line.startswith(codecs.BOM_UTF8.decode("utf-8")):
+            line = line[1:]
+        line = line.strip()
+        if not line:
+            continue
+        has_tokens = True
+        tokens = line.split(None, 2)
+        if tokens[0] == "#~|":
+            continue
+        obsolete = tokens[0] == "#~" and len(tokens) > 1
+        if obsolete:
+            line = line[3:].strip()
+            tokens = line.split(None, 2)
+        keyword = tokens[0]
+
+        if keyword in _KEYWORDS and len(tokens) > 1:
+            symbol = _KEYWORDS[keyword]
+            value = polib.unescape(line[len(keyword) :].lstrip()[1:-1])
+        elif keyword == "#:":
+            if len(tokens) <= 1:
+                continue
+            symbol = "oc"
+        elif line[:1] == '"':
+            symbol = "mc"
+        elif line[:7] == "msgstr[":
+            symbol = "mx"
+        elif keyword == "#,":
+            if len(tokens) <= 1:
+                continue
+            symbol = "fl"
+        elif keyword == "#" or keyword.startswith("##"):
+            symbol = "he" if state in ("st", "he") else "tc"
+        elif keyword == "#.":
+            if len(tokens) <= 1:
+                continue
+            symbol = "gc"
+        elif keyword == "#|":
+            if len(tokens) <= 1:
+                raise _syntax_error(lineno)
+            line = line[2:].lstrip()
+            if tokens[1].startswith('"'):
+                symbol = "mc"
+            elif len(tokens) == 2 or tokens[1] not in _PREVIOUS_KEYWORDS:
+                raise _syntax_error(lineno)
+            else:
+                symbol = "pc"
+                previous_field = _PREVIOUS_KEYWORDS[tokens[1]]
+                value = polib.unescape(line[len(tokens[1]) :].lstrip()[1:-1])
+        else:
+            raise _syntax_error(lineno)
+
+        if symbol in _ENTRY_START and state in ("ms", "mx"):
+            yield entry
+            entry = polib.POEntry()
+
+        if symbol == "he":
+            header.append((line + " " if line == "#" else line)[2:])
+        elif symbol == "tc":
+            tcomment = line.lstrip("#")
+            if tcomment.startswith(" "):
+                tcomment = tcomment[1:]
+            entry.tcomment = (
+                entry.tcomment + "\n" + tcomment if entry.tcomment else tcomment
+            )
+        elif symbol == "gc":
+            comment = line[3:]
+            entry.comment = entry.comment + "\n" + comment if entry.comment else comment
+        elif symbol == "oc":
+            for occurrence in line[3:].split():
+                filename, _, linenum = occurrence.rpartition(":")
+                if filename and linenum.isdigit():
+                    entry.occurrences.append((filename, linenum))
+                else:
+                    entry.occurrences.append((occurrence, ""))
+        elif symbol == "fl":
+            entry.flags += [flag.strip() for flag in line[3:].split(",")]
+        elif symbol == "pc":
+            field = previous_field
+            setattr(entry, field, value)
+        elif symbol == "ct":
+            field = "msgctxt"
+            entry.msgctxt = value
+        elif symbol == "mi":
+            field = "msgid"
+            entry.obsolete = obsolete
+            entry.msgid = value
+        elif symbol == "mp":
+            field = "msgid_plural"
+            entry.msgid_plural = value
+        elif symbol == "ms":
+            field = "msgstr"
+            entry.msgstr = value
+        elif symbol == "mx":
+            field = None
+            try:
+                plural_index = int(line[7 : line.index("]")])
+            except ValueError:
+                raise _syntax_error(lineno)
+            entry.msgstr_plural[plural_index] = polib.unescape(
+                line[line.index('"') + 1 : -1]
+            )
+        else:  # Continuation line
+            value = polib.unescape(line[1:-1])
+            if field is not None:
+                setattr(entry, field, getattr(entry, field) + value)
+            elif state == "mx":
+                entry.msgstr_plural[plural_index] += value
+            else:
+                raise _syntax_error(lineno)
+            continue
+
+        state = symbol
+    # As in polib, trailing comments without a msgid are dropped.
+    if has_tokens and state not in ("st", "he", "tc", "gc", "oc", "fl"):
+        yield entry
+
+
+def is_metadata_entry(entry):
+    """
+    Checks if the first entry of a PO file is the metadata entry, which polib keeps apart from the other entries.
+
+    :param entry: The first polib.POEntry read by iter_entries().
+    :returns: True if entry is the metadata entry.
+    """
+    return entry.msgid == "" and entry.msgctxt is None and not entry.obsolete
+
+
+def _header_file(header, metadata_entry, wrapwidth):
+    po_file = polib.POFile(wrapwidth=wrapwidth)
+    po_file.header = "\n".join(header)
+    if metadata_entry is not None:
+        po_file.metadata_is_fuzzy = metadata_entry.flags
+        key = None
+        for msg in metadata_entry.msgstr.splitlines():
+            try:
+                key, val = msg.split(":", 1)
+                po_file.metadata[key] = val.strip()
+            except ValueError:
+                if key is not None:
+                    po_file.metadata[key] += "\n" + msg.strip()
+    return po_file
+
+
+def format_header(header, metadata_entry=None, wrapwidth=78):
+    """
+    Formats the file header and the metadata entry of a PO file the same way polib does.
+
+    :param header: List of the lines of the file header, as collected by iter_entries().
+    :param metadata_entry: Optional metadata entry (msgid "") of the file.
+    :param wrapwidth: Width at which lines should be wrapped.
+    :returns: Text of the start of the PO file, up to and including the metadata entry.
+    """
+    return str(_header_file(header, metadata_entry, wrapwidth))
+
+
+def iter_format(entries, header, wrapwidth=78, mo_builder=None):
+    """
+    Formats entries read by iter_entries() back into PO file text, one entry at a time.
+
+    :param entries: Iterable of polib.POEntry objects, typically the (modified) output of iter_entries().
+    :param header: The list passed to iter_entries(), which is complete by the time the first entry is read.
+    :param wrapwidth: Width at which lines should be wrapped.
+    :param mo_builder: Optional instance of mofile.MOBuilder.  If specified, the metadata and each entry are also
+                       added to it as they are formatted.
+    :returns: Generator of chunks of text which, concatenated, make up the PO file.
+    """
+    entries = iter(entries)
+    first = next(entries, None)
+    if first is not None and is_metadata_entry(first):
+        header_file = _header_file(header, first, wrapwidth)
+        first = None
+    else:
+        header_file = _header_file(header, None, wrapwidth)
+    if mo_builder is not None:
+        mo_builder.metadata_entry = header_file.metadata_as_entry()
+    yield str(header_file)
+    if first is not None:
+        entries = itertools.chain([first], entries)
+    for entry in entries:
+        if mo_builder is not None:
+            mo_builder.add(entry)
+        yield "\n" + entry.__unicode__(wrapwidth)
+
+
+def iter_format_pofile(po_file, mo_builder=None):
+    """
+    Formats a polib.POFile one entry at a time.  Concatenated, the chunks are the same as str(po_file), including
+    obsolete entries being moved to the end of the file.
+
+    :param po_file: Instance of polib.POFile.
+    :param mo_builder: Optional instance of mofile.MOBuilder.  If specified, the metadata and each entry are also
+                       added to it as they are formatted.
+    :returns: Generator of chunks of text which, concatenated, make up the PO file.
+    """
+    header_file = polib.POFile(wrapwidth=po_file.wrapwidth)
+    header_file.header = po_file.header
+    header_file.metadata = po_file.metadata
+    header_file.metadata_is_fuzzy = po_file.metadata_is_fuzzy
+    if mo_builder is not None:
+        mo_builder.metadata_entry = header_file.metadata_as_entry()
+    yield str(header_file)
+    for obsolete in (False, True):
+        for entry in po_file:
+            if entry.obsolete == obsolete:
+                if mo_builder is not None:
+                    mo_builder.add(entry)
+                yield "\n" + entry.__unicode__(po_file.wrapwidth)
@@ -1,9 +1,391 @@
+import collections
+import concurrent.futures
+import fnmatch
+import functools
+import hashlib
+import io
+import itertools
+import json
+import os
 import os.path
 import re
+import time
+import traceback
+import types
 
-import polib
-
+# polib and the modules built on it (mofile, postream, extract) are imported where they are used, so that importing
+# the package for the string transforms stays cheap.
 from . import transforms
+from .atomicfile import write_file
+from .cache import LRUCache
+from .stats import _PathStep, _PhaseTimer, _StreamTimer, _TimedStep
+from .tokenizer import DEFAULT_TOKENIZER, Tokenizer
+
+DEFAULT_PLACEHOLDER_REGEX = re.compile(
+    r"""(
+    \\n$
+    |
+    <[^>]*>
+    |
+    {.*?}  # https://docs.python.org/3/library/string.html#formatstrings
+    |
+    %(?:\(\w+?\))?.*?[acdeEfFgGiorsuxX%]  # https://docs.python.org/3/library/stdtypes.html#printf-style-string-formatting
+    )""",
+    re.VERBOSE,
+)
+
+
+def _pseudolocalize_many(pseudolocalize, strings, lazy):
+    """
+    Shared implementation of the pseudolocalize_many() methods.
+
+    :param pseudolocalize: Function pseudo-localizing a single string.
+    :param strings: Iterable of strings, or a dict whose values are strings.
+    :param lazy: Boolean indicating if the results should be returned as a generator instead of a list.
+    :returns: See CompiledPipeline.pseudolocalize_many().
+    """
+    if isinstance(strings, dict):
+        return dict(zip(strings, _iter_many(pseudolocalize, strings.values())))
+    if lazy:
+        return _iter_many(pseudolocalize, strings)
+    return list(_iter_many(pseudolocalize, strings))
+
+
+def _iter_many(pseudolocalize, strings):
+    """
+    Generator pseudo-localizing each distinct string once.
+    """
+    results = {}
+    for s in strings:
+        try:
+            result = results[s]
+        except KeyError:
+            result = results[s] = pseudolocalize(s)
+        except TypeError:  # Unhashable, so definitely not a string.
+            result = pseudolocalize(s)
+        yield result
+
+
+class _TranslateStep:
+    """
+    Transform applying a (possibly merged) translation table.  A class rather than a closure so that compiled
+    pipelines can be pickled.
+    """
+
+    def __init__(self, table, names=()):
+        self.table = table
+        # Names of the merged transliterations, for statistics.
+        self.names = tuple(names)
+
+    def __call__(self, s, fmt_spec):
+        return s.translate(self.table)
+
+
+def _merge_steps(munges):
+    """
+    Merges runs of consecutive transliterations into a single str.translate() call.  Transforms without a known
+    translation table are kept as-is.
+
+    :param munges: Sequence of transforms.
+    :returns: Tuple of transforms that produce the same result as applying munges in order.
+    """
+    steps = []
+    merged = None
+    names = []
+    for munge in munges:
+        table = transforms.translation_tables.get(munge)
+        if table is None:
+            if merged is not None:
+                steps.append(_TranslateStep(merged, names))
+                merged = None
+            steps.append(munge)
+        elif merged is None:
+            merged = dict(table)
+            names = [munge.__name__]
+        else:
+            names.append(munge.__name__)
+            # Apply the new table to the output of the tables merged so far, then add the characters that only the
+            # new table maps.
+            for key, value in merged.items():
+                if value in table:
+                    merged[key] = table[value]
+            for key, value in table.items():
+                merged.setdefault(key, value)
+    if merged is not None:
+        steps.append(_TranslateStep(merged, names))
+    return tuple(steps)
+
+
+def _step_name(munge):
+    """
+    Returns the name of a pipeline step in statistics.
+    """
+    if isinstance(munge, _TranslateStep):
+        return "+".join(munge.names)
+    return getattr(munge, "__name__", repr(munge))
+
+
+def _get_tokenizer(placeholder_regex):
+    """
+    Returns the tokenizer for a placeholder regex, which may already be a Tokenizer.
+    """
+    if isinstance(placeholder_regex, Tokenizer):
+        return placeholder_regex
+    if placeholder_regex is DEFAULT_PLACEHOLDER_REGEX:
+        return DEFAULT_TOKENIZER
+    return Tokenizer.from_regex(placeholder_regex)
+
+
+def _code_key(code):
+    """
+    Returns a string identifying the bytecode and the constants of a code object, including those of the functions
+    and comprehensions nested in it.  Sets are sorted, since their order depends on string hash randomization.
+    """
+    consts = []
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            consts.append(_code_key(const))
+        elif isinstance(const, frozenset):
+            consts.append(sorted(map(repr, const)))
+        else:
+            consts.append(repr(const))
+    return "{}:{}".format(code.co_code.hex(), consts)
+
+
+def _code_names(code):
+    """
+    Returns the set of global and attribute names used by a code object and the functions and comprehensions nested in
+    it.
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            names |= _code_names(const)
+    return names
+
+
+def _value_key(value):
+    """
+    Returns a string identifying a value read by a transform: the repr of strings, numbers and containers of them, the
+    pattern of regexes, the module and qualified name of functions and classes, and only the type of other objects,
+    whose repr usually holds their address.  Sets are sorted, like in _code_key().
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return "{}({})".format(type(value).__name__, ",".join(map(_value_key, value)))
+    if isinstance(value, (set, frozenset)):
+        return "set({})".format(",".join(sorted(map(_value_key, value))))
+    if isinstance(value, dict):
+        return "dict({})".format(
+            ",".join(
+                "{}:{}".format(_value_key(key), _value_key(item))
+                for key, item in value.items()
+            )
+        )
+    if isinstance(value, re.Pattern):
+        return "re({!r},{})".format(value.pattern, value.flags)
+    if not hasattr(value, "__qualname__"):
+        value = type(value)
+    return "{}.{}".format(getattr(value, "__module__", ""), value.__qualname__)
+
+
+def _function_key(function, seen):
+    """
+    Returns a string identifying the code of a function and the module globals it reads, either by name or as
+    attributes of a module it imported: the key of the functions, recursively, and the value of the others (see
+    _value_key()).
+
+    :param function: Function to identify.
+    :param seen: Set of the code objects already identified, which are then only named, so that recursive functions
+                 end.
+    :returns: Key of the function.
+    """
+    code = function.__code__
+    seen.add(code)
+    names = sorted(_code_names(code))
+    parts = [_code_key(code)]
+    for name in names:
+        if name not in function.__globals__:
+            continue
+        value = function.__globals__[name]
+        if isinstance(value, types.ModuleType):
+            # Attributes read from the module, e.g. transforms.diacritic_table.  Other names, such as those of
+            # methods, may match too: that only makes the key change more often.
+            reads = [
+                ("{}.{}".format(name, attr), getattr(value, attr))
+                for attr in names
+                if not isinstance(
+                    getattr(value, attr, None), (types.ModuleType, type(None))
+                )
+            ]
+        else:
+            reads = [(name, value)]
+        for read, value in reads:
+            # Functions decorated with functools.lru_cache() or functools.wraps() are keyed by the function they wrap.
+            value = getattr(value, "__wrapped__", value)
+            if hasattr(value, "__globals__") and value.__code__ not in seen:
+                parts.append("{}={}".format(read, _function_key(value, seen)))
+            else:
+                parts.append("{}={}".format(read, _value_key(value)))
+    return ";".join(parts)
+
+
+def _transform_key(munge):
+    """
+    Returns a string identifying a transform across processes and runs: its module and qualified name, and for
+    functions their code and the module globals they read (see _function_key()), so that editing a transform, the
+    functions it calls or the tables it reads changes the key.  Objects other than functions, strings, numbers,
+    containers and regexes are only identified by type, and module globals are only followed by name or as attributes
+    of a module, so state reached in other ways isn't covered.  None for transforms without a stable name, whose
+    behaviour can depend on state the key can't capture, e.g. the variables of a closure or a bound object.
+    """
+    qualname = getattr(munge, "__qualname__", None)
+    if (
+        qualname is None
+        or "<lambda>" in qualname
+        or "<locals>" in qualname
+        or hasattr(munge, "__func__")  # Bound method
+    ):
+        return None
+    key = "{}.{}".format(getattr(munge, "__module__", ""), qualname)
+    if hasattr(munge, "__globals__"):
+        key += ":" + _function_key(munge, set())
+    return key
+
+
+class CompiledPipeline:
+    """
+    Class for performing pseudo-localization on strings with a frozen list of transforms.
+
+    All of the per-call setup work of PseudoL10nUtil (resolving the placeholder regex, sorting out which transforms
+    are transliterations and building translation tables) is done once in the initializer, so that the same pipeline
+    can be applied to a large number of strings cheaply.
+    """
+
+    def __init__(self, init_transforms, placeholder_regex=None, stats=None):
+        """
+        Initializer for class.
+
+        :param init_transforms: List of transforms to apply, in order.
+        :param placeholder_regex: Overwrite what is considered a placeholder and skips transliteration.  Either a
+                                  compiled regex, which has to be a single group, or a tokenizer.Tokenizer combining
+                                  placeholder grammars.  Defaults to DEFAULT_PLACEHOLDER_REGEX.
+        :param stats: Optional instance of stats.Stats to record the transform calls and the strings in.  The pipeline
+                      is only instrumented if specified.
+        """
+        self.transforms = tuple(init_transforms or ())
+        self.placeholder_regex = placeholder_regex or DEFAULT_PLACEHOLDER_REGEX
+        self.tokenizer = _get_tokenizer(self.placeholder_regex)
+        # Steps applied to strings without any placeholders.
+        self._steps = _merge_steps(self.transforms)
+        # Steps applied to the non-placeholder substrings and then to the whole string, for strings with placeholders.
+        self._text_steps = _merge_steps(
+            [m for m in self.transforms if m in transforms.transliterations]
+        )
+        self._tail_steps = tuple(
+            m for m in self.transforms if m not in transforms.transliterations
+        )
+        # Computed on first use, empty if the pipeline has none.
+        self._fingerprint = None
+        self.stats = stats
+        if stats is not None:
+            self._instrument(stats)
+
+    def _instrument(self, stats):
+        """
+        Wraps the steps of the pipeline to record their calls in stats.  The first step of the fast path and of the
+        placeholder path counts the strings taking it; the length of the string is the same at that point, since the
+        text steps are all transliterations.
+        """
+
+        def timed(steps):
+            return tuple(_TimedStep(m, _step_name(m), stats) for m in steps)
+
+        self._steps = (_PathStep(stats, False),) + timed(self._steps)
+        self._text_steps = timed(self._text_steps)
+        self._tail_steps = (_PathStep(stats, True),) + timed(self._tail_steps)
+
+    @property
+    def fingerprint(self):
+        """
+        Hex digest identifying the version of the package, the transforms (by module, qualified name, code and the
+        module globals they read, see _transform_key()) and the placeholder regex of the pipeline.  Stable across processes, so it can be stored to detect if a different
+        pipeline produced a result.  None if a transform has no stable name (a lambda, a nested function, a bound
+        method or a callable object such as a functools.partial), since what it does can't be identified: results of
+        such pipelines are neither stored nor reused.
+        """
+        if self._fingerprint is None:
+            # Looked up on the package, which imports this module before it is fully initialized.
+            from . import __version__
+
+            digest = hashlib.sha256(__version__.encode("utf-8") + b"\0")
+            for munge in self.transforms:
+                key = _transform_key(munge)
+                if key is None:
+                    self._fingerprint = ""
+                    return None
+                digest.update(key.encode("utf-8") + b"\0")
+            digest.update(
+                "{}\0{}".format(
+                    self.placeholder_regex.pattern, self.placeholder_regex.flags
+                ).encode("utf-8")
+            )
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint or None
+
+    def pseudolocalize(self, s):
+        """
+        Performs pseudo-localization on a string.  The result is identical to PseudoL10nUtil.pseudolocalize() with the
+        same transforms and placeholder regex.
+
+        :param s: String to pseudo-localize.
+        :returns: Copy of the string s with the transforms applied.  If the input
+                  string is an empty string or None, an empty string is returned.
+        """
+        if not s:  # If the string is empty or None
+            return ""
+        if not isinstance(s, str):
+            raise TypeError(
+                "String to pseudo-localize must be of type '{}'.".format(str.__name__)
+            )
+        # If no transforms are defined, return the string as-is.
+        if not self.transforms:
+            return s
+        # The tokenizer is passed to the transforms as the placeholder regex, so that they can reuse its spans.
+        fmt_spec = self.tokenizer
+        spans = fmt_spec.tokenize(s)
+        # If we don't find any format specifiers in the input string, just munge the entire string at once.
+        if len(spans) == 1:
+            result = s
+            for munge in self._steps:
+                result = munge(result, fmt_spec)
+            return result
+        # If there are format specifiers, we do transliterations on the sections of the string that are not format
+        # specifiers (the even spans), then do any other munging (padding the length, adding brackets) on the entire
+        # string.
+        for idx in range(0, len(spans), 2) if self._text_steps else ():
+            substring = spans[idx]
+            for munge in self._text_steps:
+                substring = munge(substring, fmt_spec)
+            spans[idx] = substring
+        result = "".join(spans)
+        for munge in self._tail_steps:
+            result = munge(result, fmt_spec)
+        return result
+
+    def pseudolocalize_many(self, strings, lazy=False):
+        """
+        Performs pseudo-localization on a batch of strings.  Identical strings in the batch are only pseudo-localized
+        once.
+
+        :param strings: Iterable of strings (e.g. a list or a generator), or a dict whose values are strings.
+        :param lazy: Boolean indicating if the results should be returned as a generator instead of a list.  False by
+                     default.  Ignored if strings is a dict.
+        :returns: The pseudo-localized strings in input order, as a list (or a generator if lazy is True).  If strings
+                  is a dict, a new dict with the same keys and the pseudo-localized values is returned instead.
+        """
+        return _pseudolocalize_many(self.pseudolocalize, strings, lazy)
 
 
 class PseudoL10nUtil:
@@ -11,7 +393,14 @@ class PseudoL10nUtil:
     Class for performing pseudo-localization on strings.
     """
 
-    def __init__(self, init_transforms=None, placeholder_regex=None):
+    def __init__(
+        self,
+        init_transforms=None,
+        placeholder_regex=None,
+        cache_size=None,
+        stats=None,
+        store=None,
+    ):
         """
         Initializer for class.
 
@@ -21,8 +410,25 @@ class PseudoL10nUtil:
                                 square_brackets.
         :param placeholder_regex: Overwrite what PseudoL10nUtil considers a
                                   placeholder and skips transliteration.
-                                  Has to be a single group!
+                                  Has to be a single group!  Can also be a
+                                  tokenizer.Tokenizer.
+        :param cache_size: Optional maximum number of results to memoize.  If
+                           specified, the results of pseudolocalize() are kept
+                           in a least recently used cache which is cleared
+                           whenever transforms or placeholder_regex are
+                           reassigned.  Disabled by default.
+        :param stats: Optional instance of stats.Stats to record the transform calls, the strings pseudo-localized
+                      and, when used by POFileUtil, the phases of pseudolocalizefile() in.  Disabled by default, in
+                      which case nothing is measured.  Results served from the cache are not recorded.
+        :param store: Optional instance of store.PersistentStore to look results up in before pseudo-localizing
+                      strings, after the result cache, and to add new results to.  Results are stored under the
+                      fingerprint of the pipeline, so the store can be shared by different transforms, processes and
+                      runs.  Disabled by default.  Results served from the store are not recorded in stats either.
+                      Ignored for transforms without a stable name, e.g. lambdas, see CompiledPipeline.fingerprint.
         """
+        self.stats = stats
+        self.store = store
+        self._cache = LRUCache(cache_size) if cache_size else None
         if init_transforms is not None:
             self.transforms = init_transforms
         else:
@@ -32,6 +438,59 @@ class PseudoL10nUtil:
                 transforms.square_brackets,
             ]
         self.placeholder_regex = placeholder_regex
+        self._pipeline = None
+        self._pipeline_key = None
+
+    @property
+    def transforms(self):
+        """
+        List of transforms to apply to the string, in order.
+        """
+        return self._transforms
+
+    @transforms.setter
+    def transforms(self, value):
+        self._transforms = value
+        self.cache_clear()
+
+    @property
+    def placeholder_regex(self):
+        """
+        Regex for placeholders, or None to use DEFAULT_PLACEHOLDER_REGEX.
+        """
+        return self._placeholder_regex
+
+    @placeholder_regex.setter
+    def placeholder_regex(self, value):
+        self._placeholder_regex = value
+        self.cache_clear()
+
+    def cache_info(self):
+        """
+        Returns the statistics of the result cache.
+
+        :returns: CacheInfo named tuple with the hits, misses, evictions, maxsize and currsize fields, or None if the
+                  cache is disabled.
+        """
+        if self._cache is None:
+            return None
+        return self._cache.info()
+
+    def cache_clear(self):
+        """
+        Removes all memoized results from the result cache.
+        """
+        if self._cache is not None:
+            self._cache.clear()
+
+    def compile(self):
+        """
+        Freezes the current transforms and placeholder regex into a CompiledPipeline.  Later changes to the transforms
+        field do not affect the returned pipeline.
+
+        :returns: Instance of CompiledPipeline.
+        """
+        return CompiledPipeline(self.transforms, self.placeholder_regex, self.stats)
 
     def pseudolocalize(self, s):
         """
@@ -42,50 +501,281 @@ class PseudoL10nUtil:
         :returns: Copy of the string s with the transforms applied.  If the input
                   string is an empty string or None, an empty string is returned.
         """
-        if not s:  # If the string is empty or None
-            return ""
-        if not isinstance(s, str):
-            raise TypeError(
-                "String to pseudo-localize must be of type '{}'.".format(str.__name__)
+        pipeline = self._get_pipeline()
+        if (
+            (self._cache is None and self.store is None)
+            or not s
+            or not isinstance(s, str)
+        ):
+            return pipeline.pseudolocalize(s)
+        if self._cache is not None:
+            # The pipeline key acts as a fingerprint of the transforms, in case the list was modified in place.
+            key = (self._pipeline_key, s)
+            result = self._cache.get(key)
+            if result is not None:
+                return result
+        fingerprint = None if self.store is None else pipeline.fingerprint
+        if fingerprint is None:
+            result = pipeline.pseudolocalize(s)
+        else:
+            result = self.store.get(fingerprint, s)
+            if result is None:
+                result = pipeline.pseudolocalize(s)
+                self.store.put(fingerprint, s, result)
+        if self._cache is not None:
+            self._cache.put(key, result)
+        return result
+
+    def pseudolocalize_many(self, strings, lazy=False):
+        """
+        Performs pseudo-localization on a batch of strings with the transforms defined in the transforms field of the
+        object.  Identical strings in the batch are only pseudo-localized once.
+
+        :param strings: Iterable of strings (e.g. a list or a generator), or a dict whose values are strings.
+        :param lazy: Boolean indicating if the results should be returned as a generator instead of a list.  False by
+                     default.  Ignored if strings is a dict.
+        :returns: The pseudo-localized strings in input order, as a list (or a generator if lazy is True).  If strings
+                  is a dict, a new dict with the same keys and the pseudo-localized values is returned instead.
+        """
+        pipeline = self._get_pipeline()
+        if self.store is not None and not lazy and pipeline.fingerprint is not None:
+            return self._pseudolocalize_many_stored(strings)
+        if self._cache is None and (self.store is None or pipeline.fingerprint is None):
+            return pipeline.pseudolocalize_many(strings, lazy)
+        return _pseudolocalize_many(self.pseudolocalize, strings, lazy)
+
+    def _pseudolocalize_many_stored(self, strings):
+        """
+        Implementation of pseudolocalize_many() with a store, looking up the whole batch in one go, then storing the
+        results of the strings that weren't found.
+        """
+        if isinstance(strings, dict):
+            return dict(
+                zip(strings, self._pseudolocalize_many_stored(strings.values()))
             )
-        # If no transforms are defined, return the string as-is.
-        if not self.transforms:
-            return s
-        fmt_spec = self.placeholder_regex or re.compile(
-            r"""(
-            \\n$
-            |
-            <[^>]*>
-            |
-            {.*?}  # https://docs.python.org/3/library/string.html#formatstrings
-            |
-            %(?:\(\w+?\))?.*?[acdeEfFgGiorsuxX%]  # https://docs.python.org/3/library/stdtypes.html#printf-style-string-formatting
-            )""",
-            re.VERBOSE,
+        strings = list(strings)
+        pipeline = self._get_pipeline()
+        fingerprint = pipeline.fingerprint
+        distinct = {s for s in strings if s and isinstance(s, str)}
+        results = self.store.get_many(fingerprint, distinct)
+        missing = [s for s in distinct if s not in results]
+        if missing:
+            new_results = pipeline.pseudolocalize_many(missing)
+            self.store.put_many(fingerprint, zip(missing, new_results))
+            results.update(zip(missing, new_results))
+        return [
+            results[s] if s in results else pipeline.pseudolocalize(s) for s in strings
+        ]
+
+    @property
+    def fingerprint(self):
+        """
+        Hex digest identifying the current transforms and placeholder regex.  See CompiledPipeline.fingerprint.
+        """
+        return self._get_pipeline().fingerprint
+
+    def _get_pipeline(self):
+        """
+        Returns the pipeline compiled on a previous call, unless the transforms or the placeholder regex have changed
+        since, in which case a new pipeline is compiled.
+        """
+        key = (tuple(self.transforms or ()), self.placeholder_regex)
+        if (
+            self._pipeline is None
+            or self._pipeline_key != key
+            or self._pipeline.stats is not self.stats
+        ):
+            self._pipeline = self.compile()
+            self._pipeline_key = key
+        return self._pipeline
+
+
+CatalogResult = collections.namedtuple(
+    "CatalogResult",
+    ["input_filename", "output_filename", "seconds", "error", "changed"],
+    defaults=(None,),
+)
+
+
+def _pseudolocalize_catalog(
+    pofileutil, input_filename, output_filename, overwrite_existing, **kwargs
+):
+    """
+    Pseudo-localizes a single message catalog for POFileUtil.pseudolocalize_catalogs().  Runs in a worker process, so any
+    error is reported in the result rather than raised.
+
+    :param kwargs: Other arguments of POFileUtil.pseudolocalizefile().
+    :returns: Instance of CatalogResult.
+    """
+    start = time.perf_counter()
+    error = changed = None
+    try:
+        os.makedirs(os.path.dirname(output_filename) or ".", exist_ok=True)
+        changed = pofileutil.pseudolocalizefile(
+            input_filename, output_filename, overwrite_existing, **kwargs
         )
-        # If we don't find any format specifiers in the input string, just munge the entire string at once.
-        if not fmt_spec.search(s):
-            result = s
-            for munge in self.transforms:
-                result = munge(result, fmt_spec)
-        # If there are format specifiers, we do transliterations on the sections of the string that are not format
-        # specifiers, then do any other munging (padding the length, adding brackets) on the entire string.
+    except Exception:
+        error = traceback.format_exc()
+    return CatalogResult(
+        input_filename, output_filename, time.perf_counter() - start, error, changed
+    )
+
+
+# Dummy metadata entry put in front of every shard but the first, so that comments at the start of the shard are
+# parsed as the translator comments of its first entry rather than as the file header.
+_SHARD_PREFIX = ('msgid ""\n', 'msgstr ""\n')
+
+
+def _ends_entry(lines, index):
+    """
+    Checks if the last entry before a line is complete, i.e. the last keyword before it is a msgstr, so that the
+    entries after it can be parsed on their own.
+    """
+    while index > 0:
+        index -= 1
+        line = lines[index].strip()
+        if line.startswith("#~"):
+            line = line[2:].lstrip()
+        if line and not line.startswith('"'):
+            return line.startswith("msgstr")
+    return False
+
+
+def _find_shards(lines, shard_size):
+    """
+    Splits the lines of a PO file into shards of about shard_size lines for POFileUtil.pseudolocalizefile(), cutting
+    only at blank lines between two entries.
+
+    :returns: List of the indexes of the first line of each shard, starting with 0.
+    """
+    starts = [0]
+    index = shard_size
+    while index < len(lines):
+        if lines[index - 1].strip() or not lines[index].strip():
+            index += 1
+        elif lines[index].lstrip().startswith(
+            ("#", "msgctxt", "msgid")
+        ) and _ends_entry(lines, index):
+            starts.append(index)
+            index += shard_size
         else:
-            substrings = fmt_spec.split(s)
-            for munge in self.transforms:
-                if munge in transforms.transliterations:
-                    for idx in range(len(substrings)):
-                        if not fmt_spec.match(substrings[idx]):
-                            substrings[idx] = munge(substrings[idx], fmt_spec)
-                    else:
-                        continue
-                else:
-                    continue
-            result = "".join(substrings)
-            for munge in self.transforms:
-                if munge not in transforms.transliterations:
-                    result = munge(result, fmt_spec)
-        return result
+            index += 1
+    return starts
+
+
+def _pseudolocalize_shard(pofileutil, text, lineno, encoding, build_mo):
+    """
+    Pseudo-localizes a shard of a message catalog for POFileUtil.pseudolocalizefile().  Runs in a worker process, so
+    the shard is parsed and formatted there too, which takes longer than pseudo-localizing it.
+
+    :param text: Text of the shard.
+    :param lineno: Number of lines of the file before the shard.  The first shard (0) holds the file header and the
+                   metadata entry.
+    :returns: Tuple of the number of entries, the text of the header (empty for the other shards), the metadata entry
+              for the MO file, the text of the active entries, the text of the obsolete entries, an instance of
+              mofile.MOBuilder with the active entries (None if build_mo is False) and the statistics recorded in the
+              worker process, as returned by Stats.as_dict() (None without statistics, or if the shard was processed
+              in the process of pofileutil, whose statistics have them already).  None if the shard has an entry
+              with an empty msgid besides the metadata entry, which polib would take for the metadata entry.
+    """
+    from . import mofile, postream
+
+    first = lineno == 0
+    header = []
+    lines = io.StringIO(text)
+    if not first:
+        lines = itertools.chain(_SHARD_PREFIX, lines)
+        lineno -= len(_SHARD_PREFIX)
+    entries = list(postream.iter_entries(lines, header, lineno))
+    metadata_entry = None
+    if entries and postream.is_metadata_entry(entries[0]):
+        metadata_entry = entries.pop(0)
+    if any(entry.msgid == "" and not entry.obsolete for entry in entries):
+        return None
+    stats = getattr(pofileutil.l10nutil, "stats", None)
+    if stats is not None and not stats._detached:
+        stats = None
+    if stats is not None:
+        stats.reset()  # In case the worker reuses the copy for several shards
+    pofileutil._pseudolocalize_batch(entries)
+
+    header_text = ""
+    mo_metadata_entry = None
+    if first:
+        header_file = postream._header_file(header, metadata_entry, 78)
+        header_text = str(header_file)
+        mo_metadata_entry = header_file.metadata_as_entry()
+    mo_builder = mofile.MOBuilder(encoding) if build_mo else None
+    chunks = ([], [])
+    for entry in entries:
+        if mo_builder is not None:
+            mo_builder.add(entry)
+        chunks[entry.obsolete].append("\n" + entry.__unicode__(78))
+    return (
+        len(entries),
+        header_text,
+        mo_metadata_entry,
+        "".join(chunks[False]),
+        "".join(chunks[True]),
+        mo_builder,
+        None if stats is None else stats.as_dict(),
+    )
+
+
+def _catalog_jobs(src_root, dst_root, patterns):
+    """
+    Lists the message catalogs under src_root matching any of the filename patterns, in sorted path order, with the
+    path of each one under dst_root (.pot files are written as .po).
+
+    :returns: List of (input_filename, output_filename) tuples.
+    """
+    jobs = []
+    for dirpath, dirnames, filenames in os.walk(src_root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not any(fnmatch.fnmatch(filename, p) for p in patterns):
+                continue
+            input_filename = os.path.join(dirpath, filename)
+            jobs.append(
+                (input_filename, _output_filename(input_filename, src_root, dst_root))
+            )
+    return jobs
+
+
+def _output_filename(input_filename, src_root, dst_root):
+    """
+    Returns the path of a message catalog under dst_root, the same as its path under src_root except that .pot files
+    are written as .po.
+    """
+    relpath = os.path.relpath(input_filename, src_root)
+    if relpath.endswith(".pot"):
+        relpath = relpath[:-1]
+    return os.path.join(dst_root, relpath)
+
+
+def _entry_key(entry):
+    """
+    Returns a hash of the source strings of a message catalog entry, i.e. everything its msgstr is generated from.
+    """
+    key = "{}\x04{}\x00{}".format(entry.msgctxt or "", entry.msgid, entry.msgid_plural)
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _load_manifest(manifest_filename, fingerprint):
+    """
+    Loads the pseudo-localized strings recorded by a previous incremental run.
+
+    :returns: Dict mapping entry keys to lists of pseudo-localized strings.  Empty if there is no manifest, it can't
+              be read or it was written by a different pipeline.
+    """
+    try:
+        with open(manifest_filename, encoding="utf-8") as fileobj:
+            manifest = json.load(fileobj)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("fingerprint") != fingerprint:
+        return {}
+    return manifest.get("entries", {})
 
 
 class POFileUtil:
@@ -93,6 +783,10 @@ class POFileUtil:
     Class for performing pseudo-localization on gettext PO (Portable Object) message catalogs.
     """
 
+    # Approximate number of lines of the shards a catalog is split into when it is pseudo-localized on several
+    # workers.
+    shard_size = 20000
+
     def __init__(self, l10nutil=None):
         """
         Initializer for class.
@@ -111,15 +805,64 @@ class POFileUtil:
         input_filename,
         output_filename,
         overwrite_existing=True,
+        streaming=False,
+        incremental=False,
+        mo_filename=None,
+        write_mo=True,
+        workers=1,
+        executor=None,
     ):
         """
-        Method for pseudo-localizing the message catalog file.
+        Method for pseudo-localizing the message catalog file.  The PO file and the compiled MO file are written in a
+        single pass over the entries.
 
         :param input_filename: Filename of the source (input) message catalog file.
-        :param output_filename: Filename of the target (output) message catalog file.
+        :param output_filename: Filename of the target (output) message catalog file.  If None, only the MO file is
+                                written.
         :param overwrite_existing: Boolean indicating if an existing output message catalog file should be overwritten.
                                    True by default. If False, an IOError will be raised.
+        :param streaming: Boolean indicating if the message catalog should be processed one entry at a time, in
+                          constant memory, instead of being loaded as a whole.  False by default.  In streaming mode
+                          only the PO file is written, and obsolete entries are kept in place rather than moved to the
+                          end of the file.
+        :param incremental: Boolean indicating if the strings pseudo-localized by a previous incremental run should
+                            be reused.  False by default.  The source strings of each entry are recorded by hash,
+                            with their pseudo-localized strings and a fingerprint of the transforms, in a manifest
+                            next to the output file (output_filename + ".manifest.json").  Only entries that were
+                            added or changed since are pseudo-localized, unless the pipeline changed (see
+                            CompiledPipeline.fingerprint).  If it has no fingerprint, every entry is pseudo-localized
+                            and no manifest is written.  Can't be combined with streaming.
+        :param mo_filename: Filename of the compiled (MO) message catalog file.  Defaults to output_filename with
+                            its extension replaced by .mo, except in streaming mode, where the MO file is only written
+                            if mo_filename is specified (building it takes memory proportional to the catalog).
+        :param write_mo: Boolean indicating if the MO file should be written.  True by default.
+        :param workers: Number of worker processes the catalog is pseudo-localized on, in shards of about shard_size
+                        lines cut between entries.  1 by default, i.e. serially in the current process.  None for the
+                        number of CPUs.  The output is the same as when processed serially.  Can't be combined with
+                        streaming or incremental.
+        :param executor: Optional instance of concurrent.futures.Executor (or any object with a compatible map()
+                         method) to pseudo-localize the shards on, instead of a process pool of workers processes.
+        :returns: Dict of booleans indicating if each output file (PO and MO) changed, by filename.  The outputs are
+                  written to temporary files, which only replace them if their contents differ, so unchanged outputs
+                  keep their modification time and a failure never leaves them half-written.
         """
+        import polib
+
+        from . import mofile, postream
+
+        if streaming and incremental:
+            raise ValueError("Streaming and incremental modes can't be combined.")
+        sharded = workers != 1 or executor is not None
+        if sharded and (streaming or incremental):
+            raise ValueError(
+                "Streaming and incremental modes can't be combined with workers."
+            )
+        if not write_mo:
+            mo_filename = None
+        elif mo_filename is None and output_filename is not None and not streaming:
+            mo_filename = os.path.splitext(output_filename)[0] + ".mo"
+        if output_filename is None and mo_filename is None:
+            raise ValueError("No output file to write.")
 
         if not os.path.isfile(input_filename):
             raise OSError(
@@ -127,21 +870,474 @@ class POFileUtil:
                     os.path.abspath(input_filename)
                 )
             )
-        if os.path.isfile(output_filename) and not overwrite_existing:
-            raise OSError(
-                "Error, output message catalog already exists: {}".format(
-                    os.path.abspath(output_filename)
+        for filename in (output_filename, mo_filename):
+            if (
+                filename is not None
+                and os.path.isfile(filename)
+                and not overwrite_existing
+            ):
+                raise OSError(
+                    "Error, output message catalog already exists: {}".format(
+                        os.path.abspath(filename)
+                    )
+                )
+        mo_builder = None if mo_filename is None else mofile.MOBuilder()
+        stats = getattr(self.l10nutil, "stats", None)
+        start = time.perf_counter()
+
+        if streaming:
+            encoding = postream.detect_encoding(input_filename)
+            if mo_builder is not None:
+                mo_builder.encoding = encoding
+            with open(input_filename, encoding=encoding) as input_file:
+                header = []
+                entries = postream.iter_entries(input_file, header)
+                pseudolocalize = self.l10nutil.pseudolocalize
+                timer = None
+                if stats is not None:
+                    # Reading, pseudo-localizing and writing the entries are interleaved, so the time spent reading
+                    # and pseudo-localizing is measured one entry at a time.
+                    timer = _StreamTimer()
+                    entries = timer.iter(entries)
+                    pseudolocalize = timer.wrap(pseudolocalize)
+                chunks = postream.iter_format(
+                    self._pseudolocalize_entries(entries, pseudolocalize),
+                    header,
+                    mo_builder=mo_builder,
+                )
+                changed = self._write_catalog(
+                    chunks,
+                    output_filename,
+                    encoding,
+                    mo_builder,
+                    mo_filename,
+                    stats,
+                    timer,
                 )
+            store = getattr(self.l10nutil, "store", None)
+            if store is not None:
+                store.flush()
+            if stats is not None:
+                stats.add_catalog(timer.entries, time.perf_counter() - start)
+            return changed
+
+        if sharded:
+            result = self._pseudolocalize_shards(
+                input_filename,
+                output_filename,
+                mo_builder,
+                mo_filename,
+                workers,
+                executor,
+                stats,
+            )
+            if result is not None:
+                count, changed = result
+                if stats is not None:
+                    stats.add_catalog(count, time.perf_counter() - start)
+                return changed
+
+        with _PhaseTimer(stats, "parse"):
+            po_file = polib.pofile(input_filename)
+        if incremental:
+            manifest_filename = (output_filename or mo_filename) + ".manifest.json"
+            fingerprint = self.l10nutil.fingerprint
+            # Without a fingerprint, the manifest can't tell if the strings it records are still up to date.
+            incremental = fingerprint is not None
+        if incremental:
+            previous = _load_manifest(manifest_filename, fingerprint)
+            keys = [_entry_key(entry) for entry in po_file]
+        else:
+            previous = {}
+            keys = [None] * len(po_file)
+
+        pending = []
+        for entry, key in zip(po_file, keys):
+            strings = previous.get(key)
+            if strings is not None and len(strings) == (2 if entry.msgid_plural else 1):
+                self._set_msgstrs(entry, iter(strings))
+            else:
+                pending.append(entry)
+        with _PhaseTimer(stats, "transform"):
+            self._pseudolocalize_batch(pending)
+
+        if mo_builder is not None:
+            mo_builder.encoding = po_file.encoding
+        chunks = postream.iter_format_pofile(po_file, mo_builder)
+        changed = self._write_catalog(
+            chunks, output_filename, po_file.encoding, mo_builder, mo_filename, stats
+        )
+
+        if incremental:
+            manifest = {
+                "fingerprint": fingerprint,
+                "entries": {
+                    key: (
+                        [entry.msgstr_plural[0], entry.msgstr_plural[1]]
+                        if entry.msgid_plural
+                        else [entry.msgstr]
+                    )
+                    for entry, key in zip(po_file, keys)
+                },
+            }
+            write_file(
+                manifest_filename, [json.dumps(manifest, ensure_ascii=False)], "utf-8"
+            )
+        if stats is not None:
+            stats.add_catalog(len(po_file), time.perf_counter() - start)
+        return changed
+
+    def _pseudolocalize_shards(
+        self,
+        input_filename,
+        output_filename,
+        mo_builder,
+        mo_filename,
+        workers,
+        executor,
+        stats,
+    ):
+        """
+        Pseudo-localizes a message catalog in shards on a pool of workers for pseudolocalizefile().  The shards are
+        parsed, pseudo-localized and formatted in the workers, then written in order, with the obsolete entries of all
+        of the shards at the end of the file as polib does.  The time spent in the workers is recorded in the transform
+        phase, and the statistics of their transforms and strings are merged into stats.
+
+        :returns: Tuple of the number of entries of the catalog and the dict of the changed outputs, or None if it has
+                  to be processed serially, because of an entry with an empty msgid besides the metadata entry.
+        """
+        from . import postream
+
+        with _PhaseTimer(stats, "parse"):
+            encoding = postream.detect_encoding(input_filename)
+            with open(input_filename, encoding=encoding) as input_file:
+                lines = input_file.readlines()
+            starts = _find_shards(lines, self.shard_size)
+            shards = [
+                "".join(lines[start:end])
+                for start, end in zip(starts, starts[1:] + [len(lines)])
+            ]
+            del lines
+
+        with _PhaseTimer(stats, "transform"):
+            pseudolocalize_shard = functools.partial(
+                _pseudolocalize_shard,
+                self,
+                encoding=encoding,
+                build_mo=mo_builder is not None,
+            )
+            if len(shards) == 1:
+                results = [pseudolocalize_shard(shards[0], 0)]
+            elif executor is not None:
+                results = list(executor.map(pseudolocalize_shard, shards, starts))
+            else:
+                with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=min(workers or os.cpu_count() or 1, len(shards))
+                ) as pool:
+                    results = list(pool.map(pseudolocalize_shard, shards, starts))
+            del shards
+        if any(result is None for result in results):
+            return None
+        if stats is not None:
+            for result in results:
+                if result[6] is not None:
+                    stats.merge(result[6])
+
+        if mo_builder is not None:
+            mo_builder.encoding = encoding
+            mo_builder.metadata_entry = results[0][2]
+            for result in results:
+                mo_builder.merge(result[5])
+        chunks = itertools.chain(
+            [results[0][1]],
+            (result[3] for result in results),
+            (result[4] for result in results),
+        )
+        changed = self._write_catalog(
+            chunks, output_filename, encoding, mo_builder, mo_filename, stats
+        )
+        return sum(result[0] for result in results), changed
+
+    @staticmethod
+    def _write_catalog(
+        chunks,
+        output_filename,
+        encoding,
+        mo_builder,
+        mo_filename,
+        stats=None,
+        stream_timer=None,
+    ):
+        """
+        Writes the chunks of a PO file, then the MO file built while they were generated.  If there is no PO file to
+        write, the chunks are still consumed so that the MO file gets built.  Returns the dict of booleans indicating
+        if each file changed, by filename.
+
+        If stats is specified, the time spent is recorded in the save_po and save_mo phases.  In streaming mode, the
+        time the stream timer measured reading and pseudo-localizing the entries, while the chunks were generated, is
+        recorded in the parse and transform phases instead.
+        """
+        changed = {}
+        start = time.perf_counter()
+        if output_filename is None:
+            collections.deque(chunks, maxlen=0)
+        else:
+            changed[output_filename] = write_file(output_filename, chunks, encoding)
+        if stats is not None:
+            elapsed = time.perf_counter() - start
+            if stream_timer is not None:
+                stats.add_phase("parse", stream_timer.parse)
+                stats.add_phase("transform", stream_timer.transform)
+                elapsed -= stream_timer.parse + stream_timer.transform
+            stats.add_phase(
+                "save_mo" if output_filename is None else "save_po", elapsed
             )
+        if mo_builder is not None:
+            with _PhaseTimer(stats, "save_mo"):
+                changed[mo_filename] = mo_builder.save(mo_filename)
+        return changed
 
-        po_file = polib.pofile(input_filename)
-        for entry in po_file:
+    def _pseudolocalize_batch(self, entries):
+        """
+        Pseudo-localizes the msgid (and msgid_plural) of entries in a single call of pseudolocalize_many(), so that
+        identical strings are only pseudo-localized once and the store of l10nutil, if any, is queried in one go.
+        """
+        msgids = []
+        for entry in entries:
+            msgids.append(entry.msgid)
             if entry.msgid_plural:
-                entry.msgstr_plural[0] = self.l10nutil.pseudolocalize(entry.msgid)
-                entry.msgstr_plural[1] = self.l10nutil.pseudolocalize(
-                    entry.msgid_plural
+                msgids.append(entry.msgid_plural)
+        results = iter(self.l10nutil.pseudolocalize_many(msgids))
+        for entry in entries:
+            self._set_msgstrs(entry, results)
+
+    @staticmethod
+    def _set_msgstrs(entry, strings):
+        """
+        Sets the msgstr (or the first two msgstr_plural) of an entry from an iterator of pseudo-localized strings.
+        """
+        if entry.msgid_plural:
+            entry.msgstr_plural[0] = next(strings)
+            entry.msgstr_plural[1] = next(strings)
+        else:
+            entry.msgstr = next(strings)
+
+    def pseudolocalizelines(self, lines, wrapwidth=78, mo_builder=None):
+        """
+        Method for pseudo-localizing a message catalog one entry at a time, in constant memory.
+
+        :param lines: Iterable of the lines of the source (input) message catalog, e.g. a file object opened in text
+                      mode.
+        :param wrapwidth: Width at which lines should be wrapped.
+        :param mo_builder: Optional instance of mofile.MOBuilder the pseudo-localized entries are also added to, to
+                           build the MO file in the same pass.
+        :returns: Generator of chunks of text which, concatenated, make up the pseudo-localized message catalog.
+        """
+        from . import postream
+
+        header = []
+        entries = postream.iter_entries(lines, header)
+        return self.pseudolocalizeentries(entries, header, wrapwidth, mo_builder)
+
+    def pseudolocalizeentries(self, entries, header=(), wrapwidth=78, mo_builder=None):
+        """
+        Method for pseudo-localizing a message catalog read one entry at a time, in constant memory, e.g. with
+        postream.iter_entries() or mofile.iter_entries().
+
+        :param entries: Iterable of polib.POEntry objects, in file order, starting with the metadata entry (msgid "")
+                        if any.  The entries are modified in place.
+        :param header: Lines of the file header (the translator comment at the top of the PO file).  If entries is a
+                       generator filling a list of header lines, as postream.iter_entries() does, pass that list.
+        :param wrapwidth: Width at which lines should be wrapped.
+        :param mo_builder: Optional instance of mofile.MOBuilder the pseudo-localized entries are also added to, to
+                           build the MO file in the same pass.
+        :returns: Generator of chunks of text which, concatenated, make up the pseudo-localized message catalog.
+        """
+        from . import postream
+
+        return postream.iter_format(
+            self._pseudolocalize_entries(entries), header, wrapwidth, mo_builder
+        )
+
+    def _pseudolocalize_entries(self, entries, pseudolocalize=None):
+        """
+        Generator pseudo-localizing entries read by postream.iter_entries(), skipping the metadata entry.
+
+        :param pseudolocalize: Function pseudo-localizing a string.  Defaults to the pseudolocalize() method of
+                               l10nutil.
+        """
+        from . import postream
+
+        if pseudolocalize is None:
+            pseudolocalize = self.l10nutil.pseudolocalize
+        for index, entry in enumerate(entries):
+            if index > 0 or not postream.is_metadata_entry(entry):
+                if entry.msgid_plural:
+                    entry.msgstr_plural[0] = pseudolocalize(entry.msgid)
+                    entry.msgstr_plural[1] = pseudolocalize(entry.msgid_plural)
+                else:
+                    entry.msgstr = pseudolocalize(entry.msgid)
+            yield entry
+
+    def pseudolocalize_sources(
+        self,
+        source_filenames,
+        output_filename,
+        overwrite_existing=True,
+        mo_filename=None,
+        write_mo=True,
+        keywords=None,
+        comment_tags=(),
+        basedir=None,
+        workers=None,
+        metadata=None,
+    ):
+        """
+        Method for extracting the translatable strings of Python source files and pseudo-localizing them into a
+        message catalog in a single step, instead of writing a POT file with xgettext and reading it back.  The
+        catalog has the entries xgettext would extract, in the same order, with their references and comments.
+
+        :param source_filenames: List of the filenames of the Python source files.
+        :param output_filename: Filename of the target (output) message catalog file.  If None, only the MO file is
+                                written.
+        :param overwrite_existing: Boolean indicating if an existing output message catalog file should be overwritten.
+                                   True by default. If False, an IOError will be raised.
+        :param mo_filename: Filename of the compiled (MO) message catalog file.  Defaults to output_filename with its
+                            extension replaced by .mo.
+        :param write_mo: Boolean indicating if the MO file should be written.  True by default.
+        :param keywords: Functions to look for, see extract.extract_file().  Defaults to extract.DEFAULT_KEYWORDS.
+        :param comment_tags: Prefixes of the comments to extract, see extract.extract_file().
+        :param basedir: Directory the source references are relative to.  Defaults to the current directory.
+        :param workers: Number of worker processes the source files are parsed on.  Defaults to the number of CPUs.
+        :param metadata: Optional dict of metadata to add to (or replace in) the header of the catalog.
+        :returns: Dict of booleans indicating if each output file changed, by filename, see pseudolocalizefile().
+        """
+        import polib
+
+        from . import extract, mofile, postream
+
+        if not write_mo:
+            mo_filename = None
+        elif mo_filename is None and output_filename is not None:
+            mo_filename = os.path.splitext(output_filename)[0] + ".mo"
+        if output_filename is None and mo_filename is None:
+            raise ValueError("No output file to write.")
+        for filename in (output_filename, mo_filename):
+            if (
+                filename is not None
+                and os.path.isfile(filename)
+                and not overwrite_existing
+            ):
+                raise OSError(
+                    "Error, output message catalog already exists: {}".format(
+                        os.path.abspath(filename)
+                    )
                 )
-            else:
-                entry.msgstr = self.l10nutil.pseudolocalize(entry.msgid)
-        po_file.save(output_filename)
-        po_file.save_as_mofile(output_filename[:-2] + "mo")
+        stats = getattr(self.l10nutil, "stats", None)
+        start = time.perf_counter()
+
+        with _PhaseTimer(stats, "parse"):
+            entries = extract.extract_files(
+                source_filenames, keywords, comment_tags, basedir, workers
+            )
+        po_file = polib.POFile()
+        po_file.header = (
+            "Pseudo-localized messages extracted from the sources by pseudol10nutil."
+        )
+        # No creation date, so that the catalog only changes when the sources do.
+        po_file.metadata = {
+            "Project-Id-Version": "PACKAGE VERSION",
+            "MIME-Version": "1.0",
+            "Content-Type": "text/plain; charset=UTF-8",
+            "Content-Transfer-Encoding": "8bit",
+            "Plural-Forms": "nplurals=2; plural=(n != 1);",
+            "Generated-By": "pseudol10nutil",
+        }
+        po_file.metadata.update(metadata or {})
+        po_file.extend(entries)
+        with _PhaseTimer(stats, "transform"):
+            self._pseudolocalize_batch(po_file)
+
+        mo_builder = None
+        if mo_filename is not None:
+            mo_builder = mofile.MOBuilder()
+            mo_builder.encoding = po_file.encoding
+        chunks = postream.iter_format_pofile(po_file, mo_builder)
+        changed = self._write_catalog(
+            chunks, output_filename, po_file.encoding, mo_builder, mo_filename, stats
+        )
+        store = getattr(self.l10nutil, "store", None)
+        if store is not None:
+            store.flush()
+        if stats is not None:
+            stats.add_catalog(len(po_file), time.perf_counter() - start)
+        return changed
+
+    def pseudolocalize_tree(
+        self,
+        src_root,
+        dst_root,
+        workers=None,
+        patterns=("*.po",),
+        overwrite_existing=True,
+    ):
+        """
+        Method for pseudo-localizing all of the message catalogs in a directory tree, e.g. locales/*/LC_MESSAGES/*.po.
+        The catalogs are processed in parallel on a process pool.  A catalog that fails does not stop the others from
+        being processed.
+
+        :param src_root: Root directory to search for message catalogs.
+        :param dst_root: Root directory for the pseudo-localized catalogs.  Each catalog is written to the same path
+                         relative to dst_root as its source relative to src_root, with .pot files written as .po.
+        :param workers: Number of worker processes.  Defaults to the number of CPUs.  If 1, the catalogs are processed
+                        serially in the current process.
+        :param patterns: Filename patterns of the message catalogs to process.
+        :param overwrite_existing: Boolean indicating if existing output message catalog files should be overwritten.
+                                   True by default.  If False, existing outputs are reported as failures.
+        :returns: List of CatalogResult named tuples, one per catalog in sorted path order, with the time taken in
+                  seconds, the formatted traceback of the error for any catalog that failed (None otherwise) and the
+                  dict of the outputs that changed, see pseudolocalizefile() (None if it failed).
+        """
+        if not os.path.isdir(src_root):
+            raise OSError(
+                "Source directory not found: {}".format(os.path.abspath(src_root))
+            )
+        jobs = _catalog_jobs(src_root, dst_root, patterns)
+        return self.pseudolocalize_catalogs(jobs, workers, overwrite_existing)
+
+    def pseudolocalize_catalogs(self, jobs, workers=None, overwrite_existing=True):
+        """
+        Method for pseudo-localizing a list of message catalogs in parallel on a process pool.  A catalog that fails
+        does not stop the others from being processed.
+
+        :param jobs: List of (input_filename, output_filename) tuples.  Missing output directories are created.
+        :param workers: Number of worker processes.  Defaults to the number of CPUs.  If 1, the catalogs are processed
+                        serially in the current process.
+        :param overwrite_existing: Boolean indicating if existing output message catalog files should be overwritten.
+                                   True by default.  If False, existing outputs are reported as failures.
+        :returns: List of CatalogResult named tuples, one per job in order.  See pseudolocalize_tree().
+        :raises ValueError: If workers is less than 1.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        elif workers < 1:
+            raise ValueError("Invalid number of workers: {}".format(workers))
+        if workers == 1 or len(jobs) <= 1:
+            return [
+                _pseudolocalize_catalog(self, i, o, overwrite_existing) for i, o in jobs
+            ]
+
+        results = []
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(workers, len(jobs))
+        ) as executor:
+            futures = [
+                executor.submit(_pseudolocalize_catalog, self, i, o, overwrite_existing)
+                for i, o in jobs
+            ]
+            for future, (i, o) in zip(futures, jobs):
+                try:
+                    results.append(future.result())
+                except Exception:  # e.g. the worker process died
+                    results.append(CatalogResult(i, o, 0.0, traceback.format_exc()))
+        return results
@@ -0,0 +1,318 @@
+"""
+Opt-in statistics of the time spent pseudo-localizing strings and message catalogs.
+
+A Stats instance is passed to PseudoL10nUtil (or CompiledPipeline), whose compiled pipelines then time every transform
+and count the strings taking the fast path (no placeholders) and the placeholder path.  POFileUtil uses the Stats of
+its PseudoL10nUtil to time the phases of pseudolocalizefile().  Pipelines compiled without a Stats instance are not
+instrumented at all, so statistics cost nothing unless they are enabled.
+"""
+
+import collections
+import itertools
+import threading
+import time
+
+PHASES = ("parse", "transform", "save_po", "save_mo")
+
+TransformStats = collections.namedtuple("TransformStats", ["calls", "seconds"])
+
+
+class Stats:
+    """
+    Class collecting call counts and timings.  Thread-safe, so one instance can be shared by the pipelines of several
+    threads.
+
+    Hooks are callables called with (metric, value, labels) for every measurement, to forward them to another metrics
+    system:
+
+    - ("transform_seconds", seconds, {"transform": name}) for each call of a transform.  Consecutive transliterations
+      are merged into a single step, whose name joins theirs with "+".
+    - ("strings", 1, {"path": "fast" or "placeholder"}) for each string pseudo-localized (empty strings are skipped).
+    - ("characters", count, {}) with the length of each string pseudo-localized.
+    - ("phase_seconds", seconds, {"phase": name}) for each phase of pseudolocalizefile(), see PHASES.
+    - ("catalog_entries", count, {}) and ("catalog_seconds", seconds, {}) for each catalog pseudo-localized.
+
+    Statistics recorded in worker processes, e.g. for the shards of a catalog pseudo-localized with workers, are sent
+    back and merged in with merge(), in which case the hooks get their totals, e.g. ("strings", 250, {"path": "fast"}).
+    """
+
+    def __init__(self, hooks=()):
+        """
+        Initializer for class.
+
+        :param hooks: Optional sequence of callables called with (metric, value, labels) for every measurement.
+        """
+        self.hooks = list(hooks)
+        self._lock = threading.Lock()
+        # True for a copy sent to a worker process, whose counters are merged into the original.
+        self._detached = False
+        self.reset()
+
+    def __getstate__(self):
+        # Locks and hooks can't be pickled, e.g. to send a POFileUtil to a worker process, which starts from empty
+        # statistics and sends them back with as_dict().
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self._detached = True
+
+    def reset(self):
+        """
+        Sets all of the counters back to zero.  The hooks are kept.
+        """
+        with self._lock:
+            self._transforms = {}
+            self.strings = 0
+            self.characters = 0
+            self.fast_path = 0
+            self.placeholder_path = 0
+            self.phases = dict.fromkeys(PHASES, 0.0)
+            self.catalogs = 0
+            self.entries = 0
+            self.catalog_seconds = 0.0
+
+    def add_hook(self, hook):
+        """
+        Adds a callable called with (metric, value, labels) for every measurement.
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        Removes a hook added with add_hook().
+        """
+        self.hooks.remove(hook)
+
+    def _emit(self, metric, value, labels):
+        for hook in self.hooks:
+            hook(metric, value, labels)
+
+    def add_transform(self, name, seconds):
+        """
+        Records a call of a transform.
+        """
+        with self._lock:
+            calls, total = self._transforms.get(name, (0, 0.0))
+            self._transforms[name] = (calls + 1, total + seconds)
+        if self.hooks:
+            self._emit("transform_seconds", seconds, {"transform": name})
+
+    def add_string(self, length, placeholders):
+        """
+        Records a string pseudo-localized.
+
+        :param length: Number of characters of the string.
+        :param placeholders: Boolean indicating if the string took the placeholder path.
+        """
+        with self._lock:
+            self.strings += 1
+            self.characters += length
+            if placeholders:
+                self.placeholder_path += 1
+            else:
+                self.fast_path += 1
+        if self.hooks:
+            path = "placeholder" if placeholders else "fast"
+            self._emit("strings", 1, {"path": path})
+            self._emit("characters", length, {})
+
+    def add_phase(self, phase, seconds):
+        """
+        Records the time spent in a phase of pseudolocalizefile(), one of PHASES.
+        """
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        if self.hooks:
+            self._emit("phase_seconds", seconds, {"phase": phase})
+
+    def add_catalog(self, entries, seconds):
+        """
+        Records a message catalog pseudo-localized.
+
+        :param entries: Number of entries of the catalog.
+        :param seconds: Total time taken.
+        """
+        with self._lock:
+            self.catalogs += 1
+            self.entries += entries
+            self.catalog_seconds += seconds
+        if self.hooks:
+            self._emit("catalog_entries", entries, {})
+            self._emit("catalog_seconds", seconds, {})
+
+    def merge(self, counters):
+        """
+        Adds the counters of another instance, e.g. one of a worker process, to those of this one.  The hooks are
+        called once with the total of each metric and label.
+
+        :param counters: Dict returned by the as_dict() method of the other instance.
+        """
+        with self._lock:
+            for name, value in counters["transforms"].items():
+                calls, total = self._transforms.get(name, (0, 0.0))
+                self._transforms[name] = (
+                    calls + value["calls"],
+                    total + value["seconds"],
+                )
+            self.strings += counters["strings"]
+            self.characters += counters["characters"]
+            self.fast_path += counters["fast_path"]
+            self.placeholder_path += counters["placeholder_path"]
+            for phase, seconds in counters["phases"].items():
+                self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            self.catalogs += counters["catalogs"]
+            self.entries += counters["entries"]
+            self.catalog_seconds += counters["catalog_seconds"]
+        if not self.hooks:
+            return
+        for name, value in counters["transforms"].items():
+            self._emit("transform_seconds", value["seconds"], {"transform": name})
+        for path in ("fast", "placeholder"):
+            if counters[path + "_path"]:
+                self._emit("strings", counters[path + "_path"], {"path": path})
+        if counters["characters"]:
+            self._emit("characters", counters["characters"], {})
+        for phase, seconds in counters["phases"].items():
+            if seconds:
+                self._emit("phase_seconds", seconds, {"phase": phase})
+        if counters["catalogs"]:
+            self._emit("catalog_entries", counters["entries"], {})
+            self._emit("catalog_seconds", counters["catalog_seconds"], {})
+
+    @property
+    def transforms(self):
+        """
+        Dict of TransformStats named tuples (calls, seconds) by transform name.
+        """
+        with self._lock:
+            return {
+                name: TransformStats(*value) for name, value in self._transforms.items()
+            }
+
+    @property
+    def entries_per_second(self):
+        """
+        Number of catalog entries pseudo-localized per second by pseudolocalizefile(), or 0.0 if no catalog was.
+        """
+        return self.entries / self.catalog_seconds if self.catalog_seconds else 0.0
+
+    def as_dict(self):
+        """
+        Returns all of the statistics, e.g. to be dumped as JSON.
+
+        :returns: Dict of the counters, with the transforms as a dict of {"calls": ..., "seconds": ...} dicts and the
+                  phases as a dict of seconds.
+        """
+        return {
+            "transforms": {
+                name: value._asdict() for name, value in self.transforms.items()
+            },
+            "strings": self.strings,
+            "characters": self.characters,
+            "fast_path": self.fast_path,
+            "placeholder_path": self.placeholder_path,
+            "phases": dict(self.phases),
+            "catalogs": self.catalogs,
+            "entries": self.entries,
+            "catalog_seconds": self.catalog_seconds,
+            "entries_per_second": self.entries_per_second,
+        }
+
+
+class _TimedStep:
+    """
+    Pipeline step recording the calls of another step in a Stats instance.
+    """
+
+    def __init__(self, munge, name, stats):
+        self.munge = munge
+        self.name = name
+        self.stats = stats
+
+    def __call__(self, s, fmt_spec):
+        start = time.perf_counter()
+        result = self.munge(s, fmt_spec)
+        self.stats.add_transform(self.name, time.perf_counter() - start)
+        return result
+
+
+class _PathStep:
+    """
+    Pipeline step leaving strings unchanged, put first in the steps of the fast path or the placeholder path to count
+    the strings taking it.
+    """
+
+    def __init__(self, stats, placeholders):
+        self.stats = stats
+        self.placeholders = placeholders
+
+    def __call__(self, s, fmt_spec):
+        self.stats.add_string(len(s), self.placeholders)
+        return s
+
+
+class _PhaseTimer:
+    """
+    Context manager adding the time spent in its block to a phase of a Stats instance.  Does nothing if the Stats
+    instance is None.
+    """
+
+    __slots__ = ("stats", "phase", "start")
+
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.stats is not None:
+            self.stats.add_phase(self.phase, time.perf_counter() - self.start)
+
+
+class _StreamTimer:
+    """
+    Accumulates the time spent parsing and pseudo-localizing the entries of a catalog processed in streaming mode,
+    where the phases are interleaved.
+    """
+
+    def __init__(self):
+        self.parse = 0.0
+        self.transform = 0.0
+        self.entries = 0
+
+    def iter(self, entries):
+        """
+        Generator yielding the entries of an iterable, timing how long each one takes to read.  The metadata entry is not
+        counted, as with polib.
+        """
+        from .postream import is_metadata_entry
+
+        clock = time.perf_counter
+        entries = iter(entries)
+        for index in itertools.count():
+            start = clock()
+            entry = next(entries, None)
+            self.parse += clock() - start
+            if entry is None:
+                return
+            if index > 0 or not is_metadata_entry(entry):
+                self.entries += 1
+            yield entry
+
+    def wrap(self, pseudolocalize):
+        """
+        Returns a function calling pseudolocalize, timing how long each call takes.
+        """
+        clock = time.perf_counter
+
+        def timed(s):
+            start = clock()
+            result = pseudolocalize(s)
+            self.transform += clock() - start
+            return result
+
+        return timed
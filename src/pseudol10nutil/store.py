@@ -0,0 +1,397 @@
+"""
+Persistent, content-addressed store of pseudo-localized strings, shared across catalogs, processes and runs.
+
+Results are keyed by a hash of the fingerprint of the pipeline that produced them and of the source string, so one
+store can hold the results of any number of pipelines, and a result is only ever reused by the pipeline that produced
+it.  The store is a SQLite database in write-ahead logging mode: any number of processes can read it while one of them
+writes, and writers wait for each other.  Once the results take up more than the maximum size, the least recently used
+ones are evicted.  The database file can be copied (e.g. as a CI cache artifact) once no process is writing to it.
+"""
+
+import collections
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+StoreInfo = collections.namedtuple(
+    "StoreInfo", ["hits", "misses", "evictions", "max_size", "size", "count"]
+)
+
+# Version of the database schema, recorded in its user_version.
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key BLOB PRIMARY KEY,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used INTEGER NOT NULL  -- Time of the last use, in microseconds since the epoch
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+CREATE TABLE IF NOT EXISTS totals (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES ('size', 0), ('count', 0);
+"""
+
+# Size of a row besides its result, roughly: the key, the size and the last use, plus the index entry.
+_ROW_OVERHEAD = 48
+
+# The last use of a result is only updated if it is older than this many microseconds, so that reads seldom write.
+_TOUCH_INTERVAL = 3600 * 10**6
+
+# Maximum number of parameters of a single query, below SQLite's limit on older versions.
+_QUERY_SIZE = 500
+
+
+def _keys(fingerprint, strings):
+    """
+    Returns a dict of strings by the keys of their results for a pipeline.
+    """
+    prefix = hashlib.blake2b(fingerprint.encode("ascii") + b"\0", digest_size=16)
+    keys = {}
+    for s in strings:
+        digest = prefix.copy()
+        digest.update(s.encode("utf-8", "surrogatepass"))
+        keys[digest.digest()] = s
+    return keys
+
+
+def _select(connection, columns, keys):
+    """
+    Generator yielding the given columns of the rows of the results with the given keys.
+    """
+    for index in range(0, len(keys), _QUERY_SIZE):
+        chunk = keys[index : index + _QUERY_SIZE]
+        yield from connection.execute(
+            "SELECT {} FROM results WHERE key IN ({})".format(
+                columns, ",".join("?" * len(chunk))
+            ),
+            chunk,
+        )
+
+
+class PersistentStore:
+    """
+    Class for storing pseudo-localized strings on disk, to be passed as the store of PseudoL10nUtil.  Thread-safe, and
+    safe to use from several processes at once.  Instances can be pickled, e.g. to be sent to worker processes, which
+    open their own connection to the database.
+
+    New results are buffered and written in batches of batch_size.  Call flush() (or close(), or use the store as a
+    context manager) to write the results buffered so far, which are not visible to other processes until then.
+    """
+
+    def __init__(self, filename, max_size=None, batch_size=1024, timeout=60.0):
+        """
+        Initializer for class.
+
+        :param filename: Filename of the database.  It is created if it doesn't exist.
+        :param max_size: Optional maximum size of the stored results, in bytes (the UTF-8 size of each result plus
+                         a fixed overhead per result).  Once it is exceeded, the least recently used results are
+                         evicted.  Unlimited by default.
+        :param batch_size: Number of new results to buffer before writing them.
+        :param timeout: Number of seconds to wait for another process writing to the database.
+        :raises ValueError: If max_size or batch_size isn't positive.
+        :raises OSError: If the database can't be opened, or isn't a store.
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError("Store size must be positive, got {}.".format(max_size))
+        if batch_size < 1:
+            raise ValueError("Batch size must be positive, got {}.".format(batch_size))
+        self.filename = filename
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._connection = None
+        self._pid = None
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connect()
+
+    def __getstate__(self):
+        # Connections and locks can't be pickled, and buffered results belong to the process that computed them.
+        return {
+            "filename": self.filename,
+            "max_size": self.max_size,
+            "batch_size": self.batch_size,
+            "timeout": self.timeout,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect(self):
+        """
+        Returns the connection of the current process, opening it first if needed, e.g. in a child process forked
+        since the store was opened.
+        """
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        try:
+            connection = sqlite3.connect(
+                self.filename,
+                timeout=self.timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, _SCHEMA_VERSION):
+                connection.close()
+                raise OSError(
+                    "Unsupported store version {}: {}".format(
+                        version, os.path.abspath(self.filename)
+                    )
+                )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA cache_size=-65536")
+            if version == 0:
+                connection.executescript(
+                    "BEGIN IMMEDIATE;{}PRAGMA user_version = {};\nCOMMIT;".format(
+                        _SCHEMA, _SCHEMA_VERSION
+                    )
+                )
+        except sqlite3.Error as e:
+            raise OSError(
+                "Can't open store {}: {}".format(os.path.abspath(self.filename), e)
+            )
+        self._connection = connection
+        self._pid = os.getpid()
+        self._pending = {}
+        return connection
+
+    def get(self, fingerprint, s):
+        """
+        Looks up the result of a pipeline for a string.
+
+        :param fingerprint: Fingerprint of the pipeline, see CompiledPipeline.fingerprint.
+        :param s: Source string.
+        :returns: The pseudo-localized string, or None if it isn't stored.
+        """
+        return self.get_many(fingerprint, [s]).get(s)
+
+    def get_many(self, fingerprint, strings):
+        """
+        Looks up the results of a pipeline for several strings in as few queries as possible.
+
+        :param fingerprint: Fingerprint of the pipeline, see CompiledPipeline.fingerprint.
+        :param strings: Iterable of distinct source strings.
+        :returns: Dict of the pseudo-localized strings found, by source string.
+        """
+        keys = _keys(fingerprint, strings)
+        count = len(keys)
+        found = {}
+        stale = []
+        now = time.time_ns() // 1000
+        with self._lock:
+            connection = self._connect()
+            if self._pending:
+                for key in list(keys):
+                    result = self._pending.get(key)
+                    if result is not None:
+                        found[keys.pop(key)] = result
+            for key, result, used in _select(
+                connection, "key, result, used", list(keys)
+            ):
+                found[keys[key]] = result
+                if used < now - _TOUCH_INTERVAL:
+                    stale.append((now, key))
+            if stale:
+                with connection:
+                    connection.execute("BEGIN IMMEDIATE")
+                    connection.executemany(
+                        "UPDATE results SET used = ? WHERE key = ?", stale
+                    )
+            self.hits += len(found)
+            self.misses += count - len(found)
+        return found
+
+    def put(self, fingerprint, s, result):
+        """
+        Adds the result of a pipeline for a string.  It is buffered until batch_size results are.
+
+        :param fingerprint: Fingerprint of the pipeline, see CompiledPipeline.fingerprint.
+        :param s: Source string.
+        :param result: Pseudo-localized string.
+        """
+        with self._lock:
+            self._connect()
+            self._pending.update(dict.fromkeys(_keys(fingerprint, [s]), result))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def put_many(self, fingerprint, results):
+        """
+        Adds the results of a pipeline for several strings, and writes them with the results buffered so far.
+
+        :param fingerprint: Fingerprint of the pipeline, see CompiledPipeline.fingerprint.
+        :param results: Iterable of (source string, pseudo-localized string) tuples.
+        """
+        results = dict(results)
+        with self._lock:
+            self._connect()
+            for key, s in _keys(fingerprint, results).items():
+                self._pending[key] = results[s]
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered results, then evicts the least recently used results if the store is over its maximum
+        size.  Results another process stored in the meantime are kept as they are.
+        """
+        with self._lock:
+            connection = self._connect()
+            if not self._pending:
+                return
+            now = time.time_ns() // 1000
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                # Results are content-addressed, so those stored in the meantime by another process are the same.
+                existing = {
+                    key for key, in _select(connection, "key", list(self._pending))
+                }
+                rows = [
+                    (
+                        key,
+                        result,
+                        len(result.encode("utf-8", "surrogatepass")) + _ROW_OVERHEAD,
+                        now,
+                    )
+                    for key, result in self._pending.items()
+                    if key not in existing
+                ]
+                connection.executemany("INSERT INTO results VALUES (?, ?, ?, ?)", rows)
+                self._add_totals(connection, sum(row[2] for row in rows), len(rows))
+                if self.max_size is not None:
+                    self._evict(connection, self.max_size)
+            self._pending = {}
+
+    def _evict(self, connection, max_size):
+        """
+        Deletes the least recently used results until the store is down to 90% of its maximum size, to leave room for
+        the next writes.  Runs in the write transaction of the caller.
+        """
+        size = self._total(connection, "size")
+        if size <= max_size:
+            return
+        target = max_size * 9 // 10
+        deleted = []
+        while size > target:
+            rows = connection.execute(
+                "SELECT key, size FROM results ORDER BY used LIMIT ? OFFSET ?",
+                (_QUERY_SIZE, len(deleted)),
+            ).fetchall()
+            if not rows:
+                break
+            # Only delete as many of the oldest results as needed to get down to the target.
+            for key, row_size in rows:
+                if size <= target:
+                    break
+                deleted.append((key, row_size))
+                size -= row_size
+        connection.executemany(
+            "DELETE FROM results WHERE key = ?", [(key,) for key, _ in deleted]
+        )
+        self._add_totals(
+            connection, -sum(row_size for _, row_size in deleted), -len(deleted)
+        )
+        self.evictions += len(deleted)
+
+    @staticmethod
+    def _add_totals(connection, size, count):
+        connection.executemany(
+            "UPDATE totals SET value = value + ? WHERE name = ?",
+            [(size, "size"), (count, "count")],
+        )
+
+    @staticmethod
+    def _total(connection, name):
+        return connection.execute(
+            "SELECT value FROM totals WHERE name = ?", (name,)
+        ).fetchone()[0]
+
+    def compact(self, max_size=None):
+        """
+        Evicts the least recently used results down to a maximum size, then rebuilds the database file to reclaim
+        the space left by evicted results.  Needs exclusive access for the duration, waiting for other processes
+        writing to the store.
+
+        :param max_size: Maximum size of the stored results, in bytes.  Defaults to the max_size of the store.  If
+                         neither is set, nothing is evicted.
+        :returns: Tuple of the size of the database file before and after, in bytes.
+        :raises ValueError: If max_size isn't positive.
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError("Store size must be positive, got {}.".format(max_size))
+        with self._lock:
+            self.flush()
+            connection = self._connect()
+            before = self._file_size()
+            max_size = max_size or self.max_size
+            if max_size is not None:
+                with connection:
+                    connection.execute("BEGIN IMMEDIATE")
+                    self._evict(connection, max_size)
+            connection.execute("VACUUM")
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return before, self._file_size()
+
+    def _file_size(self):
+        return sum(
+            os.path.getsize(filename)
+            for filename in (self.filename, self.filename + "-wal")
+            if os.path.isfile(filename)
+        )
+
+    def clear(self):
+        """
+        Removes all results, including the buffered ones.  The hit, miss and eviction counters are kept.
+        """
+        with self._lock:
+            connection = self._connect()
+            self._pending = {}
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.execute("DELETE FROM results")
+                connection.execute("UPDATE totals SET value = 0")
+
+    def info(self):
+        """
+        Returns the store statistics.  The hits and misses are those of this instance, the size and count those of the
+        whole store, not including the results buffered but not written yet.
+
+        :returns: StoreInfo named tuple with the hits, misses, evictions, max_size, size (in bytes) and count fields.
+        """
+        with self._lock:
+            connection = self._connect()
+            return StoreInfo(
+                self.hits,
+                self.misses,
+                self.evictions,
+                self.max_size,
+                self._total(connection, "size"),
+                self._total(connection, "count"),
+            )
+
+    def close(self):
+        """
+        Writes the buffered results and closes the connection.  The store reopens it if it is used again.
+        """
+        with self._lock:
+            if self._connection is None or self._pid != os.getpid():
+                return
+            self.flush()
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,300 @@
+"""
+Single-pass tokenizer splitting strings into text and placeholder spans.
+
+A placeholder grammar is a regex matching one style of placeholder (printf, Python format, HTML tags...).  A Tokenizer
+combines any number of grammars into a single regex, so each string is scanned once whatever the number of grammars,
+and returns the spans in a fixed layout: text at the even indexes and placeholders at the odd indexes.  Transforms
+that get a Tokenizer as their fmt_spec argument can use tokenize() to skip classifying the spans again.
+
+Strings are tokenized in time linear in their length whatever their content, since pseudo-localized strings may come
+from untrusted input.  The combined regex takes quadratic time on strings with unclosed placeholders, e.g.
+"<" * 100000 or "{" * 60 + "a" * 1000000, as it scans the rest of the string again from each of them, so strings with
+any unclosed placeholder are tokenized with a linear scan instead.
+"""
+
+import collections
+import re
+
+Grammar = collections.namedtuple(
+    "Grammar", ["name", "pattern", "first_chars", "closing"], defaults=(None,)
+)
+Grammar.__doc__ = """
+Placeholder grammar.
+
+:param name: Name of the grammar.
+:param pattern: Regex pattern matching a placeholder.  Must not contain capturing groups.
+:param first_chars: String of the characters a placeholder can start with, used to skip strings that can't contain
+                    any placeholder.  None if unknown.
+:param closing: For placeholders running up to a closing character, e.g. <...>, tuple of the opening character, the
+                closing character and a string of the characters a placeholder can't contain before it.  The pattern
+                has to match at an opening character if and only if the closing character comes after it, before any
+                of these characters.  Without it, unclosed placeholders aren't detected, so the combined regex takes
+                quadratic time on strings with many of them, and so does the linear scan of Tokenizer.tokenize().
+                None otherwise.
+"""
+
+# The four grammars of DEFAULT_PLACEHOLDER_REGEX, in the same order.
+ESCAPED_NEWLINE = Grammar("escaped_newline", r"\\n$", "\\")
+HTML = Grammar("html", r"<[^>]*>", "<", ("<", ">", ""))
+# https://docs.python.org/3/library/string.html#formatstrings
+PYTHON_FORMAT = Grammar("python_format", r"{.*?}", "{", ("{", "}", "\n"))
+# https://docs.python.org/3/library/stdtypes.html#printf-style-string-formatting
+PRINTF = Grammar("printf", r"%(?:\(\w+?\))?.*?[acdeEfFgGiorsuxX%]", "%")
+
+# ICU MessageFormat arguments, e.g. {name}, {0, number} or {count, plural, one {# file} other {# files}}.  Arguments
+# with nested sub-messages (plural, select) are kept whole, with up to two levels of nesting.
+ICU_MESSAGE_FORMAT = Grammar(
+    "icu_message_format", r"{[^{}]*(?:{[^{}]*(?:{[^{}]*}[^{}]*)*}[^{}]*)*}", "{"
+)
+# Qt QString::arg() placeholders, %1 to %99, and %L1 to %L99 for localized numbers.
+QT = Grammar("qt", r"%L?\d\d?", "%")
+# java.text.MessageFormat arguments, e.g. {0} or {1,number,#.##}.
+JAVA_MESSAGE_FORMAT = Grammar("java_message_format", r"{\d+(?:\s*,[^{}]*)?}", "{")
+
+# XML tags (including comments and CDATA markers) and entity or character references, for strings pseudo-localized
+# with their inline markup, e.g. the content of an XLIFF <source> element.
+XML_MARKUP = Grammar("xml_markup", r"<[^>]*>|&#?\w+;", "<&", ("<", ">", ""))
+# Backslash escapes of Android string resources, e.g. \n, \' or \u00e9.
+ANDROID_ESCAPE = Grammar("android_escape", r"\\(?:u[0-9a-fA-F]{4}|.)", "\\")
+
+DEFAULT_GRAMMARS = (ESCAPED_NEWLINE, HTML, PYTHON_FORMAT, PRINTF)
+
+
+def _unclosed_pattern(closing):
+    """
+    Returns a regex pattern matching an opening character which isn't followed by its closing character before the
+    next of the characters excluded from the placeholder or the end of the string, given the closing tuple of a
+    grammar.  It is only tried at the start of the string and after the closing and excluded characters, so that each
+    run of the string between them is scanned once, in linear time.
+    """
+    opening, closing_char, excluded = closing
+    stops = re.escape(closing_char + excluded)
+    return r"(?<![^{stops}])[^{opening}{stops}]*{opening}[^{stops}]*{end}".format(
+        stops=stops,
+        opening=re.escape(opening),
+        end=r"(?:[{}]|\Z)".format(re.escape(excluded)) if excluded else r"\Z",
+    )
+
+
+class _NextIndex:
+    """
+    Finds the next occurrence of characters in a string, for queries at increasing positions.  Each character is only
+    searched for again past its last occurrence found, so all of the queries on a string take linear time in total.
+    """
+
+    def __init__(self, s):
+        self.s = s
+        self._found = {}
+
+    def __call__(self, chars, start):
+        """
+        Returns the index of the first of the characters at or after start, or -1 if there is none.
+        """
+        first = -1
+        for char in chars:
+            last_start, index = self._found.get(char, (len(self.s) + 1, -1))
+            if not last_start <= start or 0 <= index < start:
+                index = self.s.find(char, start)
+                self._found[char] = (start, index)
+            if index >= 0 and (first < 0 or index < first):
+                first = index
+        return first
+
+
+class Tokenizer:
+    """
+    Class for splitting strings into text and placeholder spans with a combined set of placeholder grammars.
+
+    Tokenizers can be used as the placeholder regex of PseudoL10nUtil and CompiledPipeline.  The attributes of the
+    combined regex (split(), match(), search()...) are available on the tokenizer itself, so it can also be passed
+    to transforms written for a compiled regex.
+    """
+
+    def __init__(self, grammars=DEFAULT_GRAMMARS):
+        """
+        Initializer for class.
+
+        :param grammars: Sequence of Grammar named tuples.  Where several grammars match at the same position, the
+                         first one wins, e.g. QT has to come before PRINTF, which would match "%1 f" in "%1 files".
+        """
+        self.grammars = tuple(grammars)
+        self.pattern = "({})".format(
+            "|".join("(?:{})".format(grammar.pattern) for grammar in self.grammars)
+        )
+        self.regex = re.compile(self.pattern)
+        if any(grammar.first_chars is None for grammar in self.grammars):
+            self._first_chars = None
+            self._candidates = None
+            self._closings = ()
+        else:
+            self._first_chars = frozenset(
+                "".join(grammar.first_chars for grammar in self.grammars)
+            )
+            self._candidates = re.compile(
+                "[{}]".format("".join(map(re.escape, sorted(self._first_chars))))
+            )
+            # Closing tuples of the grammars, with the regex finding their unclosed placeholders in strings containing
+            # any of their excluded characters.
+            self._closings = tuple(
+                closing + (re.compile(_unclosed_pattern(closing)).search,)
+                for closing in sorted(
+                    {grammar.closing for grammar in self.grammars if grammar.closing}
+                )
+            )
+            # Regexes of the grammars each first character can start, in order, with their closing characters.
+            self._grammars_by_char = {
+                char: tuple(
+                    (re.compile(grammar.pattern).match, grammar.closing)
+                    for grammar in self.grammars
+                    if char in grammar.first_chars
+                )
+                for char in self._first_chars
+            }
+        # A regex given to from_regex() may depend on context in ways that can't be known, e.g. with lookarounds,
+        # so every span is then classified by matching it on its own, as PseudoL10nUtil always used to.
+        self._match_all_spans = False
+
+    @classmethod
+    def from_regex(cls, regex):
+        """
+        Creates a tokenizer from a compiled placeholder regex.
+
+        :param regex: Compiled regex.  Placeholders are the spans the regex matches when they are matched on their own.
+        :returns: Instance of Tokenizer.
+        """
+        tokenizer = cls.__new__(cls)
+        tokenizer.grammars = ()
+        tokenizer.pattern = regex.pattern
+        tokenizer.regex = regex
+        tokenizer._first_chars = None
+        tokenizer._candidates = None
+        tokenizer._closings = ()
+        tokenizer._match_all_spans = True
+        return tokenizer
+
+    @property
+    def flags(self):
+        return self.regex.flags
+
+    def __getattr__(self, name):
+        if name == "regex":  # Not set yet, e.g. while unpickling
+            raise AttributeError(name)
+        return getattr(self.regex, name)
+
+    def __reduce__(self):
+        if self._match_all_spans:
+            return (Tokenizer.from_regex, (self.regex,))
+        return (Tokenizer, (self.grammars,))
+
+    def __repr__(self):
+        if self._match_all_spans:
+            return "Tokenizer.from_regex({!r})".format(self.regex)
+        return "Tokenizer([{}])".format(", ".join(g.name for g in self.grammars))
+
+    def tokenize(self, s):
+        """
+        Splits a string into text and placeholder spans in a single scan.  Unless the tokenizer was created with
+        from_regex() or has grammars without first_chars, this takes time linear in the length of the string.
+
+        :param s: String to split.
+        :returns: List of the spans, which concatenated make up s, with text at the even indexes and placeholders at
+                  the odd indexes.  Text spans may be empty, e.g. between adjacent placeholders.  A string without
+                  placeholders is returned as a list of one text span.
+        """
+        first_chars = self._first_chars
+        if first_chars is not None and first_chars.isdisjoint(s):
+            return [s]
+        if self._match_all_spans:
+            return self._tokenize_regex(s)
+        if self._has_unclosed(s):
+            spans = self._scan(s)
+        else:
+            spans = self.regex.split(s)
+        # A text span can still match on its own, e.g. an escaped newline between two placeholders, which the
+        # end-of-string anchor of ESCAPED_NEWLINE only matches in isolation.  Such spans are placeholders too.
+        for index in range(len(spans) - 1, -1, -2):
+            span = spans[index]
+            if (
+                span
+                and (first_chars is None or span[0] in first_chars)
+                and self.regex.match(span)
+            ):
+                spans[index : index + 1] = ["", span, ""]
+        return spans
+
+    def _has_unclosed(self, s):
+        """
+        Returns True if the string contains a placeholder which is never closed, e.g. "<" in "a < b", which the combined
+        regex scans the rest of the string from.
+        """
+        for opening, closing, excluded, search_unclosed in self._closings:
+            last = s.rfind(opening)
+            if last < 0:
+                continue
+            if last > s.rfind(closing):
+                return True
+            for char in excluded:
+                if char in s:
+                    if search_unclosed(s):
+                        return True
+                    break
+        return False
+
+    def _scan(self, s):
+        """
+        Splits a string as re.split() with the combined regex would, in linear time: the grammars are only matched at
+        their first characters, and not at all at an opening character that no closing character follows.  Other
+        grammars can only scan ahead up to the next position where a placeholder of theirs could start, or match.
+        """
+        spans = []
+        text_start = 0
+        search = self._candidates.search
+        next_index = _NextIndex(s)
+        candidate = search(s)
+        while candidate is not None:
+            index = candidate.start()
+            end = -1
+            for match, closing in self._grammars_by_char[s[index]]:
+                if closing is not None and s[index] == closing[0]:
+                    close = next_index(closing[1] + closing[2], index + 1)
+                    if close < 0 or s[close] != closing[1]:
+                        continue
+                placeholder = match(s, index)
+                if placeholder is not None:
+                    end = placeholder.end()
+                    break
+            if end < 0:
+                candidate = search(s, index + 1)
+            else:
+                spans += [s[text_start:index], s[index:end]]
+                text_start = end
+                candidate = search(s, end)
+        spans.append(s[text_start:])
+        return spans
+
+    def _tokenize_regex(self, s):
+        regex = self.regex
+        if regex.groups == 1:
+            pieces = regex.split(s)
+        else:
+            # re.split() only returns the placeholders found by a single capturing group.
+            pieces = []
+            start = 0
+            for match in regex.finditer(s):
+                pieces += [s[start : match.start()], match.group()]
+                start = match.end()
+            pieces.append(s[start:])
+        if len(pieces) == 1:
+            return pieces
+        spans = []
+        for piece in pieces:
+            is_placeholder = bool(regex.match(piece))
+            if len(spans) % 2 != is_placeholder:
+                spans.append("")  # Keep text at the even indexes
+            spans.append(piece)
+        if len(spans) % 2 == 0:
+            spans.append("")
+        return spans
+
+
+DEFAULT_TOKENIZER = Tokenizer()
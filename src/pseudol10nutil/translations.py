@@ -0,0 +1,58 @@
+import functools
+import gettext
+
+from .pseudol10nutil import PseudoL10nUtil
+
+
+class PseudoTranslations(gettext.NullTranslations):
+    """
+    Translations class for the gettext module which pseudo-localizes messages at lookup time, so that an application
+    can run in a pseudo locale without generating any PO or MO files.
+    """
+
+    def __init__(self, l10nutil=None, cache_size=4096):
+        """
+        Initializer for class.
+
+        :param l10nutil: Optional instance of PseudoL10nUtil object with the transforms already configured.  Otherwise,
+                         an instance of the PseudoL10nUtil class will be created with the default transforms.  The
+                         transforms are compiled when the translations are created; later changes to l10nutil are not
+                         picked up.
+        :param cache_size: Maximum number of pseudo-localized messages to keep in the least recently used cache.  If
+                           None, the cache is unbounded.
+        """
+        super().__init__()
+        if not l10nutil:
+            l10nutil = PseudoL10nUtil()
+        self.pipeline = l10nutil.compile()
+        # functools.lru_cache is implemented in C, so a cache hit costs about as much as a dict lookup in
+        # GNUTranslations.
+        self._pseudolocalize = functools.lru_cache(maxsize=cache_size)(
+            self.pipeline.pseudolocalize
+        )
+
+    def cache_info(self):
+        """
+        Returns the cache statistics.
+
+        :returns: Named tuple with the hits, misses, maxsize and currsize fields.
+        """
+        return self._pseudolocalize.cache_info()
+
+    def cache_clear(self):
+        """
+        Removes all pseudo-localized messages from the cache.
+        """
+        self._pseudolocalize.cache_clear()
+
+    def gettext(self, message):
+        return self._pseudolocalize(message)
+
+    def ngettext(self, msgid1, msgid2, n):
+        return self._pseudolocalize(msgid1 if n == 1 else msgid2)
+
+    def pgettext(self, context, message):
+        return self._pseudolocalize(message)
+
+    def npgettext(self, context, msgid1, msgid2, n):
+        return self._pseudolocalize(msgid1 if n == 1 else msgid2)
@@ -0,0 +1,217 @@
+"""
+Optional NumPy backend for pseudo-localizing large batches of strings.
+
+The whole batch is encoded into a single array of UTF-32 code points.  The transliterations are applied as one
+lookup-table gather over the array, with the placeholder spans masked out, and pad_length and the bracket transforms
+are applied to all of the strings at once using their offsets in the array.  Only strings which may contain a
+placeholder are tokenized one at a time, so the cost grows with the size of the batch rather than with the number of
+Python calls.
+
+NumPy is only imported when a VectorizedPipeline is created; it is not a dependency of the rest of the package.
+"""
+
+import sys
+
+from . import transforms
+from .pseudol10nutil import CompiledPipeline
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "The vectorized backend requires NumPy, install it with: pip install numpy"
+        )
+    return numpy
+
+
+def _codes(np, s):
+    return np.frombuffer(s.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+
+class VectorizedPipeline:
+    """
+    Class for pseudo-localizing large batches of strings with NumPy.  The results are identical to those of
+    CompiledPipeline with the same transforms and placeholder regex.
+
+    Only transliterations with a translation table (transforms.translation_tables), pad_length and the bracket
+    transforms (transforms.bracket_pairs) are supported, and the transliterations have to come before the other
+    transforms.
+    """
+
+    def __init__(self, init_transforms, placeholder_regex=None):
+        """
+        Initializer for class.
+
+        :param init_transforms: List of transforms to apply, in order.
+        :param placeholder_regex: Overwrite what is considered a placeholder and skips transliteration.  See
+                                  CompiledPipeline.
+        :raises ValueError: If a transform is not supported, or a transliteration comes after another transform.
+        :raises ImportError: If NumPy is not installed.
+        """
+        self.np = np = _import_numpy()
+        self.pipeline = CompiledPipeline(init_transforms, placeholder_regex)
+        self.tokenizer = self.pipeline.tokenizer
+
+        has_transliterations = False
+        self._tail_steps = []
+        for munge in self.pipeline.transforms:
+            if munge in transforms.translation_tables:
+                if self._tail_steps:
+                    raise ValueError(
+                        "Transliteration {} has to come before the other transforms.".format(
+                            munge.__name__
+                        )
+                    )
+                has_transliterations = True
+            elif munge is transforms.pad_length or munge in transforms.bracket_pairs:
+                self._tail_steps.append(munge)
+            else:
+                raise ValueError(
+                    "Transform {} is not supported by the vectorized backend.".format(
+                        getattr(munge, "__name__", repr(munge))
+                    )
+                )
+
+        # Lookup table mapping every code point, built from the translation table the compiled pipeline merged the
+        # transliterations into.
+        self._lut = None
+        if has_transliterations:
+            table = self.pipeline._steps[0].table
+            self._lut = np.arange(sys.maxunicode + 1, dtype=np.uint32)
+            self._lut[list(table)] = list(table.values())
+        self._padding = "".join(transforms.padding_chars)
+
+    @property
+    def transforms(self):
+        return self.pipeline.transforms
+
+    @property
+    def fingerprint(self):
+        return self.pipeline.fingerprint
+
+    def pseudolocalize(self, s):
+        """
+        Performs pseudo-localization on a single string, with CompiledPipeline.pseudolocalize().
+        """
+        return self.pipeline.pseudolocalize(s)
+
+    def pseudolocalize_many(self, strings):
+        """
+        Performs pseudo-localization on a batch of strings in a few vectorized passes.
+
+        :param strings: Iterable of strings (e.g. a list or a generator), or a dict whose values are strings.  None is
+                        treated as an empty string.
+        :returns: The pseudo-localized strings in input order, as a list.  If strings is a dict, a new dict with the
+                  same keys and the pseudo-localized values is returned instead.
+        """
+        if isinstance(strings, dict):
+            return dict(zip(strings, self.pseudolocalize_many(list(strings.values()))))
+        strings = list(strings)
+        try:
+            joined = "".join(strings)
+        except TypeError:
+            strings = ["" if s is None else s for s in strings]
+            for s in strings:
+                if not isinstance(s, str):
+                    raise TypeError(
+                        "String to pseudo-localize must be of type '{}'.".format(
+                            str.__name__
+                        )
+                    )
+            joined = "".join(strings)
+        if not self.transforms:
+            return strings
+
+        np = self.np
+        lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+        ends = np.cumsum(lengths)
+        if self._lut is None:
+            body = joined
+        else:
+            codes = _codes(np, joined)
+            translated = self._lut[codes]
+            placeholders = self._placeholder_mask(strings, len(codes), ends - lengths)
+            if placeholders is not None:
+                translated[placeholders] = codes[placeholders]
+            body = translated.tobytes().decode("utf-32-le", "surrogatepass")
+        results = [
+            body[end - length : end]
+            for end, length in zip(ends.tolist(), lengths.tolist())
+        ]
+
+        # The other transforms only add characters around each string, their lengths are computed for the whole
+        # batch at once.
+        prefix = ""
+        for munge in self._tail_steps:
+            if munge is transforms.pad_length:
+                extra = self._padding_lengths(lengths)
+                lengths = lengths + extra
+                padding = self._padding * (
+                    int(extra.max(initial=0)) // len(self._padding) + 1
+                )
+                results = [s + padding[:n] for s, n in zip(results, extra.tolist())]
+            else:
+                before, after = transforms.bracket_pairs[munge]
+                prefix = before + prefix
+                lengths = lengths + (lengths > 0) * (len(before) + len(after))
+                results = [s + after if s else s for s in results]
+        if prefix:
+            results = [prefix + s if s else s for s in results]
+        return results
+
+    def _placeholder_mask(self, strings, size, starts):
+        """
+        Returns a boolean array which is True for the code points of the batch that are part of a placeholder, or None
+        if there are no placeholders.  Only the strings containing a character a placeholder can start with are
+        tokenized.
+        """
+        np = self.np
+        tokenize = self.tokenizer.tokenize
+        first_chars = self.tokenizer._first_chars
+        if first_chars is None:
+            candidates = range(len(strings))
+        else:
+            isdisjoint = first_chars.isdisjoint
+            candidates = [i for i, s in enumerate(strings) if not isdisjoint(s)]
+
+        # Lengths of the spans of all of the strings with placeholders, one string after the other.
+        span_lengths = []
+        span_counts = []
+        owners = []
+        for index in candidates:
+            spans = tokenize(strings[index])
+            if len(spans) > 1:
+                span_lengths.extend(map(len, spans))
+                span_counts.append(len(spans))
+                owners.append(index)
+        if not owners:
+            return None
+        span_lengths = np.array(span_lengths, dtype=np.int64)
+        span_counts = np.array(span_counts, dtype=np.int64)
+        # Offset of each span in the batch, and its index among the spans of its string.
+        first_span = np.cumsum(span_counts) - span_counts
+        span_index = np.arange(len(span_lengths)) - np.repeat(first_span, span_counts)
+        span_starts = np.cumsum(span_lengths) - span_lengths
+        span_starts += np.repeat(starts[owners] - span_starts[first_span], span_counts)
+        placeholders = (span_index % 2 == 1) & (span_lengths > 0)
+        # +1 where each placeholder starts and -1 where it ends, so that the running sum is 1 inside placeholders.
+        edges = np.bincount(
+            span_starts[placeholders], minlength=size + 1
+        ) - np.bincount((span_starts + span_lengths)[placeholders], minlength=size + 1)
+        return np.cumsum(edges[:-1]) > 0
+
+    def _padding_lengths(self, lengths):
+        """
+        Returns the number of characters pad_length adds to strings of the given lengths.
+        """
+        np = self.np
+        factors = np.select(
+            [lengths <= max_size for max_size, _ in transforms._target_lengths],
+            [factor for _, factor in transforms._target_lengths],
+            1.3,
+        )
+        targets = np.ceil(lengths * factors).astype(np.int64)
+        targets[lengths < 1] = 0
+        return targets - lengths
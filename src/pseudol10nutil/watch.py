@@ -0,0 +1,452 @@
+"""
+Watch mode: keeps the pseudo-localized copy of a tree of message catalogs up to date while they are edited.
+
+A CatalogWatcher monitors the source tree with inotify on Linux, or by polling the modification times of the catalogs
+elsewhere.  Bursts of changes (an editor saving several files, a build step rewriting the whole tree) are debounced
+into a single update, and only the catalogs whose content actually changed are pseudo-localized again.  Each
+catalog is split into entries the way POFileUtil splits catalogs into shards, and the pseudo-localized text of every
+entry is kept in memory, so an edit only costs parsing, transforming and formatting the entries that changed, plus
+writing the catalogs it touched.  The output is the same as pseudolocalizefile()'s.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import fnmatch
+import hashlib
+import os
+import os.path
+import select
+import struct
+import time
+
+from .pseudol10nutil import (
+    CatalogResult,
+    POFileUtil,
+    PseudoL10nUtil,
+    _catalog_jobs,
+    _output_filename,
+    _pseudolocalize_catalog,
+)
+
+# inotify(7) event masks.
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+)
+_EVENT = struct.Struct("iIII")
+
+# Default number of pseudo-localized strings kept in memory between updates, for entries which changed but kept some
+# of their strings.
+CACHE_SIZE = 1 << 16
+
+
+def _libc():
+    """
+    Returns the C library if it has the inotify functions, or None.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyMonitor:
+    """
+    Monitors the files of a directory tree with inotify, through ctypes.  Subdirectories created later are watched
+    too.  Linux only.
+    """
+
+    def __init__(self, root):
+        """
+        Initializer for class.
+
+        :param root: Directory to monitor.
+        :raises OSError: If inotify is not available, or the directory can't be watched.
+        """
+        self._libc = _libc()
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self._paths = {}  # Directory of each watch descriptor
+        self._overflow = False
+        self._add_tree(root)
+
+    def _add_tree(self, root):
+        """
+        Watches a directory and its subdirectories.
+
+        :returns: Set of the paths of the files already in them, which may have been written before they were watched.
+        """
+        files = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(dirpath), _WATCH_MASK
+            )
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOENT:  # Removed in the meantime
+                    continue
+                raise OSError(error, "inotify_add_watch failed", dirpath)
+            self._paths[wd] = dirpath
+            files.update(os.path.join(dirpath, f) for f in filenames)
+        return files
+
+    def _remove_tree(self, root):
+        prefix = os.path.join(root, "")
+        for wd, path in list(self._paths.items()):
+            if path == root or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._paths[wd]
+
+    def wait(self, timeout=None):
+        """
+        Waits for changes.
+
+        :param timeout: Maximum number of seconds to wait, or None to wait until something changes.
+        :returns: Set of the paths of the files created, modified, moved or removed, or None if events were lost, in
+                  which case any file may have changed.  Empty if nothing changed before the timeout.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    self._overflow = True
+                    continue
+                if mask & _IN_IGNORED:
+                    self._paths.pop(wd, None)
+                    continue
+                directory = self._paths.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        changed.update(self._add_tree(path))
+                    elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                        # The catalogs in the directory are gone from the tree.  A directory moved elsewhere keeps
+                        # its watches, which would report its files under their old path.
+                        changed.add(path + os.sep)
+                        self._remove_tree(path)
+                elif not mask & _IN_CREATE:  # Created files are reported once written
+                    changed.add(path)
+        if self._overflow:
+            self._overflow = False
+            return None
+        return changed
+
+    def close(self):
+        """
+        Stops monitoring.
+        """
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingMonitor:
+    """
+    Monitors the files of a directory tree by comparing their modification times and sizes at regular intervals.
+    Works everywhere, but each check walks the whole tree.
+    """
+
+    def __init__(self, root, interval=0.5):
+        """
+        Initializer for class.
+
+        :param root: Directory to monitor.
+        :param interval: Number of seconds between two checks.
+        """
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """
+        Waits for changes.  See InotifyMonitor.wait().
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if changed or (remaining is not None and remaining <= 0):
+                return changed
+            time.sleep(
+                self.interval if remaining is None else min(self.interval, remaining)
+            )
+
+    def close(self):
+        """
+        Stops monitoring.
+        """
+
+
+class _EntryCache:
+    """
+    Executor for POFileUtil.pseudolocalizefile() running the shards of a catalog in the current process, reusing the
+    results of the shards that are the same as in the previous run.  Only the results of the last run are kept.
+    """
+
+    def __init__(self):
+        self._results = {}
+
+    def map(self, fn, shards, starts):
+        results = {}
+        for shard, start in zip(shards, starts):
+            key = (shard, start == 0)  # Only the first shard holds the header
+            try:
+                result = self._results[key]
+            except KeyError:
+                result = fn(shard, start)
+            results[key] = result
+            yield result
+        self._results = results
+
+
+class CatalogWatcher:
+    """
+    Class for keeping the pseudo-localized copy of a tree of message catalogs up to date.  Call sync() to pseudo-localize
+    the catalogs that changed since the last update (all of them the first time), then poll() or run() to wait for
+    changes and update the affected catalogs.
+    """
+
+    def __init__(
+        self,
+        src_root,
+        dst_root,
+        pofileutil=None,
+        patterns=("*.po",),
+        debounce=0.05,
+        backend=None,
+        poll_interval=0.5,
+        cache_size=CACHE_SIZE,
+    ):
+        """
+        Initializer for class.
+
+        :param src_root: Root directory of the message catalogs to watch.
+        :param dst_root: Root directory for the pseudo-localized catalogs, as in POFileUtil.pseudolocalize_tree().
+                         Catalogs under dst_root are ignored, so it may be inside src_root.
+        :param pofileutil: Optional instance of POFileUtil whose transforms (and statistics and store, if any) are
+                           used.
+        :param patterns: Filename patterns of the message catalogs to watch.
+        :param debounce: Number of seconds without any further change to wait for before updating the catalogs.
+        :param backend: "inotify", "poll", or None to use inotify where available and polling otherwise.
+        :param poll_interval: Number of seconds between two checks of the polling backend.
+        :param cache_size: Maximum number of pseudo-localized strings to keep in memory between updates, besides the
+                           pseudo-localized entries of each catalog.
+        :raises ValueError: If the backend is unknown.
+        :raises OSError: If src_root doesn't exist, or the inotify backend isn't available.
+        """
+        if backend not in (None, "inotify", "poll"):
+            raise ValueError("Unknown watch backend: {}".format(backend))
+        if not os.path.isdir(src_root):
+            raise OSError(
+                "Source directory not found: {}".format(os.path.abspath(src_root))
+            )
+        self.src_root = src_root
+        self.dst_root = dst_root
+        self.patterns = tuple(patterns)
+        self.debounce = debounce
+        util = (pofileutil or POFileUtil()).l10nutil
+        # A copy of the engine with a result cache, so that unchanged strings are not pseudo-localized again.
+        self.pofileutil = POFileUtil(
+            PseudoL10nUtil(
+                util.transforms,
+                util.placeholder_regex,
+                cache_size,
+                getattr(util, "stats", None),
+                getattr(util, "store", None),
+            )
+        )
+        self.pofileutil.shard_size = 1  # One shard per entry
+        self._entry_caches = {}
+        # Digest of the content of each catalog last pseudo-localized
+        self._digests = {}
+        self._dst_root = os.path.join(os.path.abspath(dst_root), "")
+        if backend is None:
+            backend = "inotify" if _libc() is not None else "poll"
+        if backend == "inotify":
+            self.monitor = InotifyMonitor(src_root)
+        else:
+            self.monitor = PollingMonitor(src_root, poll_interval)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _is_catalog(self, path):
+        return any(
+            fnmatch.fnmatch(os.path.basename(path), p) for p in self.patterns
+        ) and not os.path.abspath(path).startswith(self._dst_root)
+
+    def sync(self):
+        """
+        Pseudo-localizes the catalogs that changed since the last update, all of them the first time, and removes the
+        output of catalogs that were removed.
+
+        :returns: List of CatalogResult named tuples of the catalogs pseudo-localized, see
+                  POFileUtil.pseudolocalize_tree().  Removed catalogs have an output_filename of None, and their
+                  removed outputs as changed.
+        """
+        paths = {
+            i
+            for i, _ in _catalog_jobs(self.src_root, self.dst_root, self.patterns)
+            if self._is_catalog(i)
+        }
+        return self._update(paths | set(self._digests))
+
+    def poll(self, timeout=None):
+        """
+        Waits for changes to the catalogs, then pseudo-localizes the ones that changed.
+
+        :param timeout: Maximum number of seconds to wait for a change, or None to wait until a catalog changes.
+        :returns: List of CatalogResult named tuples of the catalogs updated, see sync().  Empty if no catalog changed
+                  before the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = (
+                None if deadline is None else max(deadline - time.monotonic(), 0)
+            )
+            changed = self.monitor.wait(remaining)
+            if changed is None:
+                return self.sync()
+            # Wait for the end of the burst.
+            while changed:
+                more = self.monitor.wait(self.debounce)
+                if more is None:
+                    return self.sync()
+                if not more:
+                    break
+                changed |= more
+            results = self._update(self._expand(changed))
+            if results or (deadline is not None and time.monotonic() >= deadline):
+                return results
+
+    def _expand(self, changed):
+        """
+        Returns the catalogs among the changed paths, including the known catalogs under removed directories (ending
+        with a separator).
+        """
+        paths = set()
+        for path in changed:
+            if path.endswith(os.sep):
+                paths.update(p for p in self._digests if p.startswith(path))
+            elif self._is_catalog(path):
+                paths.add(path)
+        return paths
+
+    def _update(self, paths):
+        results = []
+        for input_filename in sorted(paths):
+            output_filename = _output_filename(
+                input_filename, self.src_root, self.dst_root
+            )
+            try:
+                with open(input_filename, "rb") as fileobj:
+                    digest = hashlib.blake2b(fileobj.read()).digest()
+            except FileNotFoundError:
+                self._entry_caches.pop(input_filename, None)
+                if self._digests.pop(input_filename, None) is not None:
+                    removed = {}
+                    for filename in (
+                        output_filename,
+                        os.path.splitext(output_filename)[0] + ".mo",
+                    ):
+                        if os.path.isfile(filename):
+                            os.remove(filename)
+                            removed[filename] = True
+                    results.append(
+                        CatalogResult(input_filename, None, 0.0, None, removed)
+                    )
+                continue
+            except OSError:
+                digest = None  # Reported by pseudolocalizefile()
+            if digest is not None and self._digests.get(input_filename) == digest:
+                continue  # e.g. saved without changes
+            entry_cache = self._entry_caches.setdefault(input_filename, _EntryCache())
+            result = _pseudolocalize_catalog(
+                self.pofileutil,
+                input_filename,
+                output_filename,
+                True,
+                executor=entry_cache,
+            )
+            if result.error is None:
+                self._digests[input_filename] = digest
+            results.append(result)
+        return results
+
+    def run(self, callback=None, stop=None):
+        """
+        Pseudo-localizes the catalogs that changed since the last update, then keeps updating them as they change.
+
+        :param callback: Optional callable called with the list of CatalogResult named tuples of each update.
+        :param stop: Optional threading.Event to set to stop watching.  Otherwise, runs until interrupted.
+        """
+        results = self.sync()
+        while True:
+            if results and callback is not None:
+                callback(results)
+            if stop is not None and stop.is_set():
+                return
+            results = self.poll(None if stop is None else 0.2)
+
+    def close(self):
+        """
+        Stops monitoring the source tree.
+        """
+        self.monitor.close()
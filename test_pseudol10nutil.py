@@ -1,10 +1,240 @@
 # -*- coding: utf-8 -*-
 
+import builtins
+import concurrent.futures
 import filecmp
+import functools
+import gettext
+import io
+import json
+import math
 import os.path
+import pickle
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
 import unittest
+import unittest.mock
+import xml.etree.ElementTree
 
-from pseudol10nutil import POFileUtil, PseudoL10nUtil, transforms
+import polib
+
+from pseudol10nutil import (
+    CompiledPipeline,
+    POFileUtil,
+    PseudoL10nUtil,
+    PseudoTranslations,
+    mofile,
+    postream,
+    transforms,
+)
+from pseudol10nutil.atomicfile import AtomicFile, write_file
+from pseudol10nutil.cli import main as cli_main
+from pseudol10nutil.extract import extract_file, extract_files, parse_keyword
+from pseudol10nutil.formats import (
+    AndroidFileUtil,
+    JSONFileUtil,
+    PropertiesFileUtil,
+    ResourceFileUtil,
+    XLIFFFileUtil,
+    _XMLFileUtil,
+    get_file_util,
+)
+from pseudol10nutil.pseudol10nutil import DEFAULT_PLACEHOLDER_REGEX
+from pseudol10nutil.stats import PHASES, Stats
+from pseudol10nutil.store import PersistentStore
+from pseudol10nutil.tokenizer import (
+    ANDROID_ESCAPE,
+    DEFAULT_GRAMMARS,
+    DEFAULT_TOKENIZER,
+    HTML,
+    ICU_MESSAGE_FORMAT,
+    JAVA_MESSAGE_FORMAT,
+    PRINTF,
+    QT,
+    XML_MARKUP,
+    Tokenizer,
+)
+from pseudol10nutil.vectorized import VectorizedPipeline
+from pseudol10nutil.watch import CatalogWatcher, _libc
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def reference_pseudolocalize(s, munges, fmt_spec=DEFAULT_PLACEHOLDER_REGEX):
+    """
+    The original, uncompiled pseudo-localization loop.  Used as the reference for differential tests.
+    """
+    if not s:
+        return ""
+    if not munges:
+        return s
+    if not fmt_spec.search(s):
+        result = s
+        for munge in munges:
+            result = munge(result, fmt_spec)
+    else:
+        substrings = fmt_spec.split(s)
+        for munge in munges:
+            if munge in transforms.transliterations:
+                for idx in range(len(substrings)):
+                    if not fmt_spec.match(substrings[idx]):
+                        substrings[idx] = munge(substrings[idx], fmt_spec)
+        result = "".join(substrings)
+        for munge in munges:
+            if munge not in transforms.transliterations:
+                result = munge(result, fmt_spec)
+    return result
+
+
+def reference_expand_vowels(s, fmt_spec):
+    """
+    The original implementation of transforms.expand_vowels().  Used as the reference for differential tests.
+    """
+    vowels = ["aeiouAEIOU"]
+    for munge in transforms.transliterations:
+        vowels.append(munge(vowels[0], fmt_spec))
+    vowels = "".join(vowels)
+
+    substrings = fmt_spec.split(s)
+    length_without_placeholders = 0
+    total_vowels = 0
+    for i in range(len(substrings)):
+        if not fmt_spec.match(substrings[i]):
+            length_without_placeholders += len(substrings[i])
+            total_vowels += sum([substrings[i].count(v) for v in vowels])
+
+    target_length = getattr(transforms, "__get_target_length")(
+        length_without_placeholders
+    )
+    diff = target_length - length_without_placeholders
+
+    if total_vowels == 0:
+        return s + s[-1] * diff
+
+    for i in range(len(substrings)):
+        if not fmt_spec.match(substrings[i]):
+            new_substring = []
+            for c in substrings[i]:
+                if c in vowels and total_vowels > 0:
+                    next_vowel_addition = math.floor(diff / total_vowels)
+                    new_substring.append(c * (next_vowel_addition + 1))
+                    total_vowels -= 1
+                    diff -= next_vowel_addition
+                else:
+                    new_substring.append(c)
+            substrings[i] = "".join(new_substring)
+    return "".join(substrings)
+
+
+def random_corpus(seed, count):
+    """
+    Generates a reproducible list of strings mixing words, digits and placeholders.
+    """
+    rng = random.Random(seed)
+    pieces = [
+        "The",
+        "quick",
+        "brown",
+        "fox",
+        "jumps",
+        "over",
+        "lazy",
+        "dog",
+        "Row",
+        "jmpng",
+        "42",
+        "Șøüȓċê",
+        "{0}",
+        "{name}",
+        "%s",
+        "%d",
+        "%(count)d",
+        "%%",
+        "<b>",
+        "</b>",
+        "\\n",
+        "100%",
+        "{",
+        "<",
+        "\n",
+    ]
+    return [
+        rng.choice(["", " "]).join(
+            rng.choice(pieces) for _ in range(rng.randint(0, 12))
+        )
+        for _ in range(count)
+    ]
+
+
+counted_strings = []
+
+
+def counting_brackets(s, fmt_spec):
+    """
+    Transform recording every string it is applied to, for checking which strings were pseudo-localized.
+    """
+    counted_strings.append(s)
+    return transforms.simple_square_brackets(s, fmt_spec)
+
+
+def edited_brackets(s, fmt_spec):
+    """
+    Stands for counting_brackets after an edit to its code, for checking that stored results are then discarded.
+    """
+    counted_strings.append(s)
+    return "⟦{}⟧".format(s)
+
+
+edited_brackets.__name__ = edited_brackets.__qualname__ = "counting_brackets"
+
+
+def make_prefix(prefix):
+    return lambda s, fmt_spec: prefix + s
+
+
+COMPLEX_CATALOG = r"""# Translation header
+# Copyright (C) YEAR ORGANIZATION
+#
+#, fuzzy
+msgid ""
+msgstr ""
+"Project-Id-Version: PACKAGE VERSION\n"
+"Content-Type: text/plain; charset=UTF-8\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\n"
+"X-Custom: foo\n"
+
+# Translator comment
+#. Extracted comment
+#: a.py:1 b.py:22 c-d.py
+#, python-format
+msgctxt "menu"
+msgid "Open %(name)s"
+msgstr ""
+
+#| msgid "Old text"
+msgid "A very long string that needs to be wrapped since it is longer than seventy-eight characters"
+msgstr ""
+
+msgid ""
+"Multiple\n"
+"lines {0}\n"
+msgstr ""
+
+msgid "One file"
+msgid_plural "%d files"
+msgstr[0] ""
+msgstr[1] ""
+
+#~ msgid "Obsolete"
+#~ msgstr "Old"
+"""
 
 
 class TestPOFileUtil(unittest.TestCase):
@@ -20,6 +250,302 @@ class TestPOFileUtil(unittest.TestCase):
         self.assertTrue(filecmp.cmp(expected_file, generated_file))
         os.remove(generated_file)
 
+    def test_generate_pseudolocalized_po_streaming(self):
+        input_file = "./testdata/locales/helloworld.pot"
+        expected_file = "./testdata/locales/eo/LC_MESSAGES/helloworld.po"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generated_file = os.path.join(tmpdir, "helloworld.po")
+            self.pofileutil.pseudolocalizefile(
+                input_file, generated_file, streaming=True
+            )
+            self.assertTrue(filecmp.cmp(expected_file, generated_file))
+            self.assertFalse(os.path.exists(os.path.join(tmpdir, "helloworld.mo")))
+
+    def test_streaming_matches_polib(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_file = os.path.join(tmpdir, "input.po")
+            with open(input_file, "w", encoding="utf-8") as fileobj:
+                fileobj.write(COMPLEX_CATALOG)
+            polib_file = os.path.join(tmpdir, "polib.po")
+            streaming_file = os.path.join(tmpdir, "streaming.po")
+            self.pofileutil.pseudolocalizefile(input_file, polib_file)
+            self.pofileutil.pseudolocalizefile(
+                input_file, streaming_file, streaming=True
+            )
+            self.assertTrue(filecmp.cmp(polib_file, streaming_file, shallow=False))
+
+    def test_mo_matches_polib(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_file = os.path.join(tmpdir, "input.po")
+            with open(input_file, "w", encoding="utf-8") as fileobj:
+                fileobj.write(COMPLEX_CATALOG)
+            output_file = os.path.join(tmpdir, "output.catalog")
+            self.pofileutil.pseudolocalizefile(input_file, output_file)
+            with open(os.path.join(tmpdir, "output.mo"), "rb") as fileobj:
+                self.assertEqual(polib.pofile(output_file).to_binary(), fileobj.read())
+
+            streaming_mo = os.path.join(tmpdir, "streaming.mo")
+            self.pofileutil.pseudolocalizefile(
+                input_file, None, streaming=True, mo_filename=streaming_mo
+            )
+            self.assertTrue(
+                filecmp.cmp(
+                    os.path.join(tmpdir, "output.mo"), streaming_mo, shallow=False
+                )
+            )
+
+    def test_read_mo_entries(self):
+        po_file = polib.pofile(COMPLEX_CATALOG)
+        for entry in po_file:
+            if entry.msgid_plural:
+                entry.msgstr_plural = {0: "one", 1: "many"}
+            else:
+                entry.msgstr = self.pofileutil.l10nutil.pseudolocalize(entry.msgid)
+        data = po_file.to_binary()
+        entries = list(mofile.iter_entries(io.BytesIO(data)))
+        self.assertEqual(po_file.metadata_as_entry().msgstr, entries[0].msgstr)
+        with tempfile.NamedTemporaryFile(suffix=".mo", delete=False) as fileobj:
+            fileobj.write(data)
+        try:
+            expected = polib.mofile(fileobj.name)
+        finally:
+            os.remove(fileobj.name)
+        self.assertEqual(
+            [
+                (e.msgctxt, e.msgid, e.msgid_plural, e.msgstr, e.msgstr_plural)
+                for e in expected
+            ],
+            [
+                (e.msgctxt, e.msgid, e.msgid_plural, e.msgstr, e.msgstr_plural)
+                for e in entries[1:]
+            ],
+        )
+        with self.assertRaises(OSError):
+            list(mofile.iter_entries(io.BytesIO(data[:40])))
+
+    def test_decode_lines(self):
+        catalog = COMPLEX_CATALOG.replace("UTF-8", "ISO-8859-1") + (
+            '\nmsgid "Caf\u00e9"\nmsgstr ""\n'
+        )
+        lines = io.BytesIO(catalog.encode("iso-8859-1"))
+        encoding, decoded = postream.decode_lines(lines)
+        self.assertEqual("ISO-8859-1", encoding)
+        self.assertEqual(catalog, "".join(decoded))
+
+    def test_po_only_and_mo_only(self):
+        input_file = "./testdata/locales/helloworld.pot"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            po_file = os.path.join(tmpdir, "po_only.po")
+            self.pofileutil.pseudolocalizefile(input_file, po_file, write_mo=False)
+            self.assertEqual(["po_only.po"], os.listdir(tmpdir))
+            os.remove(po_file)
+
+            mo_file = os.path.join(tmpdir, "mo_only.mo")
+            self.pofileutil.pseudolocalizefile(input_file, None, mo_filename=mo_file)
+            self.assertEqual(["mo_only.mo"], os.listdir(tmpdir))
+            self.assertEqual(
+                "⟦Ȟêĺĺø {0}!﹎ЍאǆᾏⅧ㈴㋹퓛ﺏ𝟘🚦﹎ЍאǆᾏⅧ㈴㋹⟧",
+                polib.mofile(mo_file).find("Hello {0}!").msgstr,
+            )
+            self.assertRaises(
+                ValueError,
+                self.pofileutil.pseudolocalizefile,
+                input_file,
+                None,
+                write_mo=False,
+            )
+
+    def test_streaming_syntax_error(self):
+        lines = ['msgid "a"\n', 'msgstr "b"\n', "bogus line\n"]
+        self.assertRaises(OSError, "".join, self.pofileutil.pseudolocalizelines(lines))
+
+    def test_incremental(self):
+        util = PseudoL10nUtil([transforms.transliterate_diacritic, counting_brackets])
+        pofileutil = POFileUtil(util)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_file = os.path.join(tmpdir, "input.po")
+            output_file = os.path.join(tmpdir, "output.po")
+            full_file = os.path.join(tmpdir, "full.po")
+            with open(input_file, "w", encoding="utf-8") as fileobj:
+                fileobj.write(COMPLEX_CATALOG)
+            del counted_strings[:]
+            pofileutil.pseudolocalizefile(input_file, output_file, incremental=True)
+            self.assertEqual(6, len(counted_strings))
+            self.assertTrue(os.path.isfile(output_file + ".manifest.json"))
+
+            with open(input_file, "w", encoding="utf-8") as fileobj:
+                fileobj.write(
+                    COMPLEX_CATALOG.replace("Open %(name)s", "Close %(name)s").replace(
+                        '#~ msgid "Obsolete"\n#~ msgstr "Old"\n', ""
+                    )
+                )
+            del counted_strings[:]
+            pofileutil.pseudolocalizefile(input_file, output_file, incremental=True)
+            self.assertEqual(["Ċĺøšê %(name)s"], counted_strings)
+            pofileutil.pseudolocalizefile(input_file, full_file)
+            self.assertTrue(filecmp.cmp(full_file, output_file, shallow=False))
+
+            # A different pipeline invalidates the manifest.
+            util.transforms = [transforms.transliterate_circled, counting_brackets]
+            del counted_strings[:]
+            pofileutil.pseudolocalizefile(input_file, output_file, incremental=True)
+            self.assertEqual(5, len(counted_strings))
+
+            # So do an edited transform of the same name, an edited table it reads and an upgrade of the package.
+            util.transforms = [transforms.transliterate_circled, edited_brackets]
+            del counted_strings[:]
+            pofileutil.pseudolocalizefile(input_file, output_file, incremental=True)
+            self.assertEqual(5, len(counted_strings))
+            with open(output_file, encoding="utf-8") as fileobj:
+                self.assertIn('msgstr "⟦Ⓒⓛⓞⓢⓔ %(name)s⟧"', fileobj.read())
+            with unittest.mock.patch.dict(transforms.circled_table, {ord("C"): "C"}):
+                del counted_strings[:]
+                POFileUtil(PseudoL10nUtil(util.transforms)).pseudolocalizefile(
+                    input_file, output_file, incremental=True
+                )
+                self.assertEqual(5, len(counted_strings))
+            with open(output_file, encoding="utf-8") as fileobj:
+                self.assertIn('msgstr "⟦Cⓛⓞⓢⓔ %(name)s⟧"', fileobj.read())
+            with unittest.mock.patch("pseudol10nutil.__version__", "0.0.0"):
+                del counted_strings[:]
+                POFileUtil(PseudoL10nUtil(util.transforms)).pseudolocalizefile(
+                    input_file, output_file, incremental=True
+                )
+                self.assertEqual(5, len(counted_strings))
+
+            # Transforms without a stable name can't be recorded.
+            util.transforms = [make_prefix("A:"), edited_brackets]
+            with open(output_file + ".manifest.json", "rb") as fileobj:
+                manifest = fileobj.read()
+            for _ in range(2):
+                del counted_strings[:]
+                pofileutil.pseudolocalizefile(input_file, output_file, incremental=True)
+                self.assertEqual(5, len(counted_strings))
+            with open(output_file + ".manifest.json", "rb") as fileobj:
+                self.assertEqual(manifest, fileobj.read())
+
+    def test_incremental_streaming(self):
+        self.assertRaises(
+            ValueError,
+            self.pofileutil.pseudolocalizefile,
+            "./testdata/locales/helloworld.pot",
+            "helloworld.po",
+            streaming=True,
+            incremental=True,
+        )
+
+    def test_sharded_matches_serial(self):
+        catalog = COMPLEX_CATALOG.replace(
+            "\n# Translator comment",
+            '\n#~ msgid "Obsolete in the middle"\n#~ msgstr ""\n\n# Translator comment',
+        ) + "".join(
+            '\n# Comment {0}\n\nmsgid "String {0}"\nmsgstr ""\n"{0}"\n'.format(index)
+            for index in range(20)
+        )
+        self.pofileutil.shard_size = 1  # Cut between every two entries
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_file = os.path.join(tmpdir, "input.po")
+            with open(input_file, "w", encoding="utf-8") as fileobj:
+                fileobj.write(catalog)
+            serial_file = os.path.join(tmpdir, "serial.po")
+            self.pofileutil.pseudolocalizefile(input_file, serial_file)
+
+            shards = []
+
+            class Executor:
+                def map(self, fn, *iterables):
+                    shards.extend(iterables[0])
+                    return map(fn, *iterables)
+
+            for name, kwargs in [
+                ("processes", {"workers": 2}),
+                ("executor", {"executor": Executor()}),
+            ]:
+                output_file = os.path.join(tmpdir, name + ".po")
+                self.pofileutil.pseudolocalizefile(input_file, output_file, **kwargs)
+                for ext in [".po", ".mo"]:
+                    self.assertTrue(
+                        filecmp.cmp(
+                            serial_file[:-3] + ext,
+                            output_file[:-3] + ext,
+                            shallow=False,
+                        )
+                    )
+            self.assertEqual(catalog, "".join(shards))
+            self.assertGreater(len(shards), 20)
+
+    def test_sharded_fallback_and_errors(self):
+        # polib takes the first entry with an empty msgid for the metadata, wherever it is, so such catalogs are
+        # processed serially.
+        catalog = COMPLEX_CATALOG + '\nmsgctxt "context"\nmsgid ""\nmsgstr ""\n'
+        self.pofileutil.shard_size = 1
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_file = os.path.join(tmpdir, "input.po")
+            with open(input_file, "w", encoding="utf-8") as fileobj:
+                fileobj.write(catalog)
+            serial_file = os.path.join(tmpdir, "serial.po")
+            sharded_file = os.path.join(tmpdir, "sharded.po")
+            self.pofileutil.pseudolocalizefile(input_file, serial_file)
+            self.pofileutil.pseudolocalizefile(input_file, sharded_file, workers=2)
+            self.assertTrue(filecmp.cmp(serial_file, sharded_file, shallow=False))
+
+            with open(input_file, "w", encoding="utf-8") as fileobj:
+                fileobj.write(COMPLEX_CATALOG + "bogus line\n")
+            with self.assertRaisesRegex(OSError, r"\(line 36\)"):
+                self.pofileutil.pseudolocalizefile(input_file, sharded_file, workers=2)
+            self.assertRaises(
+                ValueError,
+                self.pofileutil.pseudolocalizefile,
+                input_file,
+                sharded_file,
+                streaming=True,
+                workers=2,
+            )
+
+    def test_pseudolocalize_tree(self):
+        expected_file = "./testdata/locales/eo/LC_MESSAGES/helloworld.po"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src_root = os.path.join(tmpdir, "src")
+            for locale in ["de", "eo", "fr"]:
+                os.makedirs(os.path.join(src_root, locale, "LC_MESSAGES"))
+                shutil.copy(
+                    "./testdata/locales/helloworld.pot",
+                    os.path.join(src_root, locale, "LC_MESSAGES", "helloworld.po"),
+                )
+            broken_file = os.path.join(src_root, "fr", "LC_MESSAGES", "broken.po")
+            with open(broken_file, "w") as fileobj:
+                fileobj.write('msgid "a"\nmsgstr "b"\nbogus line\n')
+            for workers in [1, 2]:
+                dst_root = os.path.join(tmpdir, "dst{}".format(workers))
+                results = self.pofileutil.pseudolocalize_tree(
+                    src_root, dst_root, workers=workers
+                )
+                self.assertEqual(4, len(results))
+                failed = [r for r in results if r.error]
+                self.assertEqual([broken_file], [r.input_filename for r in failed])
+                for result in results:
+                    self.assertGreaterEqual(result.seconds, 0)
+                    if not result.error:
+                        self.assertTrue(
+                            filecmp.cmp(expected_file, result.output_filename)
+                        )
+                        self.assertTrue(
+                            os.path.isfile(result.output_filename[:-2] + "mo")
+                        )
+                self.assertTrue(
+                    os.path.isfile(
+                        os.path.join(dst_root, "de", "LC_MESSAGES", "helloworld.po")
+                    )
+                )
+            for workers in [0, -2]:
+                self.assertRaises(
+                    ValueError,
+                    self.pofileutil.pseudolocalize_tree,
+                    src_root,
+                    dst_root,
+                    workers=workers,
+                )
+
 
 class TestPseudoL10nUtil(unittest.TestCase):
     def setUp(self):
@@ -163,6 +689,1479 @@ class TestPseudoL10nUtil(unittest.TestCase):
         self.util.transforms = [transforms.expand_vowels]
         self.assertEqual(expected, self.util.pseudolocalize(test_data_printffmtspec))
 
+    def test_expand_vowels_matches_reference(self):
+        corpus = [s for s in random_corpus(10, 3000) if s]
+        corpus += [s * 12 for s in corpus[:200]]  # Longer than 70 characters
+        corpus += [
+            munge(s, DEFAULT_PLACEHOLDER_REGEX)
+            for munge in transforms.transliterations
+            for s in corpus[:500]
+        ]
+        for fmt_spec, reference_fmt_spec in [
+            (DEFAULT_PLACEHOLDER_REGEX, DEFAULT_PLACEHOLDER_REGEX),
+            (DEFAULT_TOKENIZER, DEFAULT_PLACEHOLDER_REGEX),
+            (re.compile(r"({\w+})"), re.compile(r"({\w+})")),
+        ]:
+            for s in corpus:
+                self.assertEqual(
+                    reference_expand_vowels(s, reference_fmt_spec),
+                    transforms.expand_vowels(s, fmt_spec),
+                    repr(s),
+                )
+
+    def test_pseudolocalize_many(self):
+        strings = ["OK", "Cancel", "Hello {0}", "OK", "", None, "%s saved", "Cancel"]
+        expected = [self.util.pseudolocalize(s) for s in strings]
+        self.assertEqual(expected, self.util.pseudolocalize_many(strings))
+        self.assertEqual(expected, self.util.pseudolocalize_many(iter(strings)))
+        lazy = self.util.pseudolocalize_many((s for s in strings), lazy=True)
+        self.assertFalse(isinstance(lazy, list))
+        self.assertEqual(expected, list(lazy))
+
+    def test_pseudolocalize_many_dict(self):
+        strings = {"ok": "OK", "cancel": "Cancel", "again": "OK"}
+        expected = {k: self.util.pseudolocalize(v) for k, v in strings.items()}
+        self.assertEqual(expected, self.util.pseudolocalize_many(strings))
+
+    def test_pseudolocalize_many_invalid(self):
+        self.assertRaises(TypeError, self.util.pseudolocalize_many, ["OK", b"OK"])
+        self.assertRaises(TypeError, self.util.pseudolocalize_many, ["OK", ["OK"]])
+
+
+class TestPseudoL10nUtilCache(unittest.TestCase):
+    def setUp(self):
+        self.util = PseudoL10nUtil(cache_size=2)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(PseudoL10nUtil().cache_info())
+
+    def test_hits_and_misses(self):
+        expected = PseudoL10nUtil().pseudolocalize("Hello {0}")
+        self.assertEqual(expected, self.util.pseudolocalize("Hello {0}"))
+        self.assertEqual(expected, self.util.pseudolocalize("Hello {0}"))
+        info = self.util.cache_info()
+        self.assertEqual((1, 1, 0, 2, 1), tuple(info))
+
+    def test_eviction(self):
+        for s in ["OK", "Cancel", "OK", "Save", "Cancel"]:
+            self.util.pseudolocalize(s)
+        info = self.util.cache_info()
+        self.assertEqual(1, info.hits)
+        self.assertEqual(4, info.misses)
+        self.assertEqual(2, info.evictions)
+        self.assertEqual(2, info.currsize)
+
+    def test_invalidated_on_reassignment(self):
+        self.util.pseudolocalize("Hello")
+        self.util.transforms = [transforms.transliterate_fullwidth]
+        self.assertEqual(0, self.util.cache_info().currsize)
+        self.assertEqual("Ｈｅｌｌｏ", self.util.pseudolocalize("Hello"))
+        self.util.transforms.append(transforms.curly_brackets)
+        self.assertEqual("❴Ｈｅｌｌｏ❵", self.util.pseudolocalize("Hello"))
+        self.util.placeholder_regex = re.compile(r"(l+)")
+        self.assertEqual(0, self.util.cache_info().currsize)
+        self.assertEqual("❴Ｈｅllｏ❵", self.util.pseudolocalize("Hello"))
+
+    def test_pseudolocalize_many(self):
+        self.assertEqual(
+            PseudoL10nUtil().pseudolocalize_many(["OK", "Cancel", "OK"]),
+            self.util.pseudolocalize_many(["OK", "Cancel", "OK"]),
+        )
+        self.assertEqual(2, self.util.cache_info().misses)
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.stats = Stats([lambda *event: self.events.append(event)])
+        self.util = PseudoL10nUtil(stats=self.stats)
+
+    def test_disabled_by_default(self):
+        pipeline = PseudoL10nUtil().compile()
+        self.assertIsNone(pipeline.stats)
+        # The steps are not wrapped, so nothing is measured.
+        self.assertEqual(
+            [transforms.pad_length, transforms.square_brackets],
+            list(pipeline._steps[1:]),
+        )
+
+    def test_strings(self):
+        strings = ["Hello", "Hello {0}", "", None, "%(count)d files"]
+        self.assertEqual(
+            PseudoL10nUtil().pseudolocalize_many(strings),
+            [self.util.pseudolocalize(s) for s in strings],
+        )
+        self.assertEqual(3, self.stats.strings)
+        self.assertEqual(1, self.stats.fast_path)
+        self.assertEqual(2, self.stats.placeholder_path)
+        self.assertEqual(
+            len("Hello" "Hello {0}" "%(count)d files"), self.stats.characters
+        )
+        stats = self.stats.transforms
+        self.assertEqual(
+            {"transliterate_diacritic", "pad_length", "square_brackets"}, set(stats)
+        )
+        # Transliterations are applied to each text span around the placeholders.
+        self.assertEqual(5, stats["transliterate_diacritic"].calls)
+        self.assertEqual(3, stats["pad_length"].calls)
+        self.assertGreater(stats["pad_length"].seconds, 0)
+
+        self.assertIn(("strings", 1, {"path": "fast"}), self.events)
+        self.assertIn(("characters", 5, {}), self.events)
+        self.assertEqual(
+            11, len([e for e in self.events if e[0] == "transform_seconds"])
+        )
+
+        self.stats.reset()
+        self.assertEqual(0, self.stats.strings)
+        self.assertEqual({}, self.stats.transforms)
+
+    def test_merged_transliterations(self):
+        self.util.transforms = [
+            transforms.transliterate_diacritic,
+            transforms.transliterate_circled,
+        ]
+        self.util.pseudolocalize("Hello")
+        self.assertEqual(
+            ["transliterate_diacritic+transliterate_circled"],
+            list(self.stats.transforms),
+        )
+
+    def test_reassigned(self):
+        self.util.pseudolocalize("Hello")
+        self.util.stats = None
+        self.util.pseudolocalize("Hello")
+        self.assertEqual(1, self.stats.strings)
+
+    def test_pickle(self):
+        pipeline = pickle.loads(pickle.dumps(self.util.compile()))
+        self.assertEqual(self.util.pseudolocalize("Hi"), pipeline.pseudolocalize("Hi"))
+        self.assertEqual(1, pipeline.stats.strings)
+        self.assertEqual([], pipeline.stats.hooks)
+
+    def test_pseudolocalizefile(self):
+        pofileutil = POFileUtil(self.util)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for streaming in (False, True):
+                self.stats.reset()
+                pofileutil.pseudolocalizefile(
+                    "./testdata/locales/helloworld.pot",
+                    os.path.join(tmpdir, "helloworld.po"),
+                    streaming=streaming,
+                    mo_filename=os.path.join(tmpdir, "helloworld.mo"),
+                )
+                self.assertEqual(1, self.stats.catalogs)
+                self.assertEqual(2, self.stats.entries)
+                self.assertEqual(2, self.stats.strings)
+                self.assertEqual(set(PHASES), set(self.stats.phases))
+                for phase in PHASES:
+                    self.assertGreater(self.stats.phases[phase], 0, phase)
+                self.assertGreater(self.stats.entries_per_second, 0)
+                self.assertEqual(
+                    self.stats.entries,
+                    json.loads(json.dumps(self.stats.as_dict()))["entries"],
+                )
+        self.assertIn(
+            ("phase_seconds", self.stats.phases["save_mo"], {"phase": "save_mo"}),
+            self.events,
+        )
+
+    def test_sharded(self):
+        # The statistics of the shards pseudo-localized in worker processes are merged in, those of the shards
+        # pseudo-localized on threads are recorded in place, and neither are counted twice.
+        pofileutil = POFileUtil(self.util)
+        pofileutil.shard_size = 1
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_file = os.path.join(tmpdir, "input.po")
+            with open(input_file, "w", encoding="utf-8") as fileobj:
+                fileobj.write(COMPLEX_CATALOG)
+            output_file = os.path.join(tmpdir, "output.po")
+            pofileutil.pseudolocalizefile(input_file, output_file)
+            expected = self.stats.as_dict()
+            with concurrent.futures.ThreadPoolExecutor(2) as executor:
+                for kwargs in ({"workers": 2}, {"executor": executor}):
+                    self.stats.reset()
+                    del self.events[:]
+                    pofileutil.pseudolocalizefile(input_file, output_file, **kwargs)
+                    counters = self.stats.as_dict()
+                    for name in ("strings", "characters", "fast_path", "entries"):
+                        self.assertEqual(expected[name], counters[name], name)
+                    self.assertEqual(
+                        {
+                            name: value["calls"]
+                            for name, value in expected["transforms"].items()
+                        },
+                        {
+                            name: value["calls"]
+                            for name, value in counters["transforms"].items()
+                        },
+                    )
+                    self.assertEqual(
+                        expected["strings"],
+                        sum(e[1] for e in self.events if e[0] == "strings"),
+                    )
+
+    def test_merge(self):
+        other = Stats()
+        PseudoL10nUtil(stats=other).pseudolocalize_many(["Hello", "Hello {0}"])
+        self.util.pseudolocalize("Hello")
+        self.stats.merge(other.as_dict())
+        self.assertEqual(3, self.stats.strings)
+        self.assertEqual(2, self.stats.fast_path)
+        self.assertEqual(3, self.stats.transforms["pad_length"].calls)
+        self.assertIn(("strings", 1, {"path": "placeholder"}), self.events)
+        self.assertIn(("characters", len("Hello" "Hello {0}"), {}), self.events)
+
+
+class TestPersistentStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "store.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_get_and_put(self):
+        with PersistentStore(self.filename, batch_size=2) as store:
+            other = PersistentStore(self.filename)
+            store.put("fp1", "Open", "[Òƥêñ]")
+            self.assertEqual("[Òƥêñ]", store.get("fp1", "Open"))
+            self.assertIsNone(other.get("fp1", "Open"))  # Not written yet
+            self.assertIsNone(store.get("fp2", "Open"))
+            store.put("fp1", "Close", "[Ċĺøšê]")  # Fills the batch
+            self.assertEqual(
+                {"Open": "[Òƥêñ]", "Close": "[Ċĺøšê]"},
+                other.get_many("fp1", ["Open", "Close", "Save"]),
+            )
+            store.put_many("fp2", [("Open", "⟦Open⟧"), ("Close", "⟦Close⟧")])
+            self.assertEqual("⟦Open⟧", other.get("fp2", "Open"))
+            self.assertEqual((3, 2), other.info()[:2])
+            self.assertEqual(4, other.info().count)
+            other.close()
+
+            copy = pickle.loads(pickle.dumps(store))
+            self.assertEqual("[Ċĺøšê]", copy.get("fp1", "Close"))
+            copy.close()
+            store.clear()
+            self.assertEqual((0, 0), store.info()[-2:])
+
+        with open(self.filename, "w") as fileobj:
+            fileobj.write("not a database" * 100)
+        self.assertRaises(OSError, PersistentStore, self.filename)
+        self.assertRaises(ValueError, PersistentStore, self.filename, max_size=0)
+
+    def test_pseudol10nutil(self):
+        strings = random_corpus(41, 300) + [None, ""]
+        expected = PseudoL10nUtil().pseudolocalize_many(strings)
+        util = PseudoL10nUtil(store=PersistentStore(self.filename))
+        self.assertEqual(expected, util.pseudolocalize_many(strings))
+        self.assertEqual(expected, [util.pseudolocalize(s) for s in strings])
+        self.assertEqual(
+            {"a": expected[0]}, util.pseudolocalize_many({"a": strings[0]})
+        )
+        util.store.close()
+
+        # Another pipeline doesn't get the results of the first one.
+        util = PseudoL10nUtil(
+            [transforms.transliterate_diacritic, counting_brackets],
+            store=PersistentStore(self.filename),
+        )
+        del counted_strings[:]
+        self.assertEqual("[Òƥêñ]", util.pseudolocalize("Open"))
+        self.assertEqual(["Òƥêñ"], counted_strings)
+        util.store.flush()
+        del counted_strings[:]
+        util = PseudoL10nUtil(util.transforms, store=PersistentStore(self.filename))
+        self.assertEqual("[Òƥêñ]", util.pseudolocalize("Open"))
+        self.assertEqual(["[Òƥêñ]"], util.pseudolocalize_many(["Open"]))
+        self.assertEqual([], counted_strings)
+
+    def test_unstable_transforms(self):
+        store = PersistentStore(self.filename)
+        util_a = PseudoL10nUtil([make_prefix("A:")], store=store)
+        util_b = PseudoL10nUtil([make_prefix("B:")], store=store)
+        self.assertEqual("A:hi", util_a.pseudolocalize("hi"))
+        self.assertEqual(["A:hi"], util_a.pseudolocalize_many(["hi"]))
+        self.assertEqual("B:hi", util_b.pseudolocalize("hi"))
+        self.assertEqual(["B:hi"], util_b.pseudolocalize_many(["hi"]))
+        store.flush()
+        self.assertEqual(0, store.info().count)  # Nothing was stored
+        store.close()
+
+    def test_pofileutil(self):
+        util = PseudoL10nUtil(
+            [transforms.transliterate_diacritic, counting_brackets],
+            store=PersistentStore(self.filename),
+        )
+        pofileutil = POFileUtil(util)
+        pofileutil.shard_size = 1
+        input_file = os.path.join(self.tmpdir, "input.po")
+        with open(input_file, "w", encoding="utf-8") as fileobj:
+            fileobj.write(COMPLEX_CATALOG)
+        expected_file = os.path.join(self.tmpdir, "expected.po")
+        POFileUtil(PseudoL10nUtil(util.transforms)).pseudolocalizefile(
+            input_file, expected_file
+        )
+        for name, kwargs in [
+            ("serial", {}),
+            ("streaming", {"streaming": True}),
+            ("sharded", {"workers": 2}),
+        ]:
+            output_file = os.path.join(self.tmpdir, name + ".po")
+            del counted_strings[:]
+            pofileutil.pseudolocalizefile(input_file, output_file, **kwargs)
+            if name == "serial":
+                self.assertEqual(6, len(counted_strings))
+            else:
+                self.assertEqual([], counted_strings)
+            self.assertTrue(filecmp.cmp(expected_file, output_file, shallow=False))
+
+    def test_eviction_and_compact(self):
+        store = PersistentStore(self.filename, max_size=2000)
+        for index in range(10):
+            store.put_many(
+                "fp", [("{} {}".format(index, i), "x" * 50) for i in range(10)]
+            )
+            self.assertLessEqual(store.info().size, 2000)
+        self.assertGreater(store.evictions, 0)
+        self.assertIsNotNone(store.get("fp", "9 9"))  # Most recent results are kept
+        before, after = store.compact(500)
+        self.assertLessEqual(after, before)
+        self.assertLessEqual(store.info().size, 500)
+        self.assertRaises(ValueError, store.compact, -1)
+        store.close()
+
+    def test_concurrent_processes(self):
+        src_root = os.path.join(self.tmpdir, "src")
+        for locale in ["de", "eo", "fr", "ja"]:
+            os.makedirs(os.path.join(src_root, locale))
+            with open(
+                os.path.join(src_root, locale, "messages.po"), "w", encoding="utf-8"
+            ) as fileobj:
+                fileobj.write(COMPLEX_CATALOG)
+        store = PersistentStore(self.filename)
+        pofileutil = POFileUtil(PseudoL10nUtil(store=store))
+        results = pofileutil.pseudolocalize_tree(
+            src_root, os.path.join(self.tmpdir, "dst"), workers=4
+        )
+        self.assertEqual([None] * 4, [result.error for result in results])
+        self.assertEqual(6, store.info().count)
+        store.close()
+
+
+class TestCatalogWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.src_root = os.path.join(self.tmpdir, "src")
+        # Outputs inside the watched tree must not trigger updates.
+        self.dst_root = os.path.join(self.src_root, "pseudo")
+        self.catalog = os.path.join(self.src_root, "de", "messages.po")
+        os.makedirs(os.path.dirname(self.catalog))
+        self.write(self.catalog, COMPLEX_CATALOG)
+        shutil.copy(
+            "./testdata/locales/helloworld.pot",
+            os.path.join(self.src_root, "helloworld.po"),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    @staticmethod
+    def write(filename, text):
+        with open(filename, "w", encoding="utf-8") as fileobj:
+            fileobj.write(text)
+
+    def assertUpToDate(self, input_filename):
+        expected_file = os.path.join(self.tmpdir, "expected.po")
+        POFileUtil().pseudolocalizefile(input_filename, expected_file)
+        output_file = os.path.join(
+            self.dst_root, os.path.relpath(input_filename, self.src_root)
+        )
+        for ext in [".po", ".mo"]:
+            self.assertTrue(
+                filecmp.cmp(
+                    expected_file[:-3] + ext, output_file[:-3] + ext, shallow=False
+                )
+            )
+
+    def backends(self):
+        return ["poll", "inotify"] if _libc() is not None else ["poll"]
+
+    def test_updates(self):
+        for backend in self.backends():
+            with (
+                self.subTest(backend=backend),
+                CatalogWatcher(
+                    self.src_root, self.dst_root, backend=backend, poll_interval=0.01
+                ) as watcher,
+            ):
+                shutil.rmtree(self.dst_root, ignore_errors=True)
+                self.assertEqual(2, len(watcher.sync()))
+                self.assertUpToDate(self.catalog)
+                self.assertEqual([], watcher.sync())
+
+                # Changes to entries, the header and obsolete entries, with an unchanged catalog in the same burst.
+                catalog = (
+                    COMPLEX_CATALOG.replace("Open %(name)s", "Close %(name)s")
+                    .replace("X-Custom: foo", "X-Custom: bar")
+                    .replace('#~ msgstr "Old"', '#~ msgstr "Older"')
+                )
+                self.write(self.catalog, catalog + '\nmsgid "New"\nmsgstr ""\n')
+                shutil.copy(
+                    "./testdata/locales/helloworld.pot",
+                    os.path.join(self.src_root, "helloworld.po"),
+                )
+                results = watcher.poll(5)
+                self.assertEqual([self.catalog], [r.input_filename for r in results])
+                self.assertIsNone(results[0].error)
+                self.assertUpToDate(self.catalog)
+                self.assertEqual([], watcher.poll(0.1))
+
+                new_catalog = os.path.join(self.src_root, "fr", "LC_MESSAGES", "x.po")
+                os.makedirs(os.path.dirname(new_catalog))
+                self.write(new_catalog, COMPLEX_CATALOG)
+                results = watcher.poll(5)
+                self.assertEqual([new_catalog], [r.input_filename for r in results])
+                self.assertUpToDate(new_catalog)
+
+                shutil.rmtree(os.path.join(self.src_root, "fr"))
+                results = watcher.poll(5)
+                self.assertEqual(
+                    [(new_catalog, None)],
+                    [(r.input_filename, r.output_filename) for r in results],
+                )
+                self.assertEqual(
+                    [], os.listdir(os.path.join(self.dst_root, "fr", "LC_MESSAGES"))
+                )
+
+                self.write(self.catalog, "bogus line\n")
+                results = watcher.poll(5)
+                self.assertIn("Syntax error", results[0].error)
+                self.write(self.catalog, COMPLEX_CATALOG)
+                self.assertEqual(1, len(watcher.poll(5)))
+                self.assertUpToDate(self.catalog)
+
+    def test_run(self):
+        import threading
+
+        stop = threading.Event()
+        updates = []
+
+        def callback(results):
+            updates.append(results)
+            if len(updates) == 1:
+                self.write(self.catalog, COMPLEX_CATALOG + "\n")
+            else:
+                stop.set()
+
+        watcher = CatalogWatcher(
+            self.src_root, self.dst_root, backend="poll", poll_interval=0.01
+        )
+        thread = threading.Thread(target=watcher.run, args=(callback, stop))
+        thread.start()
+        thread.join(10)
+        watcher.close()
+        self.assertFalse(thread.is_alive())
+        self.assertEqual([2, 1], [len(results) for results in updates])
+        self.assertRaises(
+            ValueError, CatalogWatcher, self.src_root, self.dst_root, backend="kqueue"
+        )
+
+
+EXTRACT_SOURCE = """import gettext
+
+translations = gettext.translation("app", fallback=True)
+
+# Not for translators
+# TRANSLATORS: Title of the main window,
+# keep it short
+print(_("Title"))
+print(translations.ngettext("%d file", "%d files", 3))  # TRANSLATORS: not extracted
+print(pgettext("menu", "Open"), pgettext("verb", "Open"))
+print(_(name), _(f"Hi {name}"), _(""), _("Title"), tr("Custom"))
+print(dgettext("domain", "Hello %(name)s"))
+print(_(
+    "Implicit "
+    "concatenation"))
+"""
+
+
+class TestAtomicFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.filename = os.path.join(self.tmpdir, "out.txt")
+
+    def write(self, text):
+        output = AtomicFile(self.filename, "w", encoding="utf-8")
+        with output as fileobj:
+            fileobj.write(text)
+        return output.changed
+
+    def test_changed(self):
+        self.assertTrue(self.write("ñ"))
+        os.chmod(self.filename, 0o640)
+        os.utime(self.filename, ns=(10**9, 10**9))
+        self.assertFalse(self.write("ñ"))
+        self.assertEqual(10**9, os.stat(self.filename).st_mtime_ns)
+        self.assertTrue(self.write("n"))
+        self.assertTrue(self.write("m"))  # Same size, different content
+        self.assertEqual(0o640, os.stat(self.filename).st_mode & 0o777)
+        with open(self.filename, encoding="utf-8") as fileobj:
+            self.assertEqual("m", fileobj.read())
+        self.assertEqual(["out.txt"], os.listdir(self.tmpdir))
+        self.assertFalse(write_file(self.filename, [b"m"]))
+        self.assertRaises(ValueError, AtomicFile, self.filename, "a")
+
+    def test_error(self):
+        self.write("Complete")
+        with self.assertRaises(RuntimeError):
+            with AtomicFile(self.filename) as fileobj:
+                fileobj.write(b"Trunc")
+                raise RuntimeError()
+        with open(self.filename, encoding="utf-8") as fileobj:
+            self.assertEqual("Complete", fileobj.read())
+        self.assertEqual(["out.txt"], os.listdir(self.tmpdir))
+
+    def test_outputs(self):
+        po_file = os.path.join(self.tmpdir, "helloworld.po")
+        mo_file = os.path.join(self.tmpdir, "helloworld.mo")
+        util = POFileUtil()
+        self.assertEqual(
+            {po_file: True, mo_file: True},
+            util.pseudolocalizefile("./testdata/locales/helloworld.pot", po_file),
+        )
+        os.utime(po_file, ns=(10**9, 10**9))
+        for kwargs in ({}, {"incremental": True}, {"workers": 2}):
+            with self.subTest(**kwargs):
+                self.assertEqual(
+                    {po_file: False, mo_file: False},
+                    util.pseudolocalizefile(
+                        "./testdata/locales/helloworld.pot", po_file, **kwargs
+                    ),
+                )
+                self.assertEqual(10**9, os.stat(po_file).st_mtime_ns)
+        self.assertEqual(
+            {po_file: False},
+            util.pseudolocalizefile(
+                "./testdata/locales/helloworld.pot", po_file, streaming=True
+            ),
+        )
+
+        json_file = os.path.join(self.tmpdir, "strings.json")
+        with open(json_file, "w", encoding="utf-8") as fileobj:
+            json.dump({"greeting": "Hello"}, fileobj)
+        output_file = os.path.join(self.tmpdir, "strings.eo.json")
+        for changed in (True, False):
+            self.assertEqual(
+                {output_file: changed},
+                JSONFileUtil().pseudolocalizefile(json_file, output_file),
+            )
+
+        dst_root = os.path.join(self.tmpdir, "pseudo")
+        for changed in (True, False):
+            results = util.pseudolocalize_tree("./testdata/locales", dst_root, 1)
+            self.assertEqual(
+                [[changed] * 2], [list(r.changed.values()) for r in results]
+            )
+
+
+class TestExtract(unittest.TestCase):
+    def test_extract_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source_file = os.path.join(tmpdir, "app.py")
+            with open(source_file, "w", encoding="utf-8") as fileobj:
+                fileobj.write(EXTRACT_SOURCE)
+            entries = extract_file(
+                source_file, comment_tags=("TRANSLATORS:",), basedir=tmpdir
+            )
+            self.assertEqual(
+                [
+                    (None, "Title", ""),
+                    (None, "%d file", "%d files"),
+                    ("menu", "Open", ""),
+                    ("verb", "Open", ""),
+                    (None, "Hello %(name)s", ""),
+                    (None, "Implicit concatenation", ""),
+                ],
+                [(e.msgctxt, e.msgid, e.msgid_plural) for e in entries],
+            )
+            self.assertEqual(
+                [("app.py", "8"), ("app.py", "11")], entries[0].occurrences
+            )
+            self.assertEqual(
+                "TRANSLATORS: Title of the main window,\nkeep it short",
+                entries[0].comment,
+            )
+            self.assertEqual("", entries[1].comment)
+            self.assertEqual([("app.py", "13")], entries[5].occurrences)
+
+            entries = extract_file(
+                source_file, dict([parse_keyword("tr")]), basedir=tmpdir
+            )
+            self.assertEqual(["Custom"], [e.msgid for e in entries])
+
+            with open(source_file, "a", encoding="utf-8") as fileobj:
+                fileobj.write("print(_('Unclosed'\n")
+            with self.assertRaisesRegex(OSError, r"Syntax error in .*app.py"):
+                extract_file(source_file)
+
+    def test_extract_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filenames = []
+            for name, source in (
+                ("a", EXTRACT_SOURCE),
+                ("b", "_('Other')\n_('Title')\n"),
+            ):
+                filenames.append(os.path.join(tmpdir, name + ".py"))
+                with open(filenames[-1], "w", encoding="utf-8") as fileobj:
+                    fileobj.write(source)
+            serial = extract_files(filenames, basedir=tmpdir, workers=1)
+            parallel = extract_files(filenames, basedir=tmpdir, workers=2)
+            self.assertEqual(
+                [str(entry) for entry in serial], [str(entry) for entry in parallel]
+            )
+            self.assertEqual("Other", serial[-1].msgid)
+            self.assertRaises(ValueError, extract_files, filenames, workers=0)
+            self.assertEqual(
+                [("a.py", "8"), ("a.py", "11"), ("b.py", "2")], serial[0].occurrences
+            )
+
+    def test_parse_keyword(self):
+        self.assertEqual(("tr", ("msgid",)), parse_keyword("tr"))
+        self.assertEqual(("tr", (None, "msgid")), parse_keyword("tr:2"))
+        self.assertEqual(("ntr", ("msgid", "msgid_plural")), parse_keyword("ntr:1,2"))
+        self.assertEqual(("ptr", ("msgctxt", "msgid")), parse_keyword("ptr:2,1c"))
+        for spec in ("", "1tr", "tr:0", "tr:1c", "tr:x", "tr:1,1"):
+            with self.subTest(spec=spec):
+                self.assertRaises(ValueError, parse_keyword, spec)
+
+    def test_pseudolocalize_sources(self):
+        expected = polib.pofile("./testdata/locales/eo/LC_MESSAGES/helloworld.po")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_file = os.path.join(tmpdir, "helloworld.po")
+            mo_file = os.path.join(tmpdir, "helloworld.mo")
+            changed = POFileUtil().pseudolocalize_sources(
+                ["./testdata/helloworld.py"], output_file, basedir="./testdata"
+            )
+            self.assertEqual({output_file: True, mo_file: True}, changed)
+            po_file = polib.pofile(output_file)
+            self.assertEqual(
+                [(e.msgid, e.msgstr) for e in expected],
+                [(e.msgid, e.msgstr) for e in po_file],
+            )
+            self.assertEqual([("helloworld.py", "8")], po_file[0].occurrences)
+            self.assertNotIn("POT-Creation-Date", po_file.metadata)
+            with open(mo_file, "rb") as fileobj:
+                translations = gettext.GNUTranslations(fileobj)
+            self.assertEqual(expected[1].msgstr, translations.gettext("Hello {0}!"))
+            self.assertRaises(
+                OSError,
+                POFileUtil().pseudolocalize_sources,
+                ["./testdata/helloworld.py"],
+                output_file,
+                overwrite_existing=False,
+            )
+
+
+class TestCompiledPipeline(unittest.TestCase):
+    def setUp(self):
+        self.corpus = random_corpus(1234, 2000)
+
+    def test_matches_reference(self):
+        all_transforms = [
+            [
+                transforms.transliterate_diacritic,
+                transforms.pad_length,
+                transforms.square_brackets,
+            ],
+            [
+                transforms.transliterate_circled,
+                transforms.transliterate_fullwidth,
+                transforms.angle_brackets,
+            ],
+            [
+                transforms.pad_length,
+                transforms.transliterate_diacritic,
+                transforms.transliterate_circled,
+            ],
+            [
+                transforms.expand_vowels,
+                transforms.transliterate_fullwidth,
+                transforms.curly_brackets,
+            ],
+            [transforms.simple_square_brackets],
+            [],
+        ]
+        for regex in [DEFAULT_PLACEHOLDER_REGEX, re.compile(r"(\\n|{\w+}|%s)")]:
+            for munges in all_transforms:
+                pipeline = CompiledPipeline(munges, regex)
+                for s in self.corpus:
+                    self.assertEqual(
+                        reference_pseudolocalize(s, munges, regex),
+                        pipeline.pseudolocalize(s),
+                    )
+
+    def test_compile_freezes_transforms(self):
+        util = PseudoL10nUtil()
+        pipeline = util.compile()
+        util.transforms = [transforms.transliterate_fullwidth]
+        self.assertEqual(
+            PseudoL10nUtil().pseudolocalize("Hello {0}"),
+            pipeline.pseudolocalize("Hello {0}"),
+        )
+        self.assertEqual("Ｈｅｌｌｏ {0}", util.pseudolocalize("Hello {0}"))
+
+    def test_empty_and_invalid(self):
+        pipeline = PseudoL10nUtil().compile()
+        self.assertEqual("", pipeline.pseudolocalize(""))
+        self.assertEqual("", pipeline.pseudolocalize(None))
+        self.assertRaises(TypeError, pipeline.pseudolocalize, b"Hello")
+
+    def test_fingerprint(self):
+        pipeline = CompiledPipeline([transforms.transliterate_diacritic])
+        self.assertEqual(
+            pipeline.fingerprint,
+            CompiledPipeline([transforms.transliterate_diacritic]).fingerprint,
+        )
+        self.assertNotEqual(
+            pipeline.fingerprint,
+            CompiledPipeline([transforms.transliterate_circled]).fingerprint,
+        )
+        self.assertNotEqual(
+            pipeline.fingerprint,
+            CompiledPipeline(
+                [transforms.transliterate_diacritic], re.compile(r"({\w+})")
+            ).fingerprint,
+        )
+        # Upgrading the package or editing a transform changes the fingerprint.
+        with unittest.mock.patch("pseudol10nutil.__version__", "0.0.0"):
+            self.assertNotEqual(
+                pipeline.fingerprint,
+                CompiledPipeline([transforms.transliterate_diacritic]).fingerprint,
+            )
+        self.assertNotEqual(
+            CompiledPipeline([counting_brackets]).fingerprint,
+            CompiledPipeline([edited_brackets]).fingerprint,
+        )
+        # So does editing a table a transform reads or a function it calls, by name or from a module.
+        for munge, target, value in [
+            (transforms.pad_length, "padding_chars", ("-",)),
+            (transforms.pad_length, "_target_lengths", ((10, 2),)),
+            (transforms.expand_vowels, "_vowels", "aeiou"),
+            (counting_brackets, "simple_square_brackets", edited_brackets),
+        ]:
+            fingerprint = CompiledPipeline([munge]).fingerprint
+            with unittest.mock.patch.object(transforms, target, value):
+                self.assertNotEqual(
+                    fingerprint, CompiledPipeline([munge]).fingerprint, target
+                )
+            self.assertEqual(fingerprint, CompiledPipeline([munge]).fingerprint)
+        # Transforms without a stable name can't be identified.
+        for munge in [
+            make_prefix("A:"),
+            lambda s, fmt_spec: s,
+            functools.partial(transforms.pad_length),
+            PseudoL10nUtil().pseudolocalize,
+        ]:
+            pipeline = CompiledPipeline([transforms.transliterate_diacritic, munge])
+            self.assertIsNone(pipeline.fingerprint)
+
+    def test_pickle(self):
+        pipeline = CompiledPipeline(
+            [transforms.transliterate_diacritic, transforms.transliterate_circled]
+        )
+        self.assertEqual(
+            pipeline.pseudolocalize("Hello"),
+            pickle.loads(pickle.dumps(pipeline)).pseudolocalize("Hello"),
+        )
+
+
+class TestPseudoTranslations(unittest.TestCase):
+    def setUp(self):
+        self.translations = PseudoTranslations(cache_size=2)
+        self.util = PseudoL10nUtil()
+
+    def test_lookups(self):
+        t = self.translations
+        self.assertEqual(
+            self.util.pseudolocalize("Hello {0}!"), t.gettext("Hello {0}!")
+        )
+        self.assertEqual(
+            self.util.pseudolocalize("file"), t.ngettext("file", "files", 1)
+        )
+        self.assertEqual(
+            self.util.pseudolocalize("files"), t.ngettext("file", "files", 2)
+        )
+        self.assertEqual(self.util.pseudolocalize("Open"), t.pgettext("menu", "Open"))
+        self.assertEqual(
+            self.util.pseudolocalize("%d files"),
+            t.npgettext("menu", "%d file", "%d files", 0),
+        )
+
+    def test_cache(self):
+        t = self.translations
+        t.gettext("One")
+        t.gettext("One")
+        t.pgettext("context", "One")
+        t.gettext("Two")
+        t.gettext("Three")
+        info = t.cache_info()
+        self.assertEqual(
+            (2, 3, 2, 2), (info.hits, info.misses, info.maxsize, info.currsize)
+        )
+        t.cache_clear()
+        self.assertEqual(0, t.cache_info().currsize)
+
+    def test_install(self):
+        self.translations.install(names=["ngettext"])
+        try:
+            self.assertEqual(self.util.pseudolocalize("Hello"), builtins._("Hello"))
+            self.assertEqual(
+                self.util.pseudolocalize("files"),
+                builtins.ngettext("file", "files", 3),
+            )
+        finally:
+            del builtins._
+            del builtins.ngettext
+
+
+class TestTokenizer(unittest.TestCase):
+    def test_default_matches_regex(self):
+        for s in random_corpus(20, 2000):
+            spans = DEFAULT_TOKENIZER.tokenize(s)
+            self.assertEqual(s, "".join(spans))
+            self.assertEqual(1, len(spans) % 2)
+            pieces = DEFAULT_PLACEHOLDER_REGEX.split(s)
+            if len(pieces) == 1:
+                self.assertEqual([s], spans)
+                continue
+            # Same classification as matching each piece of re.split() on its own.
+            text = [p for p in pieces if not DEFAULT_PLACEHOLDER_REGEX.match(p)]
+            self.assertEqual([p for p in text if p], [p for p in spans[::2] if p])
+
+    def test_escaped_newline_between_placeholders(self):
+        self.assertEqual(
+            ["", "{0}", "", "\\n", "", "{1}", ""],
+            DEFAULT_TOKENIZER.tokenize("{0}\\n{1}"),
+        )
+        self.assertEqual(["Line\\nNext"], DEFAULT_TOKENIZER.tokenize("Line\\nNext"))
+
+    def test_grammars(self):
+        tokenizer = Tokenizer([ICU_MESSAGE_FORMAT, QT, HTML, PRINTF])
+        self.assertEqual(
+            ["", "{count, plural, one {# file} other {# files}}", " in ", "<b>", ""]
+            + ["%1", "", "</b>", " (", "%s", ")"],
+            tokenizer.tokenize(
+                "{count, plural, one {# file} other {# files}} in <b>%1</b> (%s)"
+            ),
+        )
+        self.assertEqual(
+            ["", "%L1", " files"], Tokenizer([QT, PRINTF]).tokenize("%L1 files")
+        )
+        self.assertEqual(
+            ["Total: ", "{0,number,#.##}", " {x}"],
+            Tokenizer([JAVA_MESSAGE_FORMAT]).tokenize("Total: {0,number,#.##} {x}"),
+        )
+
+    def test_pseudolocalize(self):
+        util = PseudoL10nUtil(
+            [transforms.transliterate_circled, transforms.expand_vowels],
+            Tokenizer([QT, PRINTF]),
+        )
+        self.assertEqual("%1 ⓕⓘⓘⓘⓘⓘⓘⓘⓛⓔⓔⓔⓔⓔⓔⓔⓢ", util.pseudolocalize("%1 files"))
+        self.assertEqual("ⓒⓞⓞⓞⓞⓞⓞⓞⓞⓞⓟⓨ", util.pseudolocalize("copy"))
+
+    def test_from_regex(self):
+        tokenizer = Tokenizer.from_regex(re.compile(r"({\w+})"))
+        self.assertEqual(["a ", "{b}", "", "{c}", ""], tokenizer.tokenize("a {b}{c}"))
+        self.assertEqual(["a b"], tokenizer.tokenize("a b"))
+        self.assertEqual(tokenizer.pattern, tokenizer.regex.pattern)
+
+    def test_pickle(self):
+        tokenizer = Tokenizer([QT, PRINTF])
+        copy = pickle.loads(pickle.dumps(tokenizer))
+        self.assertEqual(tokenizer.pattern, copy.pattern)
+        self.assertEqual(tokenizer.tokenize("%1 %s"), copy.tokenize("%1 %s"))
+        regex = Tokenizer.from_regex(re.compile(r"(%s)"))
+        self.assertEqual(
+            ["", "%s", ""], pickle.loads(pickle.dumps(regex)).tokenize("%s")
+        )
+
+
+@unittest.skipUnless(numpy, "NumPy is not installed")
+class TestAdversarialInputs(unittest.TestCase):
+    """
+    Strings which take the placeholder regex quadratic time, e.g. many placeholders that are never closed, which
+    pseudo-localizing has to handle in linear time since the strings may come from untrusted input.
+    """
+
+    tokenizers = [
+        DEFAULT_TOKENIZER,
+        Tokenizer((QT, JAVA_MESSAGE_FORMAT, ICU_MESSAGE_FORMAT) + DEFAULT_GRAMMARS),
+        Tokenizer((XML_MARKUP, ANDROID_ESCAPE) + DEFAULT_GRAMMARS),
+    ]
+    # Repeated to make up the strings.  "<" and "{" have no closing character, "{ }" every other one on each line.
+    units = [
+        "<",
+        "< ",
+        "{",
+        "{ ",
+        "{\n{ }",
+        "%",
+        "%(",
+        "%(x",
+        "\\",
+        "<{%(\\n",
+        "{a{b}",
+        "&a",
+    ]
+    # Units making up strings with unclosed placeholders, which are scanned.
+    unclosed_units = {"<", "< ", "{", "{ ", "{\n{ }", "<{%(\\n"}
+    length = 20000
+
+    @staticmethod
+    def has_unclosed(s):
+        for opening, closing, excluded in [("<", ">", ""), ("{", "}", "\n")]:
+            for index, char in enumerate(s):
+                if char == opening:
+                    end = index + 1
+                    while end < len(s) and s[end] != closing and s[end] not in excluded:
+                        end += 1
+                    if end == len(s) or s[end] != closing:
+                        return True
+        return False
+
+    def test_matches_regex(self):
+        rng = random.Random(25)
+        for _ in range(5000):
+            s = "".join(
+                rng.choice("ab %()sd{}<>\\n\n&#;1L,") for _ in range(rng.randint(0, 60))
+            )
+            for tokenizer in self.tokenizers:
+                self.assertEqual(tokenizer.regex.split(s), tokenizer._scan(s), s)
+                self.assertEqual(self.has_unclosed(s), tokenizer._has_unclosed(s), s)
+        # Strings with an unclosed placeholder, which are scanned.
+        for s in random_corpus(26, 500):
+            s = s + "<" + s
+            spans = DEFAULT_TOKENIZER.tokenize(s)
+            self.assertEqual(s, "".join(spans))
+            with unittest.mock.patch.object(
+                DEFAULT_TOKENIZER, "_has_unclosed", return_value=False
+            ):
+                self.assertEqual(DEFAULT_TOKENIZER.tokenize(s), spans)
+
+    def test_linear_scan(self):
+        class CountingStr(str):
+            """
+            String counting the characters its find() method looks through.
+            """
+
+            scanned = 0
+
+            def find(self, sub, start=0):
+                index = str.find(self, sub, start)
+                self.scanned += (len(self) if index < 0 else index) - start
+                return index
+
+        for tokenizer in self.tokenizers:
+            for unit in self.units:
+                with self.subTest(tokenizer=tokenizer, unit=unit):
+                    s = CountingStr(unit * (self.length // len(unit)))
+                    with unittest.mock.patch.object(
+                        tokenizer, "_scan", wraps=tokenizer._scan
+                    ) as scan:
+                        self.assertEqual(s, "".join(tokenizer.tokenize(s)))
+                    # Only strings with unclosed placeholders are scanned, and each character closing them is looked
+                    # for at most once in each part of the string.
+                    self.assertEqual(unit in self.unclosed_units, scan.called)
+                    self.assertLessEqual(s.scanned, 3 * len(s))
+
+    def test_unclosed_tail(self):
+        # A few unclosed placeholders before a long text are enough for the regex to take time.
+        tail = "a" * self.length
+        for s, scanned in [
+            ("{" * 63 + tail, True),
+            ("<" * 63 + tail, True),
+            ("a < b" + tail, True),
+            ("{\n" + tail + "}", True),
+            ("<b>{0}" * 63 + tail, False),
+            ("{" * 63 + tail + "}", False),
+            ("<" * 63 + tail + ">", False),
+        ]:
+            with self.subTest(s=s[:10]):
+                with unittest.mock.patch.object(
+                    DEFAULT_TOKENIZER, "_scan", wraps=DEFAULT_TOKENIZER._scan
+                ) as scan:
+                    spans = DEFAULT_TOKENIZER.tokenize(s)
+                self.assertEqual(scanned, scan.called)
+                self.assertEqual(DEFAULT_TOKENIZER.regex.split(s), spans)
+
+
+class TestVectorizedPipeline(unittest.TestCase):
+    def test_matches_compiled_pipeline(self):
+        strings = random_corpus(30, 3000) + ["", "\ud800x", "{0}\\n{1}"]
+        for munges in [
+            PseudoL10nUtil().transforms,
+            [
+                transforms.transliterate_circled,
+                transforms.transliterate_fullwidth,
+                transforms.simple_square_brackets,
+                transforms.pad_length,
+                transforms.angle_brackets,
+            ],
+            [transforms.pad_length],
+            [transforms.transliterate_fullwidth],
+            [],
+        ]:
+            for regex in [None, re.compile(r"(\\n|{\w+}|%s)"), Tokenizer([QT, HTML])]:
+                pipeline = CompiledPipeline(munges, regex)
+                vectorized = VectorizedPipeline(munges, regex)
+                self.assertEqual(
+                    [pipeline.pseudolocalize(s) for s in strings],
+                    vectorized.pseudolocalize_many(iter(strings)),
+                )
+
+    def test_inputs(self):
+        vectorized = VectorizedPipeline(PseudoL10nUtil().transforms)
+        pipeline = vectorized.pipeline
+        self.assertEqual(
+            {"a": pipeline.pseudolocalize("Hello %s"), "b": ""},
+            vectorized.pseudolocalize_many({"a": "Hello %s", "b": None}),
+        )
+        self.assertEqual([], vectorized.pseudolocalize_many([]))
+        self.assertEqual(pipeline.fingerprint, vectorized.fingerprint)
+        with self.assertRaises(TypeError):
+            vectorized.pseudolocalize_many(["a", 1])
+
+    def test_unsupported_transforms(self):
+        with self.assertRaises(ValueError):
+            VectorizedPipeline([transforms.expand_vowels])
+        with self.assertRaises(ValueError):
+            VectorizedPipeline(
+                [transforms.pad_length, transforms.transliterate_diacritic]
+            )
+
+
+class TestCommandLine(unittest.TestCase):
+    def run_strings(self, text, *args):
+        stdin = io.TextIOWrapper(io.BytesIO(text.encode("utf-8")), encoding="utf-8")
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        stderr = io.StringIO()
+        with unittest.mock.patch.multiple(
+            "sys", stdin=stdin, stdout=stdout, stderr=stderr
+        ):
+            status = cli_main(["strings", *args])
+        return status, stdout.buffer.getvalue().decode("utf-8"), stderr.getvalue()
+
+    def test_strings(self):
+        util = PseudoL10nUtil()
+        strings = random_corpus(40, 200)
+        strings = [s.replace("\n", " ") for s in strings]
+        status, output, _ = self.run_strings("\n".join(strings) + "\n")
+        self.assertEqual(0, status)
+        self.assertEqual(
+            [util.pseudolocalize(s) for s in strings], output.split("\n")[:-1]
+        )
+
+        status, output, stats = self.run_strings(
+            "Open\n", "-t", "transliterate_fullwidth,curly_brackets", "--stats"
+        )
+        self.assertEqual("❴Ｏｐｅｎ❵\n", output)
+        self.assertIn("1 strings, 4 characters", stats)
+
+    def test_ndjson(self):
+        util = PseudoL10nUtil()
+        status, output, _ = self.run_strings(
+            '"Hello %s"\n\n{"a": "Open", "b": null}\n', "--ndjson"
+        )
+        self.assertEqual(0, status)
+        self.assertEqual(
+            [
+                util.pseudolocalize("Hello %s"),
+                "",
+                {"a": util.pseudolocalize("Open"), "b": ""},
+            ],
+            [json.loads(line) if line else "" for line in output.split("\n")[:-1]],
+        )
+        status, _, error = self.run_strings('"Open"\n[1]\n', "--ndjson")
+        self.assertEqual(1, status)
+        self.assertIn("line 2", error)
+
+    def test_unknown_transform(self):
+        with unittest.mock.patch("sys.stderr", io.StringIO()):
+            with self.assertRaises(SystemExit):
+                cli_main(["strings", "-t", "pad_length,bold"])
+
+    def test_invalid_jobs(self):
+        for mode in ["files", "extract"]:
+            for jobs in ["0", "-2", "many"]:
+                with self.subTest(mode=mode, jobs=jobs):
+                    with unittest.mock.patch("sys.stderr", io.StringIO()) as stderr:
+                        with self.assertRaises(SystemExit) as context:
+                            cli_main([mode, "-o", "out", "-j", jobs, "in"])
+                    self.assertEqual(2, context.exception.code)
+                    self.assertIn("invalid number of jobs", stderr.getvalue())
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with unittest.mock.patch("sys.stderr", io.StringIO()) as stderr:
+                status = cli_main(
+                    ["files", "-o", tmpdir, "-j", "2", "--stats", "./testdata/locales"]
+                )
+            self.assertEqual(0, status)
+            self.assertIn("2 catalogs (0 failed)", stderr.getvalue())
+            self.assertIn("2 changed", stderr.getvalue())
+            self.assertEqual(
+                polib.pofile(os.path.join(tmpdir, "helloworld.po")).to_binary(),
+                polib.mofile(os.path.join(tmpdir, "helloworld.mo")).to_binary(),
+            )
+            self.assertTrue(
+                os.path.isfile(
+                    os.path.join(tmpdir, "eo", "LC_MESSAGES", "helloworld.po")
+                )
+            )
+
+    def test_files_store(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store_file = os.path.join(tmpdir, "store.db")
+            with unittest.mock.patch("sys.stderr", io.StringIO()):
+                status = cli_main(
+                    [
+                        "files",
+                        "-o",
+                        tmpdir,
+                        "--store",
+                        store_file,
+                        "--store-max-size",
+                        "1M",
+                        "./testdata/locales/helloworld.pot",
+                    ]
+                )
+            self.assertEqual(0, status)
+            store = PersistentStore(store_file)
+            self.assertEqual(2, store.info().count)
+            store.close()
+            with unittest.mock.patch("sys.stderr", io.StringIO()) as stderr:
+                status = cli_main(["compact-store", "--max-size", "1", store_file])
+            self.assertEqual(0, status)
+            self.assertIn("0 results", stderr.getvalue())
+            with unittest.mock.patch("sys.stderr", io.StringIO()):
+                with self.assertRaises(SystemExit):
+                    cli_main(["compact-store", "--max-size", "lots", store_file])
+
+    def test_extract(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_file = os.path.join(tmpdir, "pseudo", "messages.po")
+            with unittest.mock.patch("sys.stderr", io.StringIO()) as stderr:
+                status = cli_main(
+                    [
+                        "extract",
+                        "-o",
+                        output_file,
+                        "-k",
+                        "tr:2",
+                        "--stats",
+                        "./testdata",
+                    ]
+                )
+            self.assertEqual(0, status)
+            self.assertIn("1 files in", stderr.getvalue())
+            self.assertIn("2 of 2 outputs changed", stderr.getvalue())
+            self.assertEqual(2, len(polib.pofile(output_file)))
+            self.assertTrue(
+                os.path.isfile(os.path.join(tmpdir, "pseudo", "messages.mo"))
+            )
+            with unittest.mock.patch("sys.stderr", io.StringIO()) as stderr:
+                status = cli_main(
+                    ["extract", "-o", output_file, "-k", "tr:0", "./testdata"]
+                )
+            self.assertEqual(1, status)
+            self.assertIn("Invalid keyword", stderr.getvalue())
+
+    def test_find_catalogs_errors(self):
+        with unittest.mock.patch("sys.stderr", io.StringIO()) as stderr:
+            status = cli_main(["files", "-o", "out", "./testdata/*.missing"])
+        self.assertEqual(1, status)
+        self.assertIn("no message catalogs found", stderr.getvalue())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ("a", "b"):
+                os.makedirs(os.path.join(tmpdir, name))
+                shutil.copy(
+                    "./testdata/locales/helloworld.pot", os.path.join(tmpdir, name)
+                )
+            with unittest.mock.patch("sys.stderr", io.StringIO()) as stderr:
+                status = cli_main(
+                    ["files", "-o", tmpdir, os.path.join(tmpdir, "*", "*.pot")]
+                )
+            self.assertEqual(1, status)
+            self.assertIn("would both be written to", stderr.getvalue())
+
+
+XLIFF_12 = """<?xml version="1.0" encoding="UTF-8"?>
+<!-- Header comment -->
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">
+  <file source-language="en" target-language="eo" datatype="plaintext" original="app">
+    <body>
+      <trans-unit id="1">
+        <source>Hello {name} &amp; welcome</source>
+      </trans-unit>
+      <trans-unit id="2">
+        <source>Click <g id="1">here</g><x id="2"/></source>
+        <target state="new">Old</target>
+        <note>Not translated</note>
+      </trans-unit>
+      <trans-unit id="3" translate="no">
+        <source>Keep</source>
+      </trans-unit>
+    </body>
+  </file>
+</xliff>
+"""
+
+XLIFF_20 = """<xliff xmlns="urn:oasis:names:tc:xliff:document:2.0" version="2.0" srcLang="en">
+  <file id="f1">
+    <unit id="u1">
+      <segment>
+        <source>Open <pc id="1">file</pc></source>
+      </segment>
+      <ignorable>
+        <source> </source>
+      </ignorable>
+    </unit>
+  </file>
+</xliff>
+"""
+
+ANDROID_STRINGS = r"""<?xml version="1.0" encoding="utf-8"?>
+<resources xmlns:xliff="urn:oasis:names:tc:xliff:document:1.2">
+    <!-- Comment -->
+    <string name="app">My App</string>
+    <string name="ref">@string/app</string>
+    <string name="id" translatable="false">ID</string>
+    <string name="escapes">Don\'t\nstop %1$s</string>
+    <string name="markup">Hi <b>you</b> <xliff:g id="n">%d</xliff:g></string>
+    <string-array name="colors"><item>Red</item><item>Blue</item></string-array>
+    <plurals name="files"><item quantity="one">%d file</item><item quantity="other">%d files</item></plurals>
+</resources>
+"""
+
+
+class TestResourceFiles(unittest.TestCase):
+    def setUp(self):
+        self.util = PseudoL10nUtil()
+
+    def pseudolocalize(self, file_util, data, chunk_size=5):
+        file_util.chunk_size = chunk_size  # Split tokens across chunks
+        output = io.BytesIO()
+        file_util.pseudolocalizestream(io.BytesIO(data), output)
+        return output.getvalue()
+
+    def test_abstract_base_classes(self):
+        # A format missing its hook fails when it is created, not halfway through a file.
+        class IncompleteFileUtil(ResourceFileUtil):
+            pass
+
+        class IncompleteXMLFileUtil(_XMLFileUtil):
+            pass
+
+        for cls in [
+            ResourceFileUtil,
+            _XMLFileUtil,
+            IncompleteFileUtil,
+            IncompleteXMLFileUtil,
+        ]:
+            self.assertRaises(TypeError, cls)
+
+    def test_xliff_12(self):
+        output = self.pseudolocalize(XLIFFFileUtil(), XLIFF_12.encode("utf-8"))
+        self.assertIn(b"<!-- Header comment -->", output)
+        ns = {"x": "urn:oasis:names:tc:xliff:document:1.2"}
+        units = xml.etree.ElementTree.fromstring(output).findall(".//x:trans-unit", ns)
+        self.assertEqual(
+            self.util.pseudolocalize("Hello {name} & welcome"),
+            units[0].find("x:target", ns).text,
+        )
+        target = units[1].find("x:target", ns)
+        self.assertEqual("new", target.get("state"))
+        self.assertEqual(1, len(units[1].findall("x:target", ns)))
+        self.assertEqual(
+            transforms.transliterate_diacritic("here", None),
+            target.find("x:g", ns).text,
+        )
+        self.assertIsNotNone(target.find("x:x", ns))
+        self.assertNotIn(b">Old<", output)
+        self.assertIsNone(units[2].find("x:target", ns))
+
+    def test_xliff_20(self):
+        output = self.pseudolocalize(XLIFFFileUtil(), XLIFF_20.encode("utf-8"))
+        ns = {"x": "urn:oasis:names:tc:xliff:document:2.0"}
+        root = xml.etree.ElementTree.fromstring(output)
+        target = root.find(".//x:segment/x:target", ns)
+        self.assertEqual(
+            transforms.transliterate_diacritic("Open ", None), target.text[1:]
+        )
+        self.assertEqual(
+            transforms.transliterate_diacritic("file", None),
+            target.find("x:pc", ns).text,
+        )
+        self.assertIsNone(root.find(".//x:ignorable/x:target", ns))
+
+    def test_android(self):
+        output = self.pseudolocalize(
+            AndroidFileUtil(), ANDROID_STRINGS.encode("utf-8")
+        ).decode("utf-8")
+        root = xml.etree.ElementTree.fromstring(output)
+        strings = {e.get("name"): e for e in root.iter("string")}
+        self.assertEqual(self.util.pseudolocalize("My App"), strings["app"].text)
+        self.assertEqual("@string/app", strings["ref"].text)
+        self.assertEqual("ID", strings["id"].text)
+        self.assertIn(r"Đøñ\'ť\nšťøƥ %1$s", strings["escapes"].text)
+        self.assertEqual(
+            transforms.transliterate_diacritic("you", None),
+            strings["markup"].find("b").text,
+        )
+        self.assertEqual(
+            [
+                self.util.pseudolocalize(s)
+                for s in ("Red", "Blue", "%d file", "%d files")
+            ],
+            [e.text for e in root.iter("item")],
+        )
+        self.assertIn("<!-- Comment -->", output)
+
+    def test_json(self):
+        data = {
+            "title": "Hello {name}",
+            "nested": {"list": ["One", 2, True, None, 'Quote " \\ é']},
+            'key "quoted"': "Value",
+            "number": -1.5e3,
+        }
+        for text in (json.dumps(data, indent=2), json.dumps(data, ensure_ascii=False)):
+            output = self.pseudolocalize(JSONFileUtil(), text.encode("utf-8"), 3)
+            self.assertEqual(
+                {
+                    "title": self.util.pseudolocalize("Hello {name}"),
+                    "nested": {
+                        "list": [
+                            self.util.pseudolocalize("One"),
+                            2,
+                            True,
+                            None,
+                            self.util.pseudolocalize('Quote " \\ é'),
+                        ]
+                    },
+                    'key "quoted"': self.util.pseudolocalize("Value"),
+                    "number": -1.5e3,
+                },
+                json.loads(output),
+            )
+        with self.assertRaises(OSError):
+            self.pseudolocalize(JSONFileUtil(), b'{"a": ["b"}')
+
+    def test_properties(self):
+        data = (
+            "# Comment\n"
+            "greeting = Hello {0}\n"
+            "multi:First \\\n"
+            "    second\n"
+            "key\\ with\\ spaces \\u00e9t\\u00e9\n"
+            "empty=\n"
+        )
+        output = self.pseudolocalize(PropertiesFileUtil(), data.encode("iso-8859-1"))
+        lines = output.decode("iso-8859-1").split("\n")
+        self.assertEqual("# Comment", lines[0])
+
+        def unescape(value):
+            return (
+                value.encode("iso-8859-1")
+                .decode("unicode-escape")
+                .encode("utf-16", "surrogatepass")
+                .decode("utf-16")
+            )
+
+        self.assertEqual(
+            "greeting = " + self.util.pseudolocalize("Hello {0}"), unescape(lines[1])
+        )
+        self.assertEqual(
+            "multi:" + self.util.pseudolocalize("First second"), unescape(lines[2])
+        )
+        self.assertEqual(
+            "key\\ with\\ spaces " + self.util.pseudolocalize("été"),
+            lines[3].split(" ", 2)[0]
+            + " "
+            + lines[3].split(" ", 2)[1]
+            + " "
+            + unescape(lines[3].split(" ", 2)[2]),
+        )
+        self.assertEqual(["empty=", ""], lines[4:])
+
+        output = self.pseudolocalize(
+            PropertiesFileUtil(encoding="utf-8"), b"a=Hello\n"
+        ).decode("utf-8")
+        self.assertEqual("a=" + self.util.pseudolocalize("Hello") + "\n", output)
+
+    def test_get_file_util(self):
+        self.assertIsInstance(get_file_util("values/strings.xml"), AndroidFileUtil)
+        self.assertIsInstance(get_file_util("messages.XLF"), XLIFFFileUtil)
+        self.assertIsInstance(get_file_util("messages.po"), POFileUtil)
+        with self.assertRaises(ValueError):
+            get_file_util("messages.yaml")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_file = os.path.join(tmpdir, "en.json")
+            output_file = os.path.join(tmpdir, "eo.json")
+            with open(input_file, "w", encoding="utf-8") as fileobj:
+                fileobj.write('{"a": "Hello"}')
+            get_file_util(input_file).pseudolocalizefile(input_file, output_file)
+            with open(output_file, encoding="utf-8") as fileobj:
+                self.assertEqual(
+                    {"a": self.util.pseudolocalize("Hello")}, json.load(fileobj)
+                )
+            with self.assertRaises(OSError):
+                JSONFileUtil().pseudolocalizefile(input_file, output_file, False)
+
+    def test_xml_syntax_error(self):
+        with self.assertRaises(OSError):
+            self.pseudolocalize(XLIFFFileUtil(), b"<xliff><file></xliff>")
+
+
+class TestImportTime(unittest.TestCase):
+    # Modules only needed for catalogs, which are imported where they are used.
+    lazy_modules = [
+        "gettext",
+        "inspect",
+        "polib",
+        "pseudol10nutil.mofile",
+        "pseudol10nutil.postream",
+    ]
+
+    def run_python(self, code):
+        return subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+
+    def test_lazy_imports(self):
+        for module, allowed in [
+            ("pseudol10nutil", []),
+            ("pseudol10nutil.transforms", []),
+            # argparse imports gettext.
+            ("pseudol10nutil.cli", ["gettext"]),
+        ]:
+            output = self.run_python(
+                "import sys, {}; print(sorted(set({!r}) & set(sys.modules)))".format(
+                    module, self.lazy_modules
+                )
+            ).stdout
+            self.assertEqual(repr(allowed), output.strip(), module)
+
+    def test_polib_imported_on_use(self):
+        output = self.run_python(
+            "import sys, pseudol10nutil; pseudol10nutil.POFileUtil().pseudolocalizelines([]);"
+            " print('polib' in sys.modules)"
+        ).stdout
+        self.assertEqual("True", output.strip())
+
 
 if __name__ == "__main__":
     unittest.main()